@@ -75,6 +75,70 @@ def _get_marker_param(request):
     return request.GET['marker']
 
 
+def get_limit_and_marker(request, max_limit=FLAGS.osapi_max_limit):
+    """Return (limit, marker) for pushing pagination down to the database.
+
+    The limit is capped at max_limit; a missing or zero limit means
+    max_limit, as with limited().
+    """
+    params = get_pagination_params(request)
+    limit = min(max_limit, params.get('limit') or max_limit)
+    return limit, params.get('marker')
+
+
+def get_sort_params(request, sort_keys, default_key='created_at',
+                    default_dir='desc'):
+    """Return (sort_key, sort_dir) from request or fail.
+
+    Only the columns in sort_keys can be sorted on, so clients cannot
+    order by relationships or by fields the API does not expose.
+    """
+    sort_key = request.GET.get('sort_key', default_key)
+    sort_dir = request.GET.get('sort_dir', default_dir)
+    if sort_key not in sort_keys:
+        msg = _('sort_key must be one of %s') % ', '.join(sort_keys)
+        raise webob.exc.HTTPBadRequest(explanation=msg)
+    if sort_dir not in ('asc', 'desc'):
+        msg = _("sort_dir must be 'asc' or 'desc'")
+        raise webob.exc.HTTPBadRequest(explanation=msg)
+    return sort_key, sort_dir
+
+
+def iter_pages(fetch, marker=None, limit=None, page_size=None):
+    """Return an iterator over items fetched a page at a time.
+
+    Each page is requested with the id of the last item of the previous
+    one as the marker, so only a page of items is held at once.  The
+    first page is fetched before returning, so errors such as an
+    unknown marker are raised here rather than while iterating.
+
+    :param fetch: callable taking marker and limit keyword arguments
+                  and returning a list of items with an 'id' key
+    :param marker: id of the item to start after, or None
+    :param limit: maximum number of items to return, or None for all
+    :param page_size: number of items to fetch at a time, defaults to
+                      osapi_stream_page_size
+    """
+    page_size = page_size or FLAGS.osapi_stream_page_size
+    size = page_size if limit is None else min(page_size, limit)
+    page = fetch(marker=marker, limit=size)
+    return _iter_pages(fetch, page, size, limit, page_size)
+
+
+def _iter_pages(fetch, page, size, limit, page_size):
+    while True:
+        for item in page:
+            yield item
+
+        if limit is not None:
+            limit -= len(page)
+        if len(page) < size or limit == 0:
+            return
+
+        size = page_size if limit is None else min(page_size, limit)
+        page = fetch(marker=page[-1]['id'], limit=size)
+
+
 def limited(items, request, max_limit=FLAGS.osapi_max_limit):
     """Return a slice of items according to requested offset and limit.
 
@@ -357,10 +421,24 @@ class ViewBuilder(object):
 
     def _get_collection_links(self, request, items, id_key="uuid"):
         """Retrieve 'next' link, if applicable."""
+        last_item = items[-1] if items else None
+        return self._get_next_links(request, len(items), last_item, id_key)
+
+    def _get_collection_stream(self, request, items, id_key="uuid"):
+        """Wrap items in a StreamingList followed by the 'next' link."""
+        def extra(count, last_item):
+            links = self._get_next_links(request, count, last_item, id_key)
+            if not links:
+                return {}
+            return {'%s_links' % self._collection_name: links}
+
+        return wsgi.StreamingList(items, extra)
+
+    def _get_next_links(self, request, count, last_item, id_key):
+        """Retrieve 'next' link for a page of count items, if applicable."""
         links = []
         limit = int(request.params.get("limit", 0))
-        if limit and limit == len(items):
-            last_item = items[-1]
+        if limit and limit == count:
             if id_key in last_item:
                 last_item_id = last_item[id_key]
             else:
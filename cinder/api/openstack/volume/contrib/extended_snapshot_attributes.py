@@ -38,8 +38,10 @@ class ExtendedSnapshotAttributesController(wsgi.Controller):
                                                                  **kwargs)
         self.volume_api = volume.API()
 
-    def _get_snapshots(self, context):
-        snapshots = self.volume_api.get_all_snapshots(context)
+    def _get_snapshots(self, context, snapshot_ids):
+        filters = {'id': snapshot_ids}
+        snapshots = self.volume_api.get_all_snapshots(context,
+                                                      filters=filters)
         rval = dict((snapshot['id'], snapshot) for snapshot in snapshots)
         return rval
 
@@ -71,7 +73,8 @@ class ExtendedSnapshotAttributesController(wsgi.Controller):
             resp_obj.attach(xml=ExtendedSnapshotAttributesTemplate())
 
             snapshots = list(resp_obj.obj.get('snapshots', []))
-            db_snapshots = self._get_snapshots(context)
+            db_snapshots = self._get_snapshots(context,
+                    [snapshot['id'] for snapshot in snapshots])
 
             for snapshot_object in snapshots:
                 try:
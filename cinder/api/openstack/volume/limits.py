@@ -0,0 +1,456 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2011 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Module dedicated functions/classes dealing with rate limiting requests.
+"""
+
+import functools
+import re
+import time
+
+import webob.dec
+
+from cinder.api.openstack import wsgi
+from cinder.api.openstack import xmlutil
+from cinder import flags
+from cinder import quota
+from cinder import wsgi as base_wsgi
+
+
+FLAGS = flags.FLAGS
+
+
+# Convenience constants for the limits dictionary passed to Limiter().
+PER_SECOND = 1
+PER_MINUTE = 60
+PER_HOUR = 60 * 60
+PER_DAY = 60 * 60 * 24
+
+
+limits_nsmap = {None: xmlutil.XMLNS_COMMON_V10, 'atom': xmlutil.XMLNS_ATOM}
+
+
+class LimitsTemplate(xmlutil.TemplateBuilder):
+    def construct(self):
+        root = xmlutil.TemplateElement('limits', selector='limits')
+
+        rates = xmlutil.SubTemplateElement(root, 'rates')
+        rate = xmlutil.SubTemplateElement(rates, 'rate', selector='rate')
+        rate.set('uri', 'uri')
+        rate.set('regex', 'regex')
+        limit = xmlutil.SubTemplateElement(rate, 'limit', selector='limit')
+        limit.set('value', 'value')
+        limit.set('verb', 'verb')
+        limit.set('remaining', 'remaining')
+        limit.set('unit', 'unit')
+        limit.set('next-available', 'next-available')
+
+        absolute = xmlutil.SubTemplateElement(root, 'absolute',
+                                              selector='absolute')
+        limit = xmlutil.SubTemplateElement(absolute, 'limit',
+                                           selector=xmlutil.get_items)
+        limit.set('name', 0)
+        limit.set('value', 1)
+
+        return xmlutil.MasterTemplate(root, 1, nsmap=limits_nsmap)
+
+
+class LimitsController(object):
+    """
+    Controller for accessing limits in the OpenStack API.
+    """
+
+    @wsgi.serializers(xml=LimitsTemplate)
+    def index(self, req):
+        """
+        Return all global and rate limit information.
+        """
+        context = req.environ['cinder.context']
+        quotas = quota.get_project_quotas(context, context.project_id)
+        absolute_limits = {
+            'maxTotalVolumes': quotas.get('volumes'),
+            'maxTotalVolumeGigabytes': quotas.get('gigabytes'),
+        }
+        rate_limits = req.environ.get("cinder.limits")
+        if rate_limits is None:
+            # NOTE: looked up here rather than for every request, as the
+            # limit store may be remote.
+            get_limits = req.environ.get("cinder.get_limits")
+            rate_limits = get_limits() if get_limits else []
+
+        return {
+            "limits": {
+                "rate": self._build_rate_limits(rate_limits),
+                "absolute": absolute_limits,
+            },
+        }
+
+    def _build_rate_limits(self, rate_limits):
+        limits = []
+        for rate_limit in rate_limits:
+            _rate_limit_key = None
+            _rate_limit = {
+                "verb": rate_limit["verb"],
+                "value": rate_limit["value"],
+                "remaining": int(rate_limit["remaining"]),
+                "unit": rate_limit["unit"],
+                "next-available": rate_limit["resetTime"],
+            }
+
+            # check for existing key
+            for limit in limits:
+                if (limit["uri"] == rate_limit["URI"] and
+                    limit["regex"] == rate_limit["regex"]):
+                    _rate_limit_key = limit
+                    break
+
+            # ensure we have a key if we didn't find one
+            if not _rate_limit_key:
+                _rate_limit_key = {
+                    "uri": rate_limit["URI"],
+                    "regex": rate_limit["regex"],
+                    "limit": [],
+                }
+                limits.append(_rate_limit_key)
+
+            _rate_limit_key["limit"].append(_rate_limit)
+
+        return limits
+
+
+def create_resource():
+    return wsgi.Resource(LimitsController())
+
+
+class Limit(object):
+    """
+    Stores information about a limit for HTTP requests.
+
+    A limit allows `value` requests per `unit` seconds.  It is enforced
+    as a token bucket holding up to `value` tokens and refilled at
+    `value / unit` tokens per second, so short bursts are allowed but the
+    sustained rate is capped.
+    """
+
+    UNITS = {
+        1: "SECOND",
+        60: "MINUTE",
+        60 * 60: "HOUR",
+        60 * 60 * 24: "DAY",
+    }
+
+    UNIT_MAP = dict([(v, k) for k, v in UNITS.items()])
+
+    def __init__(self, verb, uri, regex, value, unit):
+        """
+        Initialize a new `Limit`.
+
+        @param verb: HTTP verb (POST, PUT, etc.), or * for all verbs
+        @param uri: Human-readable URI
+        @param regex: Regular expression searched for in the request path
+        @param value: Integer number of requests which can be made
+        @param unit: Unit of measure for the value parameter
+        """
+        self.verb = verb
+        self.uri = uri
+        self.regex = regex
+        self.value = int(value)
+        self.unit = unit
+        self.unit_string = self.display_unit().lower()
+        self.regex_compiled = re.compile(regex)
+
+    def matches(self, verb, path):
+        """Whether this limit applies to a request."""
+        return (self.verb in (verb, '*') and
+                self.regex_compiled.search(path) is not None)
+
+    def display_unit(self):
+        """Display the string name of the unit."""
+        return self.UNITS.get(self.unit, "UNKNOWN")
+
+    def display(self, remaining, next_request):
+        """Return a useful representation of this class."""
+        return {
+            "verb": self.verb,
+            "URI": self.uri,
+            "regex": self.regex,
+            "value": self.value,
+            "remaining": int(remaining),
+            "unit": self.display_unit(),
+            "resetTime": int(next_request),
+        }
+
+
+# "Limit" format is a dictionary with the HTTP verb, human-readable URI,
+# a regular-expression to match, value and unit of measure (PER_DAY, etc.)
+
+DEFAULT_LIMITS = [
+    Limit("POST", "*", ".*", 10, PER_MINUTE),
+    Limit("PUT", "*", ".*", 10, PER_MINUTE),
+    Limit("DELETE", "*", ".*", 100, PER_MINUTE),
+    Limit("GET", "*/volumes", "/volumes", 120, PER_MINUTE),
+    Limit("GET", "*/snapshots", "/snapshots", 120, PER_MINUTE),
+]
+
+
+class LocalLimitStore(object):
+    """Keeps the token buckets of each limit in this process."""
+
+    def __init__(self):
+        self.buckets = {}
+
+    def _refill(self, key, limit, now):
+        (tokens, last) = self.buckets.get(key, (limit.value, now))
+        tokens += (now - last) * limit.value / limit.unit
+        return min(tokens, limit.value)
+
+    def consume(self, key, limit, now):
+        """Take a token from the bucket of `key`.
+
+        Returns (remaining, delay), delay being None if a token was taken
+        or else the seconds to wait until one is available.
+        """
+        tokens = self._refill(key, limit, now)
+        if tokens < 1:
+            self.buckets[key] = (tokens, now)
+            return (0, (1 - tokens) * limit.unit / limit.value)
+        self.buckets[key] = (tokens - 1, now)
+        return (int(tokens - 1), None)
+
+    def remaining(self, key, limit, now):
+        """Returns (remaining, time when the bucket will be full)."""
+        tokens = self._refill(key, limit, now)
+        full_in = (limit.value - tokens) * limit.unit / limit.value
+        return (int(tokens), now + full_in)
+
+
+class MemcacheLimitStore(object):
+    """Counts requests in memcached, shared by all API processes.
+
+    memcached cannot update a token bucket atomically, so this store
+    allows `value` requests in each `unit` seconds long window using the
+    atomic add and incr operations.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def _key(self, key, limit, now):
+        window = int(now // limit.unit)
+        return ('ratelimit-%s-%d' % (key, window),
+                (window + 1) * limit.unit)
+
+    def consume(self, key, limit, now):
+        """Count a request against `key`; see LocalLimitStore.consume."""
+        (cache_key, window_end) = self._key(key, limit, now)
+        self.client.add(cache_key, '0', time=limit.unit)
+        count = self.client.incr(cache_key)
+        if count is None:
+            # The window expired between add and incr
+            count = 1
+        if count > limit.value:
+            return (0, window_end - now)
+        return (limit.value - count, None)
+
+    def remaining(self, key, limit, now):
+        """Returns (remaining, time when the window ends)."""
+        (cache_key, window_end) = self._key(key, limit, now)
+        count = int(self.client.get(cache_key) or 0)
+        return (max(limit.value - count, 0), window_end)
+
+
+def get_limit_store():
+    """Returns a store shared through memcached_servers, if set."""
+    if not FLAGS.memcached_servers:
+        return LocalLimitStore()
+    import memcache
+    return MemcacheLimitStore(memcache.Client(FLAGS.memcached_servers,
+                                              debug=0))
+
+
+class RateLimitingMiddleware(base_wsgi.Middleware):
+    """
+    Rate-limits requests passing through this middleware. All limit
+    information is stored in memory for this implementation, or in
+    memcached if memcached_servers is set.
+    """
+
+    def __init__(self, application, limits=None, **kwargs):
+        """
+        Initialize new `RateLimitingMiddleware`, which wraps the given WSGI
+        application and sets up the given limits.
+
+        @param application: WSGI application to wrap
+        @param limits: String describing limits
+        """
+        base_wsgi.Middleware.__init__(self, application)
+
+        if limits is not None:
+            limits = Limiter.parse_limits(limits)
+
+        self._limiter = Limiter(limits or DEFAULT_LIMITS)
+
+    @webob.dec.wsgify(RequestClass=wsgi.Request)
+    def __call__(self, req):
+        """
+        Represents a single call through this middleware. We should record the
+        request if we have a limit relevant to it. If no limit is relevant to
+        the request, ignore it.
+
+        If the request should be rate limited, return a fault telling the user
+        they are over the limit and need to retry later.
+        """
+        verb = req.method
+        path = req.path_info
+
+        context = req.environ.get("cinder.context")
+
+        if context:
+            project_id = context.project_id
+        else:
+            project_id = None
+
+        delay, error = self._limiter.check_for_delay(verb, path, project_id)
+
+        if delay:
+            msg = _("This request was rate-limited.")
+            retry = time.time() + delay
+            return wsgi.OverLimitFault(msg, error, retry)
+
+        req.environ["cinder.get_limits"] = functools.partial(
+                self._limiter.get_limits, project_id)
+
+        return self.application
+
+
+class Limiter(object):
+    """
+    Rate-limit checking class which handles limits in memory.
+    """
+
+    def __init__(self, limits, store=None):
+        """
+        Initialize the new `Limiter`.
+
+        @param limits: List of `Limit` objects
+        @param store: Where the limit state is kept, see get_limit_store
+        """
+        self.limits = list(limits)
+        self.store = store or get_limit_store()
+
+    def _key(self, project_id, index):
+        return '%s-%d' % (project_id, index)
+
+    def get_limits(self, project_id=None):
+        """
+        Return the limits for a given project.
+        """
+        now = time.time()
+        limits = []
+        for (index, limit) in enumerate(self.limits):
+            (remaining, next_request) = self.store.remaining(
+                self._key(project_id, index), limit, now)
+            limits.append(limit.display(remaining, next_request))
+        return limits
+
+    def check_for_delay(self, verb, path, project_id=None):
+        """
+        Check the given verb/path/project triplet for limit.
+
+        @return: Tuple of delay (in seconds) and error message (or None, None)
+        """
+        now = time.time()
+        delays = []
+
+        for (index, limit) in enumerate(self.limits):
+            if not limit.matches(verb, path):
+                continue
+
+            (remaining, delay) = self.store.consume(
+                self._key(project_id, index), limit, now)
+            if delay:
+                delays.append((delay, limit))
+
+        if delays:
+            delays.sort()
+            (delay, limit) = delays[-1]
+            error = _("Only %(value)s %(verb)s request(s) can be made to "
+                      "%(uri)s every %(unit_string)s.") % limit.__dict__
+            return (delay, error)
+
+        return None, None
+
+    # Note: This method gets called before the class is instantiated,
+    # so this must be either a static method or a class method.  It is
+    # used to develop a list of limits to feed to the constructor.  We
+    # put this in the class so that subclasses can override the
+    # default limit parsing.
+    @staticmethod
+    def parse_limits(limits):
+        """
+        Convert a string into a list of Limit instances.  This
+        implementation expects a semicolon-separated sequence of
+        parenthesized groups, where each group contains a
+        comma-separated sequence consisting of HTTP method,
+        user-readable URI, a URI reg-exp, an integer number of
+        requests which can be made, and a unit of measure.  Valid
+        values for the latter are "SECOND", "MINUTE", "HOUR", and
+        "DAY".
+
+        @return: List of Limit instances.
+        """
+
+        # Handle empty limit strings
+        limits = limits.strip()
+        if not limits:
+            return []
+
+        # Split up the limits by semicolon
+        result = []
+        for group in limits.split(';'):
+            group = group.strip()
+            if group[:1] != '(' or group[-1:] != ')':
+                raise ValueError("Limit rules must be surrounded by "
+                                 "parentheses")
+            group = group[1:-1]
+
+            # Extract the Limit arguments
+            args = [a.strip() for a in group.split(',')]
+            if len(args) != 5:
+                raise ValueError("Limit rules must contain the following "
+                                 "arguments: verb, uri, regex, value, unit")
+
+            # Pull out the arguments
+            verb, uri, regex, value, unit = args
+
+            # Upper-case the verb
+            verb = verb.upper()
+
+            # Convert value--raises ValueError if it's not integer
+            value = int(value)
+
+            # Convert unit
+            unit = unit.upper()
+            if unit not in Limit.UNIT_MAP:
+                raise ValueError("Invalid units specified")
+            unit = Limit.UNIT_MAP[unit]
+
+            # Build a limit
+            result.append(Limit(verb, uri, regex, value, unit))
+
+        return result
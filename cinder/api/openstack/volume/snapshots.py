@@ -15,6 +15,8 @@
 
 """The volumes snapshots api."""
 
+import functools
+
 from webob import exc
 import webob
 
@@ -32,6 +34,10 @@ LOG = logging.getLogger(__name__)
 
 FLAGS = flags.FLAGS
 
+# Snapshot columns the list calls can be sorted on
+SNAPSHOT_SORT_KEYS = ('id', 'created_at', 'updated_at', 'status', 'volume_id',
+                      'volume_size', 'display_name', 'display_description')
+
 
 def _translate_snapshot_detail_view(context, snapshot):
     """Maps keys for snapshots details view."""
@@ -80,14 +86,20 @@ class SnapshotsTemplate(xmlutil.TemplateBuilder):
         elem = xmlutil.SubTemplateElement(root, 'snapshot',
                                           selector='snapshots')
         make_snapshot(elem)
+        xmlutil.make_links(root, 'snapshots_links')
         return xmlutil.MasterTemplate(root, 1)
 
 
+class ViewBuilder(common.ViewBuilder):
+    _collection_name = 'snapshots'
+
+
 class SnapshotsController(object):
     """The Volumes API controller for the OpenStack API."""
 
     def __init__(self):
         self.volume_api = volume.API()
+        self._view_builder = ViewBuilder()
         super(SnapshotsController, self).__init__()
 
     @wsgi.serializers(xml=SnapshotTemplate)
@@ -129,10 +141,43 @@ class SnapshotsController(object):
         """Returns a list of snapshots, transformed through entity_maker."""
         context = req.environ['cinder.context']
 
-        snapshots = self.volume_api.get_all_snapshots(context)
+        limit, marker = common.get_limit_and_marker(req)
+        if 'offset' in req.GET:
+            # NOTE: offset predates marker paging and cannot be expressed
+            # against the sorted query, so fall back to slicing here.
+            limit = None
+        sort_key, sort_dir = common.get_sort_params(req, SNAPSHOT_SORT_KEYS)
+        filters = {}
+        for key in ('status', 'display_name', 'volume_id'):
+            if key in req.GET:
+                filters[key] = req.GET[key]
+
+        fetch = functools.partial(self.volume_api.get_all_snapshots, context,
+                                  sort_key=sort_key, sort_dir=sort_dir,
+                                  filters=filters)
+        stream = FLAGS.osapi_stream_lists and 'offset' not in req.GET
+
+        try:
+            if stream:
+                snapshots = common.iter_pages(fetch, marker, limit)
+            else:
+                snapshots = fetch(marker=marker, limit=limit)
+        except exception.MarkerNotFound as e:
+            raise exc.HTTPBadRequest(explanation=unicode(e))
+
+        if stream:
+            res = (entity_maker(context, snapshot) for snapshot in snapshots)
+            return {'snapshots': self._view_builder._get_collection_stream(
+                req, res, id_key='id')}
+
         limited_list = common.limited(snapshots, req)
         res = [entity_maker(context, snapshot) for snapshot in limited_list]
-        return {'snapshots': res}
+        snapshots = {'snapshots': res}
+        links = self._view_builder._get_collection_links(req, limited_list,
+                                                         id_key='id')
+        if links:
+            snapshots['snapshots_links'] = links
+        return snapshots
 
     @wsgi.serializers(xml=SnapshotTemplate)
     def create(self, req, body):
@@ -15,6 +15,8 @@
 
 """The volumes api."""
 
+import functools
+
 from webob import exc
 import webob
 
@@ -24,6 +26,7 @@ from cinder.api.openstack import xmlutil
 from cinder import exception
 from cinder import flags
 from cinder import log as logging
+from cinder import utils
 from cinder import volume
 from cinder.volume import volume_types
 
@@ -33,6 +36,11 @@ LOG = logging.getLogger(__name__)
 
 FLAGS = flags.FLAGS
 
+# Volume columns the list calls can be sorted on
+VOLUME_SORT_KEYS = ('id', 'created_at', 'updated_at', 'size', 'status',
+                    'availability_zone', 'display_name',
+                    'display_description', 'snapshot_id')
+
 
 def _translate_attachment_detail_view(_context, vol):
     """Maps keys for attachment details view."""
@@ -152,14 +160,41 @@ class VolumesTemplate(xmlutil.TemplateBuilder):
         root = xmlutil.TemplateElement('volumes')
         elem = xmlutil.SubTemplateElement(root, 'volume', selector='volumes')
         make_volume(elem)
+        xmlutil.make_links(root, 'volumes_links')
         return xmlutil.MasterTemplate(root, 1, nsmap=volume_nsmap)
 
 
+class ViewBuilder(common.ViewBuilder):
+    _collection_name = 'volumes'
+
+
+def _get_volume_filters(req, context):
+    """Pull the exact-match volume filters out of the query string."""
+    filters = {}
+    for key in ('status', 'display_name'):
+        if key in req.GET:
+            filters[key] = req.GET[key]
+    # NOTE: only admins see which host backs a volume
+    if context.is_admin and 'host' in req.GET:
+        filters['host'] = req.GET['host']
+    if 'metadata' in req.GET:
+        try:
+            metadata = utils.loads(req.GET['metadata'])
+        except ValueError:
+            metadata = None
+        if not isinstance(metadata, dict):
+            msg = _('metadata param must be a JSON object')
+            raise exc.HTTPBadRequest(explanation=msg)
+        filters['metadata'] = metadata
+    return filters
+
+
 class VolumeController(object):
     """The Volumes API controller for the OpenStack API."""
 
     def __init__(self):
         self.volume_api = volume.API()
+        self._view_builder = ViewBuilder()
         super(VolumeController, self).__init__()
 
     @wsgi.serializers(xml=VolumeTemplate)
@@ -201,10 +236,40 @@ class VolumeController(object):
         """Returns a list of volumes, transformed through entity_maker."""
         context = req.environ['cinder.context']
 
-        volumes = self.volume_api.get_all(context)
+        limit, marker = common.get_limit_and_marker(req)
+        if 'offset' in req.GET:
+            # NOTE: offset predates marker paging and cannot be expressed
+            # against the sorted query, so fall back to slicing here.
+            limit = None
+        sort_key, sort_dir = common.get_sort_params(req, VOLUME_SORT_KEYS)
+        filters = _get_volume_filters(req, context)
+
+        fetch = functools.partial(self.volume_api.get_all, context,
+                                  sort_key=sort_key, sort_dir=sort_dir,
+                                  filters=filters)
+        stream = FLAGS.osapi_stream_lists and 'offset' not in req.GET
+
+        try:
+            if stream:
+                volumes = common.iter_pages(fetch, marker, limit)
+            else:
+                volumes = fetch(marker=marker, limit=limit)
+        except exception.MarkerNotFound as e:
+            raise exc.HTTPBadRequest(explanation=unicode(e))
+
+        if stream:
+            res = (entity_maker(context, vol) for vol in volumes)
+            return {'volumes': self._view_builder._get_collection_stream(
+                req, res, id_key='id')}
+
         limited_list = common.limited(volumes, req)
         res = [entity_maker(context, vol) for vol in limited_list]
-        return {'volumes': res}
+        volumes = {'volumes': res}
+        links = self._view_builder._get_collection_links(req, limited_list,
+                                                         id_key='id')
+        if links:
+            volumes['volumes_links'] = links
+        return volumes
 
     @wsgi.serializers(xml=VolumeTemplate)
     def create(self, req, body):
@@ -239,6 +304,9 @@ class VolumeController(object):
 
         kwargs['availability_zone'] = volume.get('availability_zone', None)
 
+        if 'count' in volume:
+            return self._create_batch(context, volume, size, **kwargs)
+
         new_volume = self.volume_api.create(context,
                                             size,
                                             volume.get('display_name'),
@@ -252,6 +320,28 @@ class VolumeController(object):
 
         return {'volume': retval}
 
+    def _create_batch(self, context, volume, size, **kwargs):
+        """Creates 'count' volumes (at least 'min_count') in one request."""
+        try:
+            count = int(volume['count'])
+            min_count = int(volume.get('min_count', count))
+        except (TypeError, ValueError):
+            msg = _("count and min_count must be integers")
+            raise exc.HTTPBadRequest(explanation=msg)
+
+        new_volumes = self.volume_api.create_batch(context,
+                                            count,
+                                            size,
+                                            volume.get('display_name'),
+                                            volume.get('display_description'),
+                                            min_count=min_count,
+                                            **kwargs)
+
+        retval = [_translate_volume_detail_view(context, dict(new_volume))
+                  for new_volume in new_volumes]
+
+        return wsgi.ResponseObject({'volumes': retval}, xml=VolumesTemplate)
+
 
 def create_resource():
     return wsgi.Resource(VolumeController())
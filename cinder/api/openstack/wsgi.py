@@ -240,9 +240,49 @@ class DictSerializer(ActionDispatcher):
 class JSONDictSerializer(DictSerializer):
     """Default JSON request body serialization"""
 
+    # Number of StreamingList items written per chunk
+    chunk_items = 100
+
     def default(self, data):
         return utils.dumps(data)
 
+    def serialize_iter(self, data):
+        """Serialize a dict, yielding the JSON text in chunks.
+
+        StreamingList values are written first, a chunk of items at a
+        time, followed by the remaining keys and any keys the lists
+        add once they have been consumed.
+        """
+
+        rest = {}
+        streams = []
+        for key, value in data.items():
+            if isinstance(value, StreamingList):
+                streams.append((key, value))
+            else:
+                rest[key] = value
+
+        sep = '{'
+        for key, stream in streams:
+            chunk = ['%s%s: [' % (sep, utils.dumps(key))]
+            item_sep = ''
+            for item in stream:
+                chunk.append(item_sep + utils.dumps(item))
+                item_sep = ', '
+                if len(chunk) >= self.chunk_items:
+                    yield ''.join(chunk)
+                    chunk = []
+            chunk.append(']')
+            yield ''.join(chunk)
+            rest.update(stream.get_extra())
+            sep = ', '
+
+        for key, value in rest.items():
+            yield '%s%s: %s' % (sep, utils.dumps(key), utils.dumps(value))
+            sep = ', '
+
+        yield '{}' if sep == '{' else '}'
+
 
 class XMLDictSerializer(DictSerializer):
 
@@ -394,6 +434,45 @@ def response(code):
     return decorator
 
 
+class StreamingList(object):
+    """A list of response items generated while it is serialized.
+
+    Controllers may return a StreamingList in place of a list so that
+    serializers supporting it can write the items as they are
+    produced, rather than holding the whole response in memory.
+    ResponseObject.materialize() turns it back into a list for the
+    serializers and extensions that need one.
+    """
+
+    def __init__(self, items, extra=None):
+        """Wrap an iterable of items.
+
+        :param items: An iterable of the items of the list.
+        :param extra: An optional callable taking the number of items
+                      and the last item, and returning a dict of keys
+                      to add to the response once the items have been
+                      consumed, e.g. collection links.
+        """
+
+        self.items = items
+        self.extra = extra
+        self.count = 0
+        self.last = None
+
+    def __iter__(self):
+        for item in self.items:
+            self.count += 1
+            self.last = item
+            yield item
+
+    def get_extra(self):
+        """Return the keys to add to the response after the items."""
+
+        if self.extra is None:
+            return {}
+        return self.extra(self.count, self.last)
+
+
 class ResponseObject(object):
     """Bundles a response object with appropriate serializers.
 
@@ -485,6 +564,24 @@ class ResponseObject(object):
         self.media_type = mtype
         self.serializer = serializer()
 
+    def materialize(self):
+        """Replace StreamingList values of the object with lists."""
+
+        if not isinstance(self.obj, dict):
+            return
+
+        for key, value in self.obj.items():
+            if isinstance(value, StreamingList):
+                self.obj[key] = list(value)
+                self.obj.update(value.get_extra())
+
+    def is_streaming(self):
+        """Return True if the object contains a StreamingList."""
+
+        return (isinstance(self.obj, dict) and
+                any(isinstance(value, StreamingList)
+                    for value in self.obj.values()))
+
     def attach(self, **kwargs):
         """Attach slave templates to serializers."""
 
@@ -511,7 +608,12 @@ class ResponseObject(object):
             response.headers[hdr] = value
         response.headers['Content-Type'] = content_type
         if self.obj is not None:
-            response.body = serializer.serialize(self.obj)
+            if self.is_streaming() and hasattr(serializer, 'serialize_iter'):
+                response.app_iter = serializer.serialize_iter(self.obj)
+                response.content_length = None
+            else:
+                self.materialize()
+                response.body = serializer.serialize(self.obj)
 
         return response
 
@@ -872,6 +974,11 @@ class Resource(wsgi.Application):
                     resp_obj._default_code = meth.wsgi_code
                 resp_obj.preserialize(accept, self.default_serializers)
 
+                # Extensions may modify the items of a list, so they
+                # cannot be streamed past them
+                if extensions:
+                    resp_obj.materialize()
+
                 # Process post-processing extensions
                 response = self.post_process_extensions(post, resp_obj,
                                                         request, action_args)
@@ -28,6 +28,15 @@ XMLNS_COMMON_V10 = 'http://docs.openstack.org/common/api/v1.0'
 XMLNS_ATOM = 'http://www.w3.org/2005/Atom'
 XMLNS_VOLUME_V1 = 'http://docs.openstack.org/volume/api/v1'
 
+# Bumped whenever a template element is modified, so that compiled
+# templates know to recompile themselves.
+_generation = 0
+
+
+def _template_changed():
+    global _generation
+    _generation += 1
+
 
 def validate_schema(xml, schema_name):
     if isinstance(xml, str):
@@ -220,6 +229,7 @@ class TemplateElement(object):
 
         self._children.append(elem)
         self._childmap[elem.tag] = elem
+        _template_changed()
 
     def extend(self, elems):
         """Append children to the element."""
@@ -241,6 +251,7 @@ class TemplateElement(object):
         # Update the children
         self._children.extend(elemlist)
         self._childmap.update(elemmap)
+        _template_changed()
 
     def insert(self, idx, elem):
         """Insert a child element at the given index."""
@@ -254,6 +265,7 @@ class TemplateElement(object):
 
         self._children.insert(idx, elem)
         self._childmap[elem.tag] = elem
+        _template_changed()
 
     def remove(self, elem):
         """Remove a child element."""
@@ -267,6 +279,7 @@ class TemplateElement(object):
 
         self._children.remove(elem)
         del self._childmap[elem.tag]
+        _template_changed()
 
     def get(self, key):
         """Get an attribute.
@@ -297,6 +310,7 @@ class TemplateElement(object):
             value = Selector(value)
 
         self.attrib[key] = value
+        _template_changed()
 
     def keys(self):
         """Return the attribute names."""
@@ -454,9 +468,11 @@ class TemplateElement(object):
             value = Selector(value)
 
         self._text = value
+        _template_changed()
 
     def _text_del(self):
         self._text = None
+        _template_changed()
 
     text = property(_text_get, _text_set, _text_del)
 
@@ -513,6 +529,131 @@ def SubTemplateElement(parent, tag, attrib=None, selector=None,
     return elem
 
 
+class CompiledElement(object):
+    """Represent a template element merged with its slave elements.
+
+    Serializing a template walks the master and slave trees in step,
+    merging the children of each level by tag and applying every
+    slave element as a patch to the master element.  A compiled
+    element does that merge once, so that rendering is a walk over a
+    single tree with the tag names, attribute selectors and text
+    selector already resolved.
+    """
+
+    def __init__(self, siblings):
+        """Compile a list of sibling template elements.
+
+        :param siblings: The TemplateElement instances to merge.  The
+                         first one is the element being rendered; the
+                         others are applied to it as patches.
+        """
+
+        master = siblings[0]
+        self.tag = master.tag
+        self.dyntag = callable(master.tag)
+        self.selector = master.selector
+        self.subselector = master.subselector
+        self.will_render = master.will_render
+
+        # Each patch overwrites the text, so only the last one counts
+        self.text = None
+        for sibling in siblings:
+            if sibling.text is not None:
+                self.text = sibling.text
+
+        # Later patches take precedence over earlier ones, but fall
+        # back to them if they have no value for the attribute
+        attrib = {}
+        keys = []
+        for sibling in siblings:
+            for key, value in sibling.attrib.items():
+                if key not in attrib:
+                    attrib[key] = []
+                    keys.append(key)
+                attrib[key].insert(0, value)
+        self.attrib = [(key, attrib[key]) for key in keys]
+
+        # Merge the children by tag, as Template._serialize() does
+        self.children = []
+        seen = set()
+        for idx, sibling in enumerate(siblings):
+            for child in sibling:
+                if child.tag in seen:
+                    continue
+                seen.add(child.tag)
+
+                nieces = [child]
+                for sib in siblings[idx + 1:]:
+                    if child.tag in sib:
+                        nieces.append(sib[child.tag])
+                self.children.append(CompiledElement(nieces))
+
+        self.generation = _generation
+
+    def _render(self, parent, datum, nsmap):
+        """Render one etree.Element instance and its children."""
+
+        tagname = self.tag(datum) if self.dyntag else self.tag
+        if parent is None:
+            elem = etree.Element(tagname, nsmap=nsmap)
+        else:
+            elem = etree.SubElement(parent, tagname, nsmap=nsmap)
+
+        if datum is not None:
+            if self.text is not None:
+                elem.text = unicode(self.text(datum))
+
+            for key, selectors in self.attrib:
+                for selector in selectors:
+                    try:
+                        value = selector(datum, True)
+                    except KeyError:
+                        continue
+                    elem.set(key, unicode(value))
+                    break
+
+        for child in self.children:
+            child.render(elem, datum)
+
+        return elem
+
+    def render(self, parent, obj, nsmap=None):
+        """Render an object.
+
+        Renders an object against the compiled element, appending the
+        rendered etree.Element instances to the parent.  Returns the
+        first etree.Element instance rendered, or None.
+
+        :param parent: The parent etree.Element instance.  Can be
+                       None.
+        :param obj: The object to render.
+        :param nsmap: An optional namespace dictionary to be
+                      associated with the etree.Element instances.
+        """
+
+        data = None if obj is None else self.selector(obj)
+
+        if not self.will_render(data):
+            return None
+        elif data is None:
+            return self._render(parent, None, nsmap)
+
+        if not isinstance(data, list):
+            data = [data]
+        elif parent is None:
+            raise ValueError(_('root element selecting a list'))
+
+        first = None
+        for datum in data:
+            if self.subselector is not None:
+                datum = self.subselector(datum)
+            elem = self._render(parent, datum, nsmap)
+            if first is None:
+                first = elem
+
+        return first
+
+
 class Template(object):
     """Represent a template."""
 
@@ -529,6 +670,9 @@ class Template(object):
         self.nsmap = nsmap or {}
         self.serialize_options = dict(encoding='UTF-8', xml_declaration=True)
 
+        # Compiled elements, keyed by the tuple of root siblings
+        self._compiled = {}
+
     def _serialize(self, parent, obj, siblings, nsmap=None):
         """Internal serialization.
 
@@ -536,6 +680,10 @@ class Template(object):
         from an object based on the template.  Returns the first
         etree.Element instance rendered, or None.
 
+        Serialization now goes through the compiled tree; this is kept
+        only for compatibility with code that calls it directly, and as
+        the reference the compiled output is tested against.
+
         :param parent: The parent etree.Element instance.  Can be
                        None.
         :param obj: The object to render.
@@ -611,7 +759,27 @@ class Template(object):
         nsmap = self._nsmap()
 
         # Form the element tree
-        return self._serialize(None, obj, siblings, nsmap)
+        return self.compile(siblings).render(None, obj, nsmap)
+
+    def compile(self, siblings=None):
+        """Compile the template.
+
+        Returns a CompiledElement merging the given root siblings
+        (by default, those returned by _siblings()).  The result is
+        cached until a template element is modified.
+
+        :param siblings: An optional list of root siblings.
+        """
+
+        if siblings is None:
+            siblings = self._siblings()
+
+        key = tuple(siblings)
+        compiled = self._compiled.get(key)
+        if compiled is None or compiled.generation != _generation:
+            compiled = CompiledElement(siblings)
+            self._compiled[key] = compiled
+        return compiled
 
     def _siblings(self):
         """Hook method for computing root siblings.
@@ -756,6 +924,10 @@ class MasterTemplate(Template):
         # Return a copy of the MasterTemplate
         tmp = self.__class__(self.root, self.version, self.nsmap)
         tmp.slaves = self.slaves[:]
+
+        # Share compiled elements, so that each set of slaves is only
+        # compiled once however many copies are made
+        tmp._compiled = self._compiled
         return tmp
 
 
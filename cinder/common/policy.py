@@ -18,6 +18,7 @@
 """Common Policy Engine Implementation"""
 
 import json
+import re
 import urllib
 import urllib2
 
@@ -116,8 +117,134 @@ def enforce(match_list, target_dict, credentials_dict):
         raise NotAuthorized()
 
 
+_GENERIC_KEY_RE = re.compile(r'%\((\w+)\)')
+
+# Upper bound on memoized decisions per brain; the memo is simply dropped
+# when it fills up.
+_MEMO_SIZE = 1024
+
+_MISSING = object()
+
+
+class BaseCheck(object):
+    """A node of a compiled match list.
+
+    target_keys and cred_keys name the attributes the node reads, so a
+    decision can be memoized on just those.  cacheable is False for nodes
+    whose outcome depends on anything else.
+    """
+
+    target_keys = ()
+    cred_keys = ()
+    cacheable = True
+
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        raise NotImplementedError()
+
+    def children(self, brain):
+        return ()
+
+
+class TrueCheck(BaseCheck):
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        return True
+
+
+class FalseCheck(BaseCheck):
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        return False
+
+
+class OrCheck(BaseCheck):
+    def __init__(self, checks):
+        self.checks = checks
+
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        for check in self.checks:
+            if check(brain, target_dict, cred_dict, roles):
+                return True
+        return False
+
+    def children(self, brain):
+        return self.checks
+
+
+class AndCheck(BaseCheck):
+    def __init__(self, checks):
+        self.checks = checks
+
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        for check in self.checks:
+            if not check(brain, target_dict, cred_dict, roles):
+                return False
+        return True
+
+    def children(self, brain):
+        return self.checks
+
+
+class RuleCheck(BaseCheck):
+    """Defers to a named rule of the brain."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        return brain._get_rule(self.name)(brain, target_dict, cred_dict,
+                                          roles)
+
+    def children(self, brain):
+        return (brain._get_rule(self.name),)
+
+
+class RoleCheck(BaseCheck):
+    """Matches if the (lowercased) role is one of the credential roles."""
+
+    def __init__(self, role):
+        self.role = role.lower()
+
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        return self.role in roles
+
+
+class GenericCheck(BaseCheck):
+    """Matches a credential against a value templated from the target."""
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.cred_keys = (key,)
+        self.target_keys = tuple(set(_GENERIC_KEY_RE.findall(value)))
+
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        # TODO(termie): do dict inspection via dot syntax
+        value = self.value % target_dict
+        if self.key in cred_dict:
+            return value == cred_dict[self.key]
+        return False
+
+
+class BrainCheck(BaseCheck):
+    """Calls a ``_check_<kind>`` method of the brain, e.g. ``http:``."""
+
+    cacheable = False
+
+    def __init__(self, kind, match):
+        self.kind = kind
+        self.match = match
+
+    def __call__(self, brain, target_dict, cred_dict, roles):
+        f = getattr(brain, '_check_%s' % self.kind)
+        return f(self.match, target_dict, cred_dict)
+
+
 class Brain(object):
-    """Implements policy checking."""
+    """Implements policy checking.
+
+    Rules are compiled into trees of checks when they are added, and
+    decisions are memoized on the role set plus whichever target and
+    credential attributes the rule actually reads.
+    """
     @classmethod
     def load_json(cls, data, default_rule=None):
         """Init a brain using json instead of a rules dictionary."""
@@ -127,21 +254,84 @@ class Brain(object):
     def __init__(self, rules=None, default_rule=None):
         self.rules = rules or {}
         self.default_rule = default_rule
+        self._compiled_rules = {}
+        for key, match in self.rules.iteritems():
+            self._compiled_rules[key] = self._compile(match)
+        self._plans = {}
+        self._memo = {}
 
     def add_rule(self, key, match):
         self.rules[key] = match
+        self._compiled_rules[key] = self._compile(match)
+        self._plans = {}
+        self._memo = {}
 
-    def _check(self, match, target_dict, cred_dict):
+    def _compile_item(self, match):
         match_kind, match_value = match.split(':', 1)
+        if match_kind == 'rule':
+            return RuleCheck(match_value)
+        if match_kind == 'role':
+            return RoleCheck(match_value)
+        if hasattr(self, '_check_%s' % match_kind):
+            return BrainCheck(match_kind, match_value)
+        return GenericCheck(match_kind, match_value)
+
+    def _compile(self, match_list):
+        """Compile nested match tuples into a tree of checks."""
+        if not match_list:
+            return TrueCheck()
+        or_checks = []
+        for and_list in match_list:
+            if isinstance(and_list, basestring):
+                and_list = (and_list,)
+            and_checks = [self._compile_item(item) for item in and_list]
+            if len(and_checks) == 1:
+                or_checks.append(and_checks[0])
+            else:
+                or_checks.append(AndCheck(and_checks))
+        if len(or_checks) == 1:
+            return or_checks[0]
+        return OrCheck(or_checks)
+
+    def _get_rule(self, name):
         try:
-            f = getattr(self, '_check_%s' % match_kind)
-        except AttributeError:
-            if not self._check_generic(match, target_dict, cred_dict):
-                return False
-        else:
-            if not f(match_value, target_dict, cred_dict):
-                return False
-        return True
+            return self._compiled_rules[name]
+        except KeyError:
+            if self.default_rule and name != self.default_rule:
+                return RuleCheck(self.default_rule)
+            return FalseCheck()
+
+    def _plan(self, match_list):
+        """Compile match_list and work out what its decision depends on."""
+        check = self._compile(match_list)
+        target_keys = set()
+        cred_keys = set()
+        cacheable = True
+        seen_rules = set()
+        pending = [check]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, RuleCheck):
+                if node.name in seen_rules:
+                    continue
+                seen_rules.add(node.name)
+            target_keys.update(node.target_keys)
+            cred_keys.update(node.cred_keys)
+            cacheable = cacheable and node.cacheable
+            pending.extend(node.children(self))
+        return (check, tuple(target_keys), tuple(cred_keys), cacheable)
+
+    def _get_plan(self, match_list):
+        try:
+            return self._plans[match_list]
+        except KeyError:
+            plan = self._plans[match_list] = self._plan(match_list)
+            return plan
+        except TypeError:
+            # NOTE: unhashable (list) match lists are compiled every time
+            # and never memoized.
+            check = self._compile(match_list)
+            return (check, (), (), False)
 
     def check(self, match_list, target_dict, cred_dict):
         """Checks authorization of some rules against credentials.
@@ -155,48 +345,28 @@ class Brain(object):
         :returns: True if the check passes
 
         """
-        if not match_list:
-            return True
-        for and_list in match_list:
-            if isinstance(and_list, basestring):
-                and_list = (and_list,)
-            if all([self._check(item, target_dict, cred_dict)
-                    for item in and_list]):
-                return True
-        return False
-
-    def _check_rule(self, match, target_dict, cred_dict):
-        """Recursively checks credentials based on the brains rules."""
+        check, target_keys, cred_keys, cacheable = self._get_plan(match_list)
+        roles = frozenset(role.lower()
+                          for role in cred_dict.get('roles') or ())
+        if not cacheable:
+            return check(self, target_dict, cred_dict, roles)
+
+        memo_key = (match_list, roles,
+                    tuple(target_dict.get(k, _MISSING) for k in target_keys),
+                    tuple(cred_dict.get(k, _MISSING) for k in cred_keys))
         try:
-            new_match_list = self.rules[match]
+            return self._memo[memo_key]
         except KeyError:
-            if self.default_rule and match != self.default_rule:
-                new_match_list = ('rule:%s' % self.default_rule,)
-            else:
-                return False
-
-        return self.check(new_match_list, target_dict, cred_dict)
-
-    def _check_role(self, match, target_dict, cred_dict):
-        """Check that there is a matching role in the cred dict."""
-        return match.lower() in [x.lower() for x in cred_dict['roles']]
-
-    def _check_generic(self, match, target_dict, cred_dict):
-        """Check an individual match.
-
-        Matches look like:
-
-            tenant:%(tenant_id)s
-            role:compute:admin
-
-        """
-
-        # TODO(termie): do dict inspection via dot syntax
-        match = match % target_dict
-        key, value = match.split(':', 1)
-        if key in cred_dict:
-            return value == cred_dict[key]
-        return False
+            pass
+        except TypeError:
+            # NOTE: an unhashable attribute value; just evaluate.
+            return check(self, target_dict, cred_dict, roles)
+
+        result = check(self, target_dict, cred_dict, roles)
+        if len(self._memo) >= _MEMO_SIZE:
+            self._memo = {}
+        self._memo[memo_key] = result
+        return result
 
 
 class HttpBrain(Brain):
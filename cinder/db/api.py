@@ -464,6 +464,36 @@ def quota_destroy_all_by_project(context, project_id):
 ###################
 
 
+def quota_usage_get_all_by_project(context, project_id):
+    """Retrieve all usage associated with a given resource."""
+    return IMPL.quota_usage_get_all_by_project(context, project_id)
+
+
+def quota_reserve(context, quotas, deltas, expire, until_refresh, max_age,
+                  project_id=None):
+    """Check quotas and create appropriate reservations."""
+    return IMPL.quota_reserve(context, quotas, deltas, expire,
+                              until_refresh, max_age, project_id=project_id)
+
+
+def reservation_commit(context, reservations):
+    """Commit quota reservations."""
+    return IMPL.reservation_commit(context, reservations)
+
+
+def reservation_rollback(context, reservations):
+    """Roll back quota reservations."""
+    return IMPL.reservation_rollback(context, reservations)
+
+
+def reservation_expire(context):
+    """Roll back any expired reservations."""
+    return IMPL.reservation_expire(context)
+
+
+###################
+
+
 def quota_class_create(context, class_name, resource, limit):
     """Create a quota class for the given name and resource."""
     return IMPL.quota_class_create(context, class_name, resource, limit)
@@ -512,11 +542,21 @@ def volume_create(context, values):
     return IMPL.volume_create(context, values)
 
 
+def volume_create_many(context, values_list):
+    """Create a volume from each values dictionary in one transaction."""
+    return IMPL.volume_create_many(context, values_list)
+
+
 def volume_data_get_for_project(context, project_id):
     """Get (volume_count, gigabytes) for project."""
     return IMPL.volume_data_get_for_project(context, project_id)
 
 
+def volume_data_get_for_hosts(context):
+    """Get {host: (volume_count, gigabytes)} for all volume hosts."""
+    return IMPL.volume_data_get_for_hosts(context)
+
+
 def volume_destroy(context, volume_id):
     """Destroy the volume or raise if it does not exist."""
     return IMPL.volume_destroy(context, volume_id)
@@ -532,9 +572,17 @@ def volume_get(context, volume_id):
     return IMPL.volume_get(context, volume_id)
 
 
-def volume_get_all(context):
-    """Get all volumes."""
-    return IMPL.volume_get_all(context)
+def volume_get_all(context, marker=None, limit=None, sort_key='created_at',
+                   sort_dir='desc', filters=None):
+    """Get a page of volumes, optionally filtered.
+
+    Volumes are sorted by sort_key (ties broken by id) and the page starts
+    after the volume whose id is marker.  filters holds exact matches on
+    status, display_name and host, plus a 'metadata' dict of key/value
+    pairs the volume must carry.
+    """
+    return IMPL.volume_get_all(context, marker, limit, sort_key, sort_dir,
+                               filters)
 
 
 def volume_get_all_by_host(context, host):
@@ -547,9 +595,15 @@ def volume_get_all_by_instance_uuid(context, instance_uuid):
     return IMPL.volume_get_all_by_instance_uuid(context, instance_uuid)
 
 
-def volume_get_all_by_project(context, project_id):
-    """Get all volumes belonging to a project."""
-    return IMPL.volume_get_all_by_project(context, project_id)
+def volume_get_all_by_project(context, project_id, marker=None, limit=None,
+                              sort_key='created_at', sort_dir='desc',
+                              filters=None):
+    """Get a page of volumes belonging to a project.
+
+    See volume_get_all for the meaning of the paging and filter arguments.
+    """
+    return IMPL.volume_get_all_by_project(context, project_id, marker, limit,
+                                          sort_key, sort_dir, filters)
 
 
 def volume_get_iscsi_target_num(context, volume_id):
@@ -584,14 +638,24 @@ def snapshot_get(context, snapshot_id):
     return IMPL.snapshot_get(context, snapshot_id)
 
 
-def snapshot_get_all(context):
-    """Get all snapshots."""
-    return IMPL.snapshot_get_all(context)
+def snapshot_get_all(context, marker=None, limit=None, sort_key='created_at',
+                     sort_dir='desc', filters=None):
+    """Get a page of snapshots, optionally filtered.
+
+    Paging works as for volume_get_all; filters holds exact matches on
+    id, status, display_name and volume_id.
+    """
+    return IMPL.snapshot_get_all(context, marker, limit, sort_key, sort_dir,
+                                 filters)
 
 
-def snapshot_get_all_by_project(context, project_id):
-    """Get all snapshots belonging to a project."""
-    return IMPL.snapshot_get_all_by_project(context, project_id)
+def snapshot_get_all_by_project(context, project_id, marker=None, limit=None,
+                                sort_key='created_at', sort_dir='desc',
+                                filters=None):
+    """Get a page of snapshots belonging to a project."""
+    return IMPL.snapshot_get_all_by_project(context, project_id, marker,
+                                            limit, sort_key, sort_dir,
+                                            filters)
 
 
 def snapshot_get_all_for_volume(context, volume_id):
@@ -23,6 +23,7 @@ import datetime
 import functools
 import warnings
 
+from cinder.common import sqlalchemyutils
 from cinder import db
 from cinder import exception
 from cinder import flags
@@ -224,6 +225,41 @@ def exact_filter(query, model, filters, legal_keys):
     return query
 
 
+def paginate(query, model, marker_query, marker, limit, sort_key, sort_dir):
+    """Sorts a query and restricts it to the page following a marker.
+
+    Returns the updated query.
+
+    :param query: query to sort and page
+    :param model: model object the query applies to
+    :param marker_query: query used to look the marker row up, so the
+                         caller decides how the lookup is scoped; it
+                         should include deleted rows
+    :param marker: id of the last row of the previous page, or None
+    :param limit: maximum number of rows to return, or None for all
+    :param sort_key: column to sort by; 'id' breaks ties
+    :param sort_dir: 'asc' or 'desc'
+    """
+    if sort_dir not in ('asc', 'desc'):
+        msg = _("Unknown sort direction, must be 'desc' or 'asc'")
+        raise exception.InvalidInput(reason=msg)
+
+    marker_ref = None
+    if marker is not None:
+        # NOTE: the marker is usually the last row of the previous page,
+        # which may have been deleted since; paging goes on from it.
+        marker_ref = marker_query.filter_by(id=marker).first()
+        if not marker_ref:
+            raise exception.MarkerNotFound(marker=marker)
+
+    sort_keys = [sort_key]
+    if sort_key != 'id':
+        sort_keys.append('id')
+    return sqlalchemyutils.paginate_query(query, model, limit, sort_keys,
+                                          marker=marker_ref,
+                                          sort_dir=sort_dir)
+
+
 ###################
 
 
@@ -482,6 +518,279 @@ def quota_destroy_all_by_project(context, project_id):
 ###################
 
 
+def _sync_volumes(context, project_id, session):
+    (volumes, gigabytes) = volume_data_get_for_project(context, project_id,
+                                                       session=session)
+    return {'volumes': volumes, 'gigabytes': gigabytes}
+
+
+# NOTE: maps each reservable resource to the function that recounts
+#       its real usage when the cached counter needs a refresh.
+QUOTA_SYNC_FUNCTIONS = {
+    'volumes': _sync_volumes,
+    'gigabytes': _sync_volumes,
+}
+
+
+@require_context
+def quota_usage_get_all_by_project(context, project_id):
+    authorize_project_context(context, project_id)
+
+    rows = model_query(context, models.QuotaUsage, read_deleted="no").\
+                   filter_by(project_id=project_id).\
+                   all()
+
+    result = {'project_id': project_id}
+    for row in rows:
+        result[row.resource] = dict(in_use=row.in_use, reserved=row.reserved)
+
+    return result
+
+
+def _quota_usage_create(context, project_id, resource, in_use, reserved,
+                        until_refresh, session=None):
+    quota_usage_ref = models.QuotaUsage()
+    quota_usage_ref.project_id = project_id
+    quota_usage_ref.resource = resource
+    quota_usage_ref.in_use = in_use
+    quota_usage_ref.reserved = reserved
+    quota_usage_ref.until_refresh = until_refresh
+    quota_usage_ref.save(session=session)
+
+    return quota_usage_ref
+
+
+def _reservation_create(context, uuid, usage, project_id, resource, delta,
+                        expire, session=None):
+    reservation_ref = models.Reservation()
+    reservation_ref.uuid = uuid
+    reservation_ref.usage_id = usage['id']
+    reservation_ref.project_id = project_id
+    reservation_ref.resource = resource
+    reservation_ref.delta = delta
+    reservation_ref.expire = expire
+    reservation_ref.save(session=session)
+    return reservation_ref
+
+
+def _get_quota_usages(context, session, project_id):
+    # Broken out for testability
+    rows = model_query(context, models.QuotaUsage,
+                       read_deleted="no",
+                       session=session).\
+                   filter_by(project_id=project_id).\
+                   with_lockmode('update').\
+                   all()
+    return dict((row.resource, row) for row in rows)
+
+
+@require_context
+def quota_reserve(context, quotas, deltas, expire, until_refresh, max_age,
+                  project_id=None):
+    """Reserve the deltas against the project's cached usage counters.
+
+    Only the project's quota_usages rows are locked; the usage is only
+    recounted from the resource tables when a counter is first created,
+    is negative, or is due a refresh by until_refresh or max_age.
+    """
+    elevated = context.elevated()
+    if project_id is None:
+        project_id = context.project_id
+
+    session = get_session()
+    with session.begin():
+        # Get the current usages
+        usages = _get_quota_usages(context, session, project_id)
+
+        # Handle usage refresh
+        work = set(deltas.keys())
+        while work:
+            resource = work.pop()
+
+            # Do we need to refresh the usage?
+            refresh = False
+            if resource not in usages:
+                usages[resource] = _quota_usage_create(elevated,
+                                                       project_id,
+                                                       resource,
+                                                       0, 0,
+                                                       until_refresh or None,
+                                                       session=session)
+                refresh = True
+            elif usages[resource].in_use < 0:
+                # Negative in_use count indicates a desync, so try to
+                # heal from that...
+                refresh = True
+            elif usages[resource].until_refresh is not None:
+                usages[resource].until_refresh -= 1
+                if usages[resource].until_refresh <= 0:
+                    refresh = True
+            elif max_age:
+                last_update = (usages[resource].updated_at or
+                               usages[resource].created_at)
+                age = utils.utcnow() - last_update
+                if age.days * 86400 + age.seconds >= max_age:
+                    refresh = True
+
+            # OK, refresh the usage
+            if refresh:
+                # Grab the sync routine
+                sync = QUOTA_SYNC_FUNCTIONS[resource]
+
+                updates = sync(elevated, project_id, session)
+                for res, in_use in updates.items():
+                    # Make sure we have a destination for the usage!
+                    if res not in usages:
+                        usages[res] = _quota_usage_create(
+                                elevated, project_id, res, 0, 0,
+                                until_refresh or None, session=session)
+
+                    # Update the usage
+                    usages[res].in_use = in_use
+                    usages[res].until_refresh = until_refresh or None
+
+                    # Because more than one resource may be refreshed
+                    # by the call to the sync routine, and we don't
+                    # want to double-sync, we make sure all refreshed
+                    # resources are dropped from the work set.
+                    work.discard(res)
+
+        # Check for deltas that would go negative
+        unders = [resource for resource, delta in deltas.items()
+                  if delta < 0 and
+                  delta + usages[resource].in_use < 0]
+
+        # Now, let's check the quotas
+        # NOTE: We're only concerned about positive increments.
+        #       If a project has gone over quota, we want them to
+        #       be able to reduce their usage without any
+        #       problems.
+        overs = [resource for resource, delta in deltas.items()
+                 if quotas.get(resource, -1) >= 0 and delta >= 0 and
+                 quotas[resource] < delta + usages[resource].total]
+
+        # Create the reservations
+        if not overs:
+            reservations = []
+            for resource, delta in deltas.items():
+                reservation = _reservation_create(elevated,
+                                                  str(utils.gen_uuid()),
+                                                  usages[resource],
+                                                  project_id,
+                                                  resource, delta, expire,
+                                                  session=session)
+                reservations.append(reservation.uuid)
+
+                # Also update the reserved quantity
+                # NOTE: Negative deltas only reduce in_use on commit, so
+                #       capacity that is still being freed can't be
+                #       claimed by a concurrent create.
+                if delta > 0:
+                    usages[resource].reserved += delta
+
+        # Apply updates to the usages table
+        for usage_ref in usages.values():
+            usage_ref.save(session=session)
+
+    if unders:
+        LOG.warning(_("Change will make usage less than 0 for the following "
+                      "resources: %(unders)s") % locals())
+    if overs:
+        usages = dict((k, dict(in_use=v['in_use'], reserved=v['reserved']))
+                      for k, v in usages.items())
+        raise exception.OverQuota(overs=sorted(overs), quotas=quotas,
+                                  usages=usages)
+
+    return reservations
+
+
+def _quota_reservations(session, context, reservations):
+    """Return the relevant reservations."""
+
+    # Get the listed reservations
+    return model_query(context, models.Reservation,
+                       read_deleted="no",
+                       session=session).\
+                   filter(models.Reservation.uuid.in_(reservations)).\
+                   with_lockmode('update').\
+                   all()
+
+
+def _quota_usages_by_id(session, context, reservation_refs):
+    usage_ids = set(reservation_ref.usage_id
+                    for reservation_ref in reservation_refs)
+    if not usage_ids:
+        return {}
+    rows = model_query(context, models.QuotaUsage,
+                       read_deleted="no",
+                       session=session).\
+                   filter(models.QuotaUsage.id.in_(usage_ids)).\
+                   with_lockmode('update').\
+                   all()
+    return dict((row.id, row) for row in rows)
+
+
+@require_context
+def reservation_commit(context, reservations):
+    session = get_session()
+    with session.begin():
+        reservation_refs = _quota_reservations(session, context, reservations)
+        usages = _quota_usages_by_id(session, context, reservation_refs)
+
+        for reservation in reservation_refs:
+            usage = usages[reservation.usage_id]
+            if reservation.delta >= 0:
+                usage.reserved -= reservation.delta
+            usage.in_use += reservation.delta
+
+            reservation.delete(session=session)
+
+        for usage in usages.values():
+            usage.save(session=session)
+
+
+@require_context
+def reservation_rollback(context, reservations):
+    session = get_session()
+    with session.begin():
+        reservation_refs = _quota_reservations(session, context, reservations)
+        usages = _quota_usages_by_id(session, context, reservation_refs)
+
+        for reservation in reservation_refs:
+            usage = usages[reservation.usage_id]
+            if reservation.delta >= 0:
+                usage.reserved -= reservation.delta
+
+            reservation.delete(session=session)
+
+        for usage in usages.values():
+            usage.save(session=session)
+
+
+@require_admin_context
+def reservation_expire(context):
+    session = get_session()
+    with session.begin():
+        current_time = utils.utcnow()
+        results = model_query(context, models.Reservation, session=session,
+                              read_deleted="no").\
+                          filter(models.Reservation.expire < current_time).\
+                          all()
+
+        if results:
+            usages = _quota_usages_by_id(session, context, results)
+            for reservation in results:
+                if reservation.delta >= 0:
+                    usage = usages[reservation.usage_id]
+                    usage.reserved -= reservation.delta
+                    usage.save(session=session)
+
+                reservation.delete(session=session)
+
+
+###################
+
+
 @require_context
 def quota_class_get(context, class_name, resource, session=None):
     result = model_query(context, models.QuotaClass, session=session,
@@ -609,12 +918,31 @@ def volume_create(context, values):
     return volume_ref
 
 
+@require_context
+def volume_create_many(context, values_list):
+    volume_refs = []
+    session = get_session()
+    with session.begin():
+        for values in values_list:
+            values['volume_metadata'] = _metadata_refs(
+                    values.get('metadata'), models.VolumeMetadata)
+            volume_ref = models.Volume()
+            if not values.get('id'):
+                values['id'] = str(utils.gen_uuid())
+            volume_ref.update(values)
+            session.add(volume_ref)
+            volume_refs.append(volume_ref)
+
+    return volume_refs
+
+
 @require_admin_context
-def volume_data_get_for_project(context, project_id):
+def volume_data_get_for_project(context, project_id, session=None):
     result = model_query(context,
                          func.count(models.Volume.id),
                          func.sum(models.Volume.size),
-                         read_deleted="no").\
+                         read_deleted="no",
+                         session=session).\
                      filter_by(project_id=project_id).\
                      first()
 
@@ -622,6 +950,21 @@ def volume_data_get_for_project(context, project_id):
     return (result[0] or 0, result[1] or 0)
 
 
+@require_admin_context
+def volume_data_get_for_hosts(context):
+    result = model_query(context,
+                         models.Volume.host,
+                         func.count(models.Volume.id),
+                         func.sum(models.Volume.size),
+                         read_deleted="no").\
+                     filter(models.Volume.host != None).\
+                     group_by(models.Volume.host).\
+                     all()
+
+    return dict((host, (count or 0, gigabytes or 0))
+                for (host, count, gigabytes) in result)
+
+
 @require_admin_context
 def volume_destroy(context, volume_id):
     session = get_session()
@@ -654,9 +997,11 @@ def volume_detached(context, volume_id):
 
 
 @require_context
-def _volume_get_query(context, session=None, project_only=False):
+def _volume_get_query(context, session=None, project_only=False,
+                      read_deleted=None):
     return model_query(context, models.Volume, session=session,
-                       project_only=project_only).\
+                       project_only=project_only,
+                       read_deleted=read_deleted).\
                        options(joinedload('volume_metadata')).\
                        options(joinedload('volume_type'))
 
@@ -685,9 +1030,29 @@ def volume_get(context, volume_id, session=None):
     return result
 
 
+def _volume_get_all(context, query, marker, limit, sort_key, sort_dir,
+                    filters, session):
+    filters = dict(filters or {})
+    metadata = filters.pop('metadata', None) or {}
+    query = exact_filter(query, models.Volume, filters,
+                         ('status', 'display_name', 'host'))
+    for key, value in metadata.iteritems():
+        query = query.filter(models.Volume.volume_metadata.any(
+                key=key, value=value))
+
+    marker_query = _volume_get_query(context, session=session,
+                                     project_only=True, read_deleted='yes')
+    return paginate(query, models.Volume, marker_query, marker, limit,
+                    sort_key, sort_dir).all()
+
+
 @require_admin_context
-def volume_get_all(context):
-    return _volume_get_query(context).all()
+def volume_get_all(context, marker=None, limit=None, sort_key='created_at',
+                   sort_dir='desc', filters=None):
+    session = get_session()
+    query = _volume_get_query(context, session=session)
+    return _volume_get_all(context, query, marker, limit, sort_key,
+                           sort_dir, filters, session)
 
 
 @require_admin_context
@@ -710,9 +1075,15 @@ def volume_get_all_by_instance_uuid(context, instance_uuid):
 
 
 @require_context
-def volume_get_all_by_project(context, project_id):
+def volume_get_all_by_project(context, project_id, marker=None, limit=None,
+                              sort_key='created_at', sort_dir='desc',
+                              filters=None):
     authorize_project_context(context, project_id)
-    return _volume_get_query(context).filter_by(project_id=project_id).all()
+    session = get_session()
+    query = _volume_get_query(context, session=session).\
+                    filter_by(project_id=project_id)
+    return _volume_get_all(context, query, marker, limit, sort_key,
+                           sort_dir, filters, session)
 
 
 @require_admin_context
@@ -860,9 +1231,24 @@ def snapshot_get(context, snapshot_id, session=None):
     return result
 
 
+def _snapshot_get_all(context, query, marker, limit, sort_key, sort_dir,
+                      filters, session):
+    query = exact_filter(query, models.Snapshot, dict(filters or {}),
+                         ('id', 'status', 'display_name', 'volume_id'))
+
+    marker_query = model_query(context, models.Snapshot, session=session,
+                               project_only=True, read_deleted='yes')
+    return paginate(query, models.Snapshot, marker_query, marker, limit,
+                    sort_key, sort_dir).all()
+
+
 @require_admin_context
-def snapshot_get_all(context):
-    return model_query(context, models.Snapshot).all()
+def snapshot_get_all(context, marker=None, limit=None, sort_key='created_at',
+                     sort_dir='desc', filters=None):
+    session = get_session()
+    query = model_query(context, models.Snapshot, session=session)
+    return _snapshot_get_all(context, query, marker, limit, sort_key,
+                             sort_dir, filters, session)
 
 
 @require_context
@@ -873,11 +1259,15 @@ def snapshot_get_all_for_volume(context, volume_id):
 
 
 @require_context
-def snapshot_get_all_by_project(context, project_id):
+def snapshot_get_all_by_project(context, project_id, marker=None, limit=None,
+                                sort_key='created_at', sort_dir='desc',
+                                filters=None):
     authorize_project_context(context, project_id)
-    return model_query(context, models.Snapshot).\
-                   filter_by(project_id=project_id).\
-                   all()
+    session = get_session()
+    query = model_query(context, models.Snapshot, session=session).\
+                   filter_by(project_id=project_id)
+    return _snapshot_get_all(context, query, marker, limit, sort_key,
+                             sort_dir, filters, session)
 
 
 @require_context
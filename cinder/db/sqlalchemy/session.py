@@ -23,7 +23,7 @@ import time
 import sqlalchemy.interfaces
 import sqlalchemy.orm
 from sqlalchemy.exc import DisconnectionError, OperationalError
-from sqlalchemy.pool import NullPool, StaticPool
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
 
 import cinder.exception
 import cinder.flags as flags
@@ -65,11 +65,29 @@ class MySQLPingListener(object):
     Ensures that MySQL connections checked out of the
     pool are alive.
 
+    Connections which were last used less than idle_time seconds ago
+    are assumed to be alive, to save a round-trip on busy pools.
+
     Borrowed from:
     http://groups.google.com/group/sqlalchemy/msg/a4ce563d802c929f
     """
 
+    def __init__(self, idle_time=0):
+        self.idle_time = idle_time
+
+    def connect(self, dbapi_con, con_record):
+        con_record.info['last_used'] = time.time()
+
+    def checkin(self, dbapi_con, con_record):
+        if con_record is not None:
+            con_record.info['last_used'] = time.time()
+
     def checkout(self, dbapi_con, con_record, con_proxy):
+        last_used = con_record.info.get('last_used')
+        if last_used is not None and \
+           time.time() - last_used < self.idle_time:
+            return
+
         try:
             dbapi_con.cursor().execute('select 1')
         except dbapi_con.OperationalError, ex:
@@ -80,6 +98,47 @@ class MySQLPingListener(object):
                 raise
 
 
+class TimedQueuePool(QueuePool):
+
+    """
+    Queue pool which records how long checkouts wait for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(TimedQueuePool, self).__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start = time.time()
+        try:
+            return super(TimedQueuePool, self)._do_get()
+        finally:
+            waited = time.time() - start
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+
+
+def get_pool_stats():
+    """Return usage statistics of the connection pool.
+
+    Returns an empty dict when the engine has not been created yet or
+    does not use a connection pool (e.g. sqlite).
+    """
+    pool = _ENGINE.pool if _ENGINE is not None else None
+    if not isinstance(pool, TimedQueuePool):
+        return {}
+
+    return {'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'checkouts': pool.checkouts,
+            'wait_time': pool.wait_time,
+            'max_wait_time': pool.max_wait_time}
+
+
 def is_db_connection_error(args):
     """Return True if error in connecting to db."""
     # NOTE(adam_g): This is currently MySQL specific and needs to be extended
@@ -118,9 +177,15 @@ def get_engine():
 
             if not FLAGS.sqlite_synchronous:
                 engine_args["listeners"] = [SynchronousSwitchListener()]
+        else:
+            engine_args['poolclass'] = TimedQueuePool
+            engine_args['pool_size'] = FLAGS.sql_max_pool_size
+            engine_args['max_overflow'] = FLAGS.sql_max_overflow
+            engine_args['pool_timeout'] = FLAGS.sql_pool_timeout
 
         if 'mysql' in connection_dict.drivername:
-            engine_args['listeners'] = [MySQLPingListener()]
+            engine_args['listeners'] = [
+                    MySQLPingListener(FLAGS.sql_ping_idle_time)]
 
         _ENGINE = sqlalchemy.create_engine(FLAGS.sql_connection, **engine_args)
 
@@ -242,6 +242,10 @@ class InvalidInput(Invalid):
     message = _("Invalid input received") + ": %(reason)s"
 
 
+class InvalidSortKey(Invalid):
+    message = _("Sort key supplied was not valid.")
+
+
 class InvalidInstanceType(Invalid):
     message = _("Invalid instance type %(instance_type)s.")
 
@@ -412,6 +416,10 @@ class NotFound(CinderException):
     code = 404
 
 
+class MarkerNotFound(NotFound):
+    message = _("Marker %(marker)s could not be found.")
+
+
 class FlagNotSet(NotFound):
     message = _("Required flag %(flag)s not set.")
 
@@ -871,6 +879,10 @@ class QuotaError(CinderException):
     message = _("Quota exceeded") + ": code=%(code)s"
 
 
+class OverQuota(CinderException):
+    message = _("Quota exceeded for resources: %(overs)s")
+
+
 class AggregateError(CinderException):
     message = _("Aggregate %(aggregate_id)s: action '%(action)s' "
                 "caused an error: %(reason)s.")
@@ -226,6 +226,15 @@ global_opts = [
                default=1000,
                help='the maximum number of items returned in a single '
                     'response from a collection resource'),
+    cfg.BoolOpt('osapi_stream_lists',
+                default=False,
+                help='Write JSON volume and snapshot lists as they are read '
+                     'from the database, a page at a time, instead of '
+                     'building the whole response in memory'),
+    cfg.IntOpt('osapi_stream_page_size',
+               default=100,
+               help='Number of rows read from the database at a time when '
+                    'streaming list responses'),
     cfg.StrOpt('metadata_host',
                default='$my_ip',
                help='the ip for the metadata api server'),
@@ -273,6 +282,23 @@ global_opts = [
     cfg.IntOpt('sql_retry_interval',
                default=10,
                help='interval between retries of opening a sql connection'),
+    cfg.IntOpt('sql_max_pool_size',
+               default=5,
+               help='maximum number of SQL connections kept open in the '
+                    'pool'),
+    cfg.IntOpt('sql_max_overflow',
+               default=10,
+               help='number of SQL connections that may be opened beyond '
+                    'sql_max_pool_size when the pool is exhausted'),
+    cfg.IntOpt('sql_pool_timeout',
+               default=30,
+               help='seconds to wait for a SQL connection from the pool '
+                    'before giving up'),
+    cfg.IntOpt('sql_ping_idle_time',
+               default=10,
+               help='only check that MySQL connections are alive when they '
+                    'are checked out of the pool after being idle for more '
+                    'than this many seconds. 0 checks on every checkout'),
     cfg.StrOpt('volume_manager',
                default='cinder.volume.manager.VolumeManager',
                help='full class name for the Manager for volume'),
@@ -313,6 +339,11 @@ global_opts = [
     cfg.StrOpt('root_helper',
                default='sudo',
                help='Command prefix to use for running commands as root'),
+    cfg.StrOpt('root_helper_daemon',
+               default=None,
+               help='Command to start a long-running root helper, e.g. '
+                    '"sudo cinder-rootwrap-daemon". When set, commands run '
+                    'as root go to it instead of through root_helper'),
     cfg.BoolOpt('use_ipv6',
                 default=False,
                 help='use ipv6'),
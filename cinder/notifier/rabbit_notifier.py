@@ -14,8 +14,9 @@
 #    under the License.
 
 
-import cinder.context
+import eventlet
 
+import cinder.context
 from cinder import flags
 from cinder import log as logging
 from cinder.openstack.common import cfg
@@ -23,20 +24,60 @@ from cinder import rpc
 
 LOG = logging.getLogger(__name__)
 
-notification_topic_opt = cfg.ListOpt('notification_topics',
-        default=['notifications', ],
-        help='AMQP topic used for Cinder notifications')
+rabbit_notifier_opts = [
+    cfg.ListOpt('notification_topics',
+                default=['notifications', ],
+                help='AMQP topic used for Cinder notifications'),
+    cfg.FloatOpt('notification_batch_window',
+                 default=0.0,
+                 help='Seconds to hold notifications so they are published '
+                      'together; 0 publishes each one immediately'),
+    cfg.IntOpt('notification_batch_size',
+               default=100,
+               help='Publish held notifications as soon as this many are '
+                    'waiting'),
+    ]
 
 FLAGS = flags.FLAGS
-FLAGS.register_opt(notification_topic_opt)
+FLAGS.register_opts(rabbit_notifier_opts)
+
+_pending = []
+_flush_timer = None
+
+
+def flush():
+    """Publish any notifications held back by notification_batch_window."""
+    global _pending, _flush_timer
+    if _flush_timer is not None:
+        _flush_timer.cancel()
+        _flush_timer = None
+    if not _pending:
+        return
+    msgs, _pending = _pending, []
+    context = cinder.context.get_admin_context()
+    try:
+        rpc.notify_many(context, msgs)
+    except Exception:
+        LOG.exception(_("Could not send %d notifications"), len(msgs))
 
 
 def notify(message):
     """Sends a notification to the RabbitMQ"""
+    global _flush_timer
     context = cinder.context.get_admin_context()
     priority = message.get('priority',
                            FLAGS.default_notification_level)
     priority = priority.lower()
+    if FLAGS.notification_batch_window > 0:
+        for topic in FLAGS.notification_topics:
+            _pending.append(('%s.%s' % (topic, priority), message))
+        if len(_pending) >= FLAGS.notification_batch_size:
+            flush()
+        elif _flush_timer is None:
+            _flush_timer = eventlet.spawn_after(
+                    FLAGS.notification_batch_window, flush)
+        return
+
     for topic in FLAGS.notification_topics:
         topic = '%s.%s' % (topic, priority)
         try:
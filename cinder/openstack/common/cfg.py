@@ -813,6 +813,10 @@ class ConfigOpts(collections.Mapping):
         self._opts = {}  # dict of dicts of (opt:, override:, default:)
         self._groups = {}
 
+        self._cache = {}  # dict of (group name, opt name): value
+        self._cache_hits = 0
+        self._cache_misses = 0
+
         self._args = None
         self._cli_values = {}
 
@@ -851,6 +855,7 @@ class ConfigOpts(collections.Mapping):
         (values, args) = self._oparser.parse_args(self._args)
 
         self._cli_values = vars(values)
+        self._clear_cache()
 
         if self.config_file:
             self._parse_config_files(self.config_file)
@@ -864,7 +869,7 @@ class ConfigOpts(collections.Mapping):
         :returns: the option value (after string subsititution) or a GroupAttr
         :raises: NoSuchOptError,ConfigFileValueError,TemplateSubstitutionError
         """
-        return self._substitute(self._get(name))
+        return self._get_cached(name)
 
     def __getitem__(self, key):
         """Look up an option value and perform string substitution."""
@@ -888,6 +893,7 @@ class ConfigOpts(collections.Mapping):
         self._args = None
         self._cli_values = None
         self._cparser = None
+        self._clear_cache()
 
     def register_opt(self, opt, group=None):
         """Register an option schema.
@@ -901,6 +907,9 @@ class ConfigOpts(collections.Mapping):
         :return: False if the opt was already register, True otherwise
         :raises: DuplicateOptError
         """
+        # A new opt may change how template variables are substituted
+        self._clear_cache()
+
         if group is not None:
             return self._get_group(group)._register_opt(opt)
 
@@ -958,6 +967,7 @@ class ConfigOpts(collections.Mapping):
             return
 
         self._groups[group.name] = copy.copy(group)
+        self._clear_cache()
 
     def set_override(self, name, override, group=None):
         """Override an opt value.
@@ -972,6 +982,7 @@ class ConfigOpts(collections.Mapping):
         """
         opt_info = self._get_opt_info(name, group)
         opt_info['override'] = override
+        self._clear_cache()
 
     def set_default(self, name, default, group=None):
         """Override an opt's default value.
@@ -986,6 +997,39 @@ class ConfigOpts(collections.Mapping):
         """
         opt_info = self._get_opt_info(name, group)
         opt_info['default'] = default
+        self._clear_cache()
+
+    def clear_override(self, name, group=None):
+        """Clear an override of an opt value.
+
+        Clear a previously set override of the command line, config file
+        and default values of a given option.
+
+        :param name: the name/dest of the opt
+        :param group: an option OptGroup object or group name
+        :raises: NoSuchOptError, NoSuchGroupError
+        """
+        self.set_override(name, None, group)
+
+    def clear_default(self, name, group=None):
+        """Clear an override of an opt's default value.
+
+        Clear a previously set override of the default value of given option.
+
+        :param name: the name/dest of the opt
+        :param group: an option OptGroup object or group name
+        :raises: NoSuchOptError, NoSuchGroupError
+        """
+        self.set_default(name, None, group)
+
+    def cache_stats(self):
+        """Return the hit and miss counts of the opt value cache.
+
+        :returns: a dict with 'hits', 'misses' and 'size' keys
+        """
+        return {'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'size': len(self._cache)}
 
     def disable_interspersed_args(self):
         """Set parsing to stop on the first non-option.
@@ -1055,6 +1099,37 @@ class ConfigOpts(collections.Mapping):
         """Print the help message for the current program."""
         self._oparser.print_help(file)
 
+    def _get_cached(self, name, group=None):
+        """Look up a substituted option value, memoizing the result.
+
+        Values are cached per (group, name) until an opt or group is
+        registered, an override or default is changed or the command line
+        and config files are parsed again.
+
+        :param name: the opt name (or 'dest', more precisely)
+        :param group: an OptGroup
+        :returns: the option value (after string subsititution) or a GroupAttr
+        :raises: NoSuchOptError,ConfigFileValueError,TemplateSubstitutionError
+        """
+        key = (group.name if group is not None else None, name)
+        try:
+            value = self._cache[key]
+        except KeyError:
+            self._cache_misses += 1
+            value = self._substitute(self._get(name, group))
+            self._cache[key] = value
+        else:
+            self._cache_hits += 1
+
+        # Don't let callers modify the cached copy of a list value
+        if isinstance(value, list):
+            return list(value)
+        return value
+
+    def _clear_cache(self):
+        """Invalidate all cached option values."""
+        self._cache.clear()
+
     def _get(self, name, group=None):
         """Look up an option value.
 
@@ -1178,6 +1253,8 @@ class ConfigOpts(collections.Mapping):
             not_read_ok = filter(lambda f: f not in read_ok, config_files)
             raise ConfigFilesNotFoundError(not_read_ok)
 
+        self._clear_cache()
+
     class GroupAttr(collections.Mapping):
 
         """
@@ -1196,7 +1273,7 @@ class ConfigOpts(collections.Mapping):
 
         def __getattr__(self, name):
             """Look up an option value and perform template substitution."""
-            return self.conf._substitute(self.conf._get(name, self.group))
+            return self.conf._get_cached(name, self.group)
 
         def __getitem__(self, key):
             """Look up an option value and perform string substitution."""
@@ -17,6 +17,8 @@
 
 """Policy Engine For Cinder"""
 
+import time
+
 from cinder.common import policy
 from cinder import exception
 from cinder import flags
@@ -31,6 +33,10 @@ policy_opts = [
     cfg.StrOpt('policy_default_rule',
                default='default',
                help=_('Rule checked when requested rule is not found')),
+    cfg.IntOpt('policy_check_interval',
+               default=5,
+               help=_('Seconds between checks of policy_file for changes; '
+                      '0 checks on every request')),
     ]
 
 FLAGS = flags.FLAGS
@@ -53,8 +59,14 @@ def init():
     global _POLICY_CACHE
     if not _POLICY_PATH:
         _POLICY_PATH = utils.find_config(FLAGS.policy_file)
+    now = time.time()
+    checked_at = _POLICY_CACHE.get('checked_at')
+    if (checked_at is not None and
+        now - checked_at < FLAGS.policy_check_interval):
+        return
     utils.read_cached_file(_POLICY_PATH, _POLICY_CACHE,
                            reload_func=_set_brain)
+    _POLICY_CACHE['checked_at'] = now
 
 
 def _set_brain(data):
@@ -18,9 +18,13 @@
 
 """Quotas for instances, volumes, and floating ips."""
 
+import datetime
+import time
+
 from cinder import db
 from cinder.openstack.common import cfg
 from cinder import flags
+from cinder import utils
 
 
 quota_opts = [
@@ -60,6 +64,20 @@ quota_opts = [
     cfg.IntOpt('quota_security_group_rules',
                default=20,
                help='number of security rules per security group'),
+    cfg.IntOpt('reservation_expire',
+               default=86400,
+               help='number of seconds until a reservation expires'),
+    cfg.IntOpt('until_refresh',
+               default=0,
+               help='count of reservations until usage is refreshed'),
+    cfg.IntOpt('max_age',
+               default=0,
+               help='number of seconds between subsequent usage refreshes'),
+    cfg.IntOpt('quota_cache_ttl',
+               default=30,
+               help='number of seconds the quota class and project quota '
+                    'overrides read from the database are cached for '
+                    'reservations; 0 disables the cache'),
     ]
 
 FLAGS = flags.FLAGS
@@ -232,3 +250,84 @@ def allowed_injected_file_content_bytes(context, requested_bytes):
 def allowed_injected_file_path_bytes(context):
     """Return the number of bytes allowed in an injected file path."""
     return FLAGS.quota_injected_file_path_bytes
+
+
+# NOTE: maps (project_id, quota_class) to (timestamp, overrides) so that
+#       reservations don't re-read the quota tables on every request.
+_LIMITS_CACHE = {}
+
+
+def _get_cached_project_quotas(context, project_id):
+    """Like get_project_quotas, but the quota class and project overrides
+    are cached for quota_cache_ttl seconds.  Deployment defaults are
+    always taken from the current flags.
+    """
+    ttl = FLAGS.quota_cache_ttl
+    key = (project_id, context.quota_class)
+    now = time.time()
+    cached = _LIMITS_CACHE.get(key)
+    if ttl > 0 and cached and now - cached[0] < ttl:
+        overrides = cached[1]
+    else:
+        overrides = {}
+        if context.quota_class:
+            overrides.update(db.quota_class_get_all_by_name(context,
+                    context.quota_class))
+        overrides.update(db.quota_get_all_by_project(context, project_id))
+        if ttl > 0:
+            _LIMITS_CACHE[key] = (now, overrides)
+
+    quotas = _get_default_quotas()
+    for key in quotas.keys():
+        if key in overrides:
+            quotas[key] = overrides[key]
+    return quotas
+
+
+def reserve(context, expire=None, project_id=None, **deltas):
+    """Check quotas and reserve resources.
+
+    For counting quotas--those quotas for which there is a usage
+    synchronization function--this method checks quotas against
+    current usage and the desired deltas.  The deltas are given as
+    keyword arguments, e.g. reserve(context, volumes=1, gigabytes=10).
+
+    This method will raise an OverQuota exception if any of the
+    resources would go over quota.  Otherwise it returns a list of
+    reservation UUIDs, which must be passed to commit() or rollback().
+
+    :param expire: An optional parameter specifying an expiration
+                   time for the reservations.  If it is a simple
+                   number, it is interpreted as a number of seconds
+                   and added to the current time; if it is a datetime,
+                   it is used as the expiration time.  If it is not
+                   provided, the reservation_expire flag is used.
+    :param project_id: The project to reserve for.  Defaults to the
+                       project of the context.
+    """
+    if expire is None:
+        expire = FLAGS.reservation_expire
+    if isinstance(expire, (int, long)):
+        expire = utils.utcnow() + datetime.timedelta(seconds=expire)
+    if project_id is None:
+        project_id = context.project_id
+
+    quotas = _get_cached_project_quotas(context.elevated(), project_id)
+    return db.quota_reserve(context, quotas, deltas, expire,
+                            FLAGS.until_refresh, FLAGS.max_age,
+                            project_id=project_id)
+
+
+def commit(context, reservations):
+    """Commit reservations, moving them from reserved to in_use."""
+    db.reservation_commit(context, reservations)
+
+
+def rollback(context, reservations):
+    """Roll back reservations, releasing what they reserved."""
+    db.reservation_rollback(context, reservations)
+
+
+def expire(context):
+    """Roll back any expired reservations."""
+    db.reservation_expire(context)
@@ -0,0 +1,89 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2011 OpenStack, LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Client for the root helper daemon in cinder.rootwrap.daemon."""
+
+import shlex
+
+from eventlet import semaphore
+from eventlet.green import socket
+from eventlet.green import subprocess
+
+from cinder import exception
+from cinder import log as logging
+from cinder.rootwrap import daemon
+
+
+LOG = logging.getLogger(__name__)
+
+
+class RootwrapClient(object):
+    """Runs commands through a root helper daemon it starts on demand.
+
+    The daemon is started with daemon_cmd on first use, and again if it
+    has exited.  Each command uses its own unix socket connection, so
+    concurrent greenthreads do not wait on each other.
+    """
+
+    def __init__(self, daemon_cmd):
+        self.daemon_cmd = daemon_cmd
+        self._process = None
+        self._path = None
+        self._lock = semaphore.Semaphore()
+
+    def _ensure_daemon(self):
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                return self._path
+            LOG.info(_('Starting root helper daemon: %s'), self.daemon_cmd)
+            self._process = subprocess.Popen(shlex.split(self.daemon_cmd),
+                                             stdin=subprocess.PIPE,
+                                             stdout=subprocess.PIPE,
+                                             close_fds=True)
+            self._path = self._process.stdout.readline().strip()
+            if not self._path:
+                self._process = None
+                raise exception.Error(_('Root helper daemon failed to '
+                                        'start: %s') % self.daemon_cmd)
+            return self._path
+
+    def execute(self, cmd, process_input=None):
+        """Run cmd as root; return (returncode, stdout, stderr)."""
+        path = self._ensure_daemon()
+        if process_input is not None:
+            process_input = process_input.decode('latin-1')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            daemon.send_msg(sock, {'cmd': cmd, 'stdin': process_input})
+            reply = daemon.recv_msg(sock)
+        except (socket.error, EOFError), exc:
+            raise exception.Error(_('Root helper daemon request failed: '
+                                    '%s') % exc)
+        finally:
+            sock.close()
+        return (reply['returncode'],
+                reply['stdout'].encode('latin-1'),
+                reply['stderr'].encode('latin-1'))
+
+    def stop(self):
+        """Close the daemon's stdin, which makes it exit."""
+        with self._lock:
+            if self._process is not None:
+                self._process.stdin.close()
+                self._process.wait()
+                self._process = None
@@ -0,0 +1,148 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright (c) 2011 OpenStack, LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Long-running root helper.
+
+The daemon is started once, through sudo, by a service that runs many
+commands as root.  It listens on a unix socket in a directory that only
+the invoking user can reach, checks every request against the same
+filters as cinder-rootwrap and runs the allowed commands.
+
+Requests and replies are JSON documents prefixed by their length.  A
+request is {'cmd': [...], 'stdin': ...} and its reply is
+{'returncode': ..., 'stdout': ..., 'stderr': ...}.  Process input and
+output are sent latin-1 decoded so arbitrary bytes survive the trip.
+"""
+
+import json
+import os
+import shutil
+import SocketServer
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+
+from cinder.rootwrap import wrapper
+
+
+RC_UNAUTHORIZED = 99
+RC_NOCOMMAND = 98
+
+_HEADER = struct.Struct('!I')
+
+
+def send_msg(sock, obj):
+    data = json.dumps(obj)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise EOFError()
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.join(chunks)
+
+
+def recv_msg(sock):
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+def run_command(filters, userargs, process_input=None):
+    """Run userargs if a filter allows it.
+
+    Returns a (returncode, stdout, stderr) tuple.
+    """
+    if not userargs:
+        return (RC_NOCOMMAND, '', 'No command specified\n')
+    filtermatch = wrapper.match_filter(filters, userargs)
+    if not filtermatch:
+        return (RC_UNAUTHORIZED, '',
+                'Unauthorized command: %s\n' % ' '.join(userargs))
+    obj = subprocess.Popen(filtermatch.get_command(userargs),
+                           stdin=subprocess.PIPE,
+                           stdout=subprocess.PIPE,
+                           stderr=subprocess.PIPE,
+                           close_fds=True,
+                           env=filtermatch.get_environment(userargs))
+    (stdout, stderr) = obj.communicate(process_input)
+    return (obj.returncode, stdout, stderr)
+
+
+class RootwrapHandler(SocketServer.BaseRequestHandler):
+    """Serves requests on one client connection until it is closed."""
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_msg(self.request)
+            except EOFError:
+                return
+            userargs = [arg.encode('utf-8') for arg in request['cmd']]
+            process_input = request.get('stdin')
+            if process_input is not None:
+                process_input = process_input.encode('latin-1')
+            (returncode, stdout, stderr) = run_command(self.server.filters,
+                                                       userargs,
+                                                       process_input)
+            send_msg(self.request, {'returncode': returncode,
+                                    'stdout': stdout.decode('latin-1'),
+                                    'stderr': stderr.decode('latin-1')})
+
+
+class RootwrapServer(SocketServer.ThreadingMixIn,
+                     SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, filters):
+        self.filters = filters
+        SocketServer.UnixStreamServer.__init__(self, path, RootwrapHandler)
+
+
+def daemon_start(filters):
+    """Serve requests until stdin is closed.
+
+    The socket path is written as a single line on stdout once the
+    daemon is ready.  The parent keeps stdin open for as long as it
+    wants the daemon, so the daemon exits along with it.
+    """
+    uid = int(os.environ.get('SUDO_UID', os.getuid()))
+    gid = int(os.environ.get('SUDO_GID', os.getgid()))
+    tmpdir = tempfile.mkdtemp(prefix='cinder-rootwrap-')
+    try:
+        os.chmod(tmpdir, 0700)
+        os.chown(tmpdir, uid, gid)
+        path = os.path.join(tmpdir, 'rootwrap.sock')
+        server = RootwrapServer(path, filters)
+        os.chown(path, uid, gid)
+
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        sys.stdout.write(path + '\n')
+        sys.stdout.flush()
+        sys.stdin.read()
+        server.shutdown()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
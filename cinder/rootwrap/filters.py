@@ -34,6 +34,14 @@ class CommandFilter(object):
             return True
         return False
 
+    def get_command_names(self):
+        """Returns the first arguments this filter can match.
+
+        None means any first argument may match, so the filter has to be
+        tried for every command.
+        """
+        return (os.path.basename(self.exec_path),)
+
     def get_command(self, userargs):
         """Returns command to execute (with sudo -u if run_as != root)."""
         if (self.run_as != 'root'):
@@ -49,19 +57,24 @@ class CommandFilter(object):
 class RegExpFilter(CommandFilter):
     """Command filter doing regexp matching for every argument"""
 
+    def __init__(self, exec_path, run_as, *args):
+        super(RegExpFilter, self).__init__(exec_path, run_as, *args)
+        # Anchor patterns explicitly at end of string
+        try:
+            self.regexps = [re.compile(pattern + '$') for pattern in args]
+        except re.error:
+            # Badly-formed filter, never matches
+            self.regexps = None
+
     def match(self, userargs):
-        # Early skip if command or number of args don't match
-        if (len(self.args) != len(userargs)):
-            # DENY: argument numbers don't match
+        # Early skip if filter is invalid or number of args don't match
+        if self.regexps is None or len(self.regexps) != len(userargs):
+            # DENY: badly-formed filter or argument numbers don't match
             return False
-        # Compare each arg (anchoring pattern explicitly at end of string)
-        for (pattern, arg) in zip(self.args, userargs):
-            try:
-                if not re.match(pattern + '$', arg):
-                    break
-            except re.error:
-                # DENY: Badly-formed filter
-                return False
+        # Compare each arg
+        for (regexp, arg) in zip(self.regexps, userargs):
+            if not regexp.match(arg):
+                break
         else:
             # ALLOW: All arguments matched
             return True
@@ -69,6 +82,15 @@ class RegExpFilter(CommandFilter):
         # DENY: Some arguments did not match
         return False
 
+    def get_command_names(self):
+        if self.regexps is None or not self.args:
+            return ()
+        command = self.args[0]
+        if re.search(r'[\\.^$*+?{}\[\]|()]', command):
+            # Command is a real pattern, so it can match anything
+            return None
+        return (command,)
+
 
 class DnsmasqFilter(CommandFilter):
     """Specific filter for the dnsmasq call (which includes env)"""
@@ -83,6 +105,10 @@ class DnsmasqFilter(CommandFilter):
     def get_command(self, userargs):
         return [self.exec_path] + userargs[3:]
 
+    def get_command_names(self):
+        # First argument is an environment variable setting
+        return None
+
     def get_environment(self, userargs):
         env = os.environ.copy()
         env['FLAGFILE'] = userargs[0].split('=')[-1]
@@ -129,6 +155,9 @@ class KillFilter(CommandFilter):
             return False
         return True
 
+    def get_command_names(self):
+        return ('kill',)
+
 
 class ReadFileFilter(CommandFilter):
     """Specific filter for the utils.read_file_as_root call"""
@@ -145,3 +174,6 @@ class ReadFileFilter(CommandFilter):
         if len(userargs) != 2:
             return False
         return True
+
+    def get_command_names(self):
+        return ('cat',)
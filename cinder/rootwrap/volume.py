@@ -24,6 +24,7 @@ filterlist = [
     filters.CommandFilter("/usr/sbin/tgtadm", "root"),
 
     # cinder/volume/driver.py: 'vgs', '--noheadings', '-o', 'name'
+    # cinder/volume/driver.py: 'vgs', '--noheadings', '--nosuffix', ...
     filters.CommandFilter("/sbin/vgs", "root"),
 
     # cinder/volume/driver.py: 'lvcreate', '-L', sizestr, '-n', volume_name,..
@@ -31,11 +32,52 @@ filterlist = [
     filters.CommandFilter("/sbin/lvcreate", "root"),
 
     # cinder/volume/driver.py: 'dd', 'if=%s' % srcstr, 'of=%s' % deststr,...
+    # cinder/volume/wipe.py: 'dd', 'if=/dev/zero', 'of=%s' % path, ...
     filters.CommandFilter("/bin/dd", "root"),
 
-    # cinder/volume/driver.py: 'lvremove', '-f', "%s/%s" % ...
+    # cinder/volume/wipe.py: 'lvremove', '-f', "%s/%s" % ...
     filters.CommandFilter("/sbin/lvremove", "root"),
 
+    # cinder/volume/driver.py: 'lvextend', '-L', sizestr, ...
+    filters.CommandFilter("/sbin/lvextend", "root"),
+
+    # cinder/volume/wipe.py: 'lvrename', volume_group, lv_name, pending_name
+    filters.CommandFilter("/sbin/lvrename", "root"),
+
+    # cinder/volume/driver.py: 'lvs', '--noheadings', '-o', 'lv_attr', ...
+    # cinder/volume/wipe.py: 'lvs', '--noheadings', '--nosuffix', ...
+    filters.CommandFilter("/sbin/lvs", "root"),
+
+    # cinder/volume/driver.py: 'blkdiscard', path
+    # cinder/volume/wipe.py: 'blkdiscard', path
+    filters.CommandFilter("/sbin/blkdiscard", "root"),
+
+    # cinder/volume/wipe.py: 'ionice', '-c3', 'dd', 'if=/dev/zero', ...
+    # NOTE: ionice and cgexec run the command that follows them, so only
+    # the exact dd that clears a pending volume may be run through them.
+    filters.RegExpFilter("/usr/bin/ionice", "root", 'ionice', '-c[1-3]',
+                         'dd', 'if=/dev/zero',
+                         r'of=/dev/[\w+-][\w.+-]*/wipe-[\w.+-]+',
+                         r'count=\d+', 'bs=1M', 'oflag=direct'),
+
+    # cinder/volume/wipe.py: 'cgcreate', '-g', 'blkio:%s' % group
+    # cinder/volume/wipe.py: 'cgset', '-r', ...
+    # cinder/volume/wipe.py: 'cgexec', '-g', 'blkio:%s' % group, ...
+    filters.RegExpFilter("/usr/bin/cgcreate", "root", 'cgcreate', '-g',
+                         r'blkio:[\w.-]+'),
+    filters.RegExpFilter("/usr/bin/cgset", "root", 'cgset', '-r',
+                         r'blkio\.throttle\.write_bps_device=\d+:\d+ \d+',
+                         r'[\w.-]+'),
+    filters.RegExpFilter("/usr/bin/cgexec", "root", 'cgexec', '-g',
+                         r'blkio:[\w.-]+', 'dd', 'if=/dev/zero',
+                         r'of=/dev/[\w+-][\w.+-]*/wipe-[\w.+-]+',
+                         r'count=\d+', 'bs=1M', 'oflag=direct'),
+    filters.RegExpFilter("/usr/bin/cgexec", "root", 'cgexec', '-g',
+                         r'blkio:[\w.-]+', 'ionice', '-c[1-3]',
+                         'dd', 'if=/dev/zero',
+                         r'of=/dev/[\w+-][\w.+-]*/wipe-[\w.+-]+',
+                         r'count=\d+', 'bs=1M', 'oflag=direct'),
+
     # cinder/volume/driver.py: 'lvdisplay','--noheading','-C','-o','Attr',..
     filters.CommandFilter("/sbin/lvdisplay", "root"),
 
@@ -23,6 +23,44 @@ import sys
 FILTERS_MODULES = ['cinder.rootwrap.volume']
 
 
+class FilterIndex(object):
+    """Filters indexed by the command name they can match.
+
+    Matching a command only tries the filters registered for its name,
+    plus those that can match any name, in their original order.  Whether
+    a filter's executable exists is checked once per exec_path.
+    """
+
+    def __init__(self, filters):
+        self.filters = list(filters)
+        self._any = []
+        self._by_name = {}
+        for f in self.filters:
+            names = f.get_command_names()
+            if names is None:
+                self._any.append(f)
+                for candidates in self._by_name.itervalues():
+                    candidates.append(f)
+                continue
+            for name in names:
+                if name not in self._by_name:
+                    self._by_name[name] = list(self._any)
+                if f not in self._by_name[name]:
+                    self._by_name[name].append(f)
+        self._executable = {}
+
+    def candidates(self, userargs):
+        return self._by_name.get(userargs[0], self._any)
+
+    def is_executable(self, f):
+        try:
+            return self._executable[f.exec_path]
+        except KeyError:
+            found = os.access(f.exec_path, os.X_OK)
+            self._executable[f.exec_path] = found
+            return found
+
+
 def load_filters():
     """Load filters from modules present in cinder.rootwrap."""
     filters = []
@@ -35,21 +73,26 @@ def load_filters():
             # It's OK to have missing filters, since filter modules are
             # shipped with specific nodes rather than with python-cinder
             pass
-    return filters
+    return FilterIndex(filters)
 
 
 def match_filter(filters, userargs):
     """
     Checks user command and arguments through command filters and
     returns the first matching filter, or None is none matched.
+
+    filters is either a FilterIndex or a list of filters.
     """
 
+    if not isinstance(filters, FilterIndex):
+        filters = FilterIndex(filters)
+
     found_filter = None
 
-    for f in filters:
+    for f in filters.candidates(userargs):
         if f.match(userargs):
             # Try other filters if executable is absent
-            if not os.access(f.exec_path, os.X_OK):
+            if not filters.is_executable(f):
                 if not found_filter:
                     found_filter = f
                 continue
@@ -38,6 +38,11 @@ rpc_opts = [
                default=['cinder.exception'],
                help='Modules of exceptions that are permitted to be recreated'
                     'upon receiving exception data from an rpc call.'),
+    cfg.BoolOpt('amqp_rpc_single_reply_queue',
+                default=False,
+                help='Receive call and multicall replies on one reply queue '
+                     'per process instead of a queue per call. Enable only '
+                     'once every service understands reply queues.'),
     ]
 
 _CONF = None
@@ -107,6 +112,21 @@ def cast(context, topic, msg):
     return _get_impl().cast(_CONF, context, topic, msg)
 
 
+def cast_many(context, msgs):
+    """Invoke several remote methods that do not return anything.
+
+    The messages are all sent over one connection to the message bus.
+
+    :param context: Information that identifies the user that has made this
+                    request.
+    :param msgs: A list of (topic, msg) tuples, each as would be passed to
+                 cast().
+
+    :returns: None
+    """
+    return _get_impl().cast_many(_CONF, context, msgs)
+
+
 def fanout_cast(context, topic, msg):
     """Broadcast a remote method invocation with no return.
 
@@ -171,6 +191,19 @@ def notify(context, topic, msg):
     return _get_impl().notify(_CONF, context, topic, msg)
 
 
+def notify_many(context, msgs):
+    """Send several notification events over one connection.
+
+    :param context: Information that identifies the user that has made this
+                    request.
+    :param msgs: A list of (topic, msg) tuples, each as would be passed to
+                 notify().
+
+    :returns: None
+    """
+    return _get_impl().notify_many(_CONF, context, msgs)
+
+
 def cleanup():
     """Clean up resoruces in use by implementation.
 
@@ -31,6 +31,7 @@ import uuid
 
 from eventlet import greenpool
 from eventlet import pools
+from eventlet import queue
 from eventlet import semaphore
 
 from cinder import context
@@ -51,6 +52,7 @@ class Pool(pools.Pool):
         kwargs.setdefault("max_size", self.conf.rpc_conn_pool_size)
         kwargs.setdefault("order_as_stack", True)
         super(Pool, self).__init__(*args, **kwargs)
+        self.reply_proxy = None
 
     # TODO(comstud): Timeout connections not used in a while
     def create(self):
@@ -60,9 +62,13 @@ class Pool(pools.Pool):
     def empty(self):
         while self.free_items:
             self.get().close()
+        if self.reply_proxy:
+            self.reply_proxy.close()
+            self.reply_proxy = None
 
 
 _pool_create_sem = semaphore.Semaphore()
+_reply_proxy_create_sem = semaphore.Semaphore()
 
 
 def get_connection_pool(conf, connection_cls):
@@ -143,40 +149,89 @@ class ConnectionContext(rpc_common.Connection):
             raise exception.InvalidRPCConnectionReuse()
 
 
+class ReplyProxy(ConnectionContext):
+    """A dedicated connection consuming the process-wide reply queue.
+
+    Replies carry the msg_id of the call they answer and are handed to
+    the waiter registered for that msg_id.
+    """
+
+    def __init__(self, conf, connection_pool):
+        self._call_waiters = {}
+        self.reply_q = 'reply_' + uuid.uuid4().hex
+        super(ReplyProxy, self).__init__(conf, connection_pool, pooled=False)
+        self.declare_direct_consumer(self.reply_q, self._process_data)
+        self.consume_in_thread()
+
+    def _process_data(self, message_data):
+        msg_id = message_data.pop('_msg_id', None)
+        waiter = self._call_waiters.get(msg_id)
+        if not waiter:
+            LOG.warn(_('no calling threads waiting for msg_id : %s'
+                       ', message : %s') % (msg_id, message_data))
+        else:
+            waiter.put(message_data)
+
+    def add_call_waiter(self, waiter, msg_id):
+        self._call_waiters[msg_id] = waiter
+
+    def del_call_waiter(self, msg_id):
+        self._call_waiters.pop(msg_id, None)
+
+
+def get_reply_proxy(conf, connection_pool):
+    with _reply_proxy_create_sem:
+        # Make sure only one thread creates the reply queue.
+        if not connection_pool.reply_proxy:
+            connection_pool.reply_proxy = ReplyProxy(conf, connection_pool)
+    return connection_pool.reply_proxy
+
+
 def msg_reply(conf, msg_id, connection_pool, reply=None, failure=None,
-              ending=False):
+              ending=False, reply_q=None, connection=None):
     """Sends a reply or an error on the channel signified by msg_id.
 
-    Failure should be a sys.exc_info() tuple.
+    Failure should be a sys.exc_info() tuple.  If the caller named a
+    reply_q, the reply goes there, tagged with msg_id.  The reply is sent
+    on connection if given, otherwise on one taken from connection_pool.
 
     """
-    with ConnectionContext(conf, connection_pool) as conn:
-        if failure:
-            failure = rpc_common.serialize_remote_exception(failure)
-
-        try:
-            msg = {'result': reply, 'failure': failure}
-        except TypeError:
-            msg = {'result': dict((k, repr(v))
-                            for k, v in reply.__dict__.iteritems()),
-                    'failure': failure}
-        if ending:
-            msg['ending'] = True
-        conn.direct_send(msg_id, msg)
+    if connection is None:
+        with ConnectionContext(conf, connection_pool) as conn:
+            return msg_reply(conf, msg_id, connection_pool, reply, failure,
+                             ending, reply_q, conn)
+
+    if failure:
+        failure = rpc_common.serialize_remote_exception(failure)
+
+    try:
+        msg = {'result': reply, 'failure': failure}
+    except TypeError:
+        msg = {'result': dict((k, repr(v))
+                        for k, v in reply.__dict__.iteritems()),
+                'failure': failure}
+    if ending:
+        msg['ending'] = True
+    if reply_q:
+        msg['_msg_id'] = msg_id
+        connection.direct_send(reply_q, msg)
+    else:
+        connection.direct_send(msg_id, msg)
 
 
 class RpcContext(context.RequestContext):
     """Context that supports replying to a rpc.call"""
     def __init__(self, *args, **kwargs):
         self.msg_id = kwargs.pop('msg_id', None)
+        self.reply_q = kwargs.pop('reply_q', None)
         self.conf = kwargs.pop('conf')
         super(RpcContext, self).__init__(*args, **kwargs)
 
     def reply(self, reply=None, failure=None, ending=False,
-              connection_pool=None):
+              connection_pool=None, connection=None):
         if self.msg_id:
             msg_reply(self.conf, self.msg_id, connection_pool, reply, failure,
-                      ending)
+                      ending, self.reply_q, connection)
             if ending:
                 self.msg_id = None
 
@@ -192,6 +247,7 @@ def unpack_context(conf, msg):
             value = msg.pop(key)
             context_dict[key[9:]] = value
     context_dict['msg_id'] = msg.pop('_msg_id', None)
+    context_dict['reply_q'] = msg.pop('_reply_q', None)
     context_dict['conf'] = conf
     ctx = RpcContext.from_dict(context_dict)
     rpc_common._safe_log(LOG.debug, _('unpacked context: %s'), ctx.to_dict())
@@ -260,14 +316,23 @@ class ProxyCallback(object):
             node_args = dict((str(k), v) for k, v in args.iteritems())
             # NOTE(vish): magic is fun!
             rval = node_func(context=ctxt, **node_args)
-            # Check if the result was a generator
-            if inspect.isgenerator(rval):
-                for x in rval:
-                    ctxt.reply(x, None, connection_pool=self.connection_pool)
-            else:
-                ctxt.reply(rval, None, connection_pool=self.connection_pool)
-            # This final None tells multicall that it is done.
-            ctxt.reply(ending=True, connection_pool=self.connection_pool)
+            # NOTE: all parts of a reply go out on one connection; a cast
+            # has no msg_id and sends nothing, so it takes none.
+            conn = None
+            if ctxt.msg_id:
+                conn = ConnectionContext(self.conf, self.connection_pool)
+            try:
+                # Check if the result was a generator
+                if inspect.isgenerator(rval):
+                    for x in rval:
+                        ctxt.reply(x, None, connection=conn)
+                else:
+                    ctxt.reply(rval, None, connection=conn)
+                # This final None tells multicall that it is done.
+                ctxt.reply(ending=True, connection=conn)
+            finally:
+                if conn is not None:
+                    conn.close()
         except Exception as e:
             LOG.exception('Exception during message handling')
             ctxt.reply(None, sys.exc_info(),
@@ -324,6 +389,61 @@ class MulticallWaiter(object):
             yield result
 
 
+class MulticallProxyWaiter(object):
+    """Waits for the replies to one call on the shared reply queue."""
+
+    def __init__(self, conf, msg_id, timeout, connection_pool):
+        self._msg_id = msg_id
+        self._timeout = timeout or conf.rpc_response_timeout
+        self._reply_proxy = connection_pool.reply_proxy
+        self._done = False
+        self._got_ending = False
+        self._conf = conf
+        self._dataqueue = queue.LightQueue()
+        # Register here, before the call is sent, so no reply is missed
+        self._reply_proxy.add_call_waiter(self, self._msg_id)
+
+    def put(self, data):
+        self._dataqueue.put(data)
+
+    def done(self):
+        if self._done:
+            return
+        self._done = True
+        self._reply_proxy.del_call_waiter(self._msg_id)
+
+    def _process_data(self, data):
+        result = None
+        if data['failure']:
+            failure = data['failure']
+            result = rpc_common.deserialize_remote_exception(self._conf,
+                                                             failure)
+        elif data.get('ending', False):
+            self._got_ending = True
+        else:
+            result = data['result']
+        return result
+
+    def __iter__(self):
+        """Return a result until we get a reply with an 'ending' flag"""
+        if self._done:
+            raise StopIteration
+        while True:
+            try:
+                data = self._dataqueue.get(timeout=self._timeout)
+            except queue.Empty:
+                self.done()
+                raise rpc_common.Timeout()
+            result = self._process_data(data)
+            if self._got_ending:
+                self.done()
+                raise StopIteration
+            if isinstance(result, Exception):
+                self.done()
+                raise result
+            yield result
+
+
 def create_connection(conf, new, connection_pool):
     """Create a connection"""
     return ConnectionContext(conf, connection_pool, pooled=not new)
@@ -341,6 +461,21 @@ def multicall(conf, context, topic, msg, timeout, connection_pool):
     LOG.debug(_('MSG_ID is %s') % (msg_id))
     pack_context(msg, context)
 
+    if conf.amqp_rpc_single_reply_queue:
+        # NOTE: replies arrive on the long-lived reply queue, so the call
+        # costs a single publish instead of a queue declare and delete.
+        reply_proxy = get_reply_proxy(conf, connection_pool)
+        msg.update({'_reply_q': reply_proxy.reply_q})
+        wait_msg = MulticallProxyWaiter(conf, msg_id, timeout,
+                                        connection_pool)
+        try:
+            with ConnectionContext(conf, connection_pool) as conn:
+                conn.topic_send(topic, msg)
+        except Exception:
+            with utils.save_and_reraise_exception():
+                wait_msg.done()
+        return wait_msg
+
     conn = ConnectionContext(conf, connection_pool)
     wait_msg = MulticallWaiter(conf, conn, timeout)
     conn.declare_direct_consumer(msg_id, wait_msg)
@@ -366,6 +501,15 @@ def cast(conf, context, topic, msg, connection_pool):
         conn.topic_send(topic, msg)
 
 
+def cast_many(conf, context, msgs, connection_pool):
+    """Sends (topic, msg) pairs without waiting for responses."""
+    LOG.debug(_('Making %d asynchronous casts...'), len(msgs))
+    with ConnectionContext(conf, connection_pool) as conn:
+        for topic, msg in msgs:
+            pack_context(msg, context)
+            conn.topic_send(topic, msg)
+
+
 def fanout_cast(conf, context, topic, msg, connection_pool):
     """Sends a message on a fanout exchange without waiting for a response."""
     LOG.debug(_('Making asynchronous fanout cast...'))
@@ -400,6 +544,15 @@ def notify(conf, context, topic, msg, connection_pool):
         conn.notify_send(topic, msg)
 
 
+def notify_many(conf, context, msgs, connection_pool):
+    """Sends (topic, msg) notification events over one connection."""
+    LOG.debug(_('Sending %d notifications'), len(msgs))
+    with ConnectionContext(conf, connection_pool) as conn:
+        for topic, msg in msgs:
+            pack_context(msg, context)
+            conn.notify_send(topic, msg)
+
+
 def cleanup(connection_pool):
     if connection_pool:
         connection_pool.empty()
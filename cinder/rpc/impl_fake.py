@@ -158,10 +158,20 @@ def cast(conf, context, topic, msg):
         pass
 
 
+def cast_many(conf, context, msgs):
+    for topic, msg in msgs:
+        cast(conf, context, topic, msg)
+
+
 def notify(conf, context, topic, msg):
     check_serialize(msg)
 
 
+def notify_many(conf, context, msgs):
+    for topic, msg in msgs:
+        notify(conf, context, topic, msg)
+
+
 def cleanup():
     pass
 
@@ -330,6 +330,7 @@ class Connection(object):
 
     def __init__(self, conf, server_params=None):
         self.consumers = []
+        self.publishers = {}
         self.consumer_thread = None
         self.conf = conf
         self.max_retries = self.conf.rabbit_max_retries
@@ -422,6 +423,8 @@ class Connection(object):
         self.consumer_num = itertools.count(1)
         self.connection.connect()
         self.channel = self.connection.channel()
+        # Cached producers belong to the old channel
+        self.publishers = {}
         # work around 'memory' transport bug in 1.1.3
         if self.memory_transport:
             self.channel._new_queue('ae.undeliver')
@@ -516,12 +519,17 @@ class Connection(object):
     def reset(self):
         """Reset a connection so it can be used again"""
         self.cancel_consumer_thread()
+        if not self.consumers:
+            # NOTE: a channel only used to publish has nothing to clean
+            # up, and keeping it keeps its cached producers.
+            return
         self.channel.close()
         self.channel = self.connection.channel()
         # work around 'memory' transport bug in 1.1.3
         if self.memory_transport:
             self.channel._new_queue('ae.undeliver')
         self.consumers = []
+        self.publishers = {}
 
     def declare_consumer(self, consumer_cls, topic, callback):
         """Create a Consumer using the class that was passed in and
@@ -590,7 +598,15 @@ class Connection(object):
                 "'%(topic)s': %(err_str)s") % log_info)
 
         def _publish():
-            publisher = cls(self.conf, self.channel, topic, **kwargs)
+            key = (cls, topic, tuple(sorted(kwargs.items())))
+            publisher = self.publishers.get(key)
+            if publisher is None:
+                publisher = cls(self.conf, self.channel, topic, **kwargs)
+                # NOTE: only cache producers for exchanges that outlive
+                # their consumers; publishing to an auto-deleted exchange
+                # that is gone would close the channel.
+                if not publisher.kwargs.get('auto_delete'):
+                    self.publishers[key] = publisher
             publisher.send(msg)
 
         self.ensure(_error_callback, _publish)
@@ -681,6 +697,12 @@ def cast(conf, context, topic, msg):
             rpc_amqp.get_connection_pool(conf, Connection))
 
 
+def cast_many(conf, context, msgs):
+    """Sends (topic, msg) pairs without waiting for responses."""
+    return rpc_amqp.cast_many(conf, context, msgs,
+            rpc_amqp.get_connection_pool(conf, Connection))
+
+
 def fanout_cast(conf, context, topic, msg):
     """Sends a message on a fanout exchange without waiting for a response."""
     return rpc_amqp.fanout_cast(conf, context, topic, msg,
@@ -705,6 +727,12 @@ def notify(conf, context, topic, msg):
             rpc_amqp.get_connection_pool(conf, Connection))
 
 
+def notify_many(conf, context, msgs):
+    """Sends (topic, msg) notification events."""
+    return rpc_amqp.notify_many(conf, context, msgs,
+            rpc_amqp.get_connection_pool(conf, Connection))
+
+
 def cleanup():
     return rpc_amqp.cleanup(Connection.pool)
 
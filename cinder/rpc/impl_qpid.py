@@ -531,6 +531,12 @@ def cast(conf, context, topic, msg):
             rpc_amqp.get_connection_pool(conf, Connection))
 
 
+def cast_many(conf, context, msgs):
+    """Sends (topic, msg) pairs without waiting for responses."""
+    return rpc_amqp.cast_many(conf, context, msgs,
+            rpc_amqp.get_connection_pool(conf, Connection))
+
+
 def fanout_cast(conf, context, topic, msg):
     """Sends a message on a fanout exchange without waiting for a response."""
     return rpc_amqp.fanout_cast(conf, context, topic, msg,
@@ -555,6 +561,12 @@ def notify(conf, context, topic, msg):
             rpc_amqp.get_connection_pool(conf, Connection))
 
 
+def notify_many(conf, context, msgs):
+    """Sends (topic, msg) notification events."""
+    return rpc_amqp.notify_many(conf, context, msgs,
+            rpc_amqp.get_connection_pool(conf, Connection))
+
+
 def cleanup():
     return rpc_amqp.cleanup(Connection.pool)
 
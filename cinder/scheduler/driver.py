@@ -58,6 +58,28 @@ def cast_to_volume_host(context, host, method, update_db=True, **kwargs):
     LOG.debug(_("Casted '%(method)s' to host '%(host)s'") % locals())
 
 
+def cast_to_volume_hosts(context, method, casts, update_db=True):
+    """Cast the same method to volume hosts in one batch.
+
+    casts is a list of (host, kwargs) pairs; all the messages are
+    published over a single rpc connection.
+    """
+
+    now = utils.utcnow()
+    msgs = []
+    for host, kwargs in casts:
+        if update_db:
+            volume_id = kwargs.get('volume_id', None)
+            if volume_id is not None:
+                db.volume_update(context, volume_id,
+                        {'host': host, 'scheduled_at': now})
+        msgs.append((db.queue_get_for(context, FLAGS.volume_topic, host),
+                     {"method": method, "args": kwargs}))
+    rpc.cast_many(context, msgs)
+    LOG.debug(_("Casted '%(method)s' to %(count)d volume hosts") %
+              {'method': method, 'count': len(msgs)})
+
+
 def cast_to_host(context, topic, host, method, update_db=True, **kwargs):
     """Generic cast to host"""
 
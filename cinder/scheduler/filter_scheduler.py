@@ -0,0 +1,259 @@
+# Copyright (c) 2011 OpenStack, LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+The FilterScheduler is for creating volumes.
+You can customize this scheduler by specifying your own Host Filters and
+Weighing Functions.
+"""
+
+import copy
+
+from cinder import db
+from cinder import exception
+from cinder import flags
+from cinder import log as logging
+from cinder.openstack.common import cfg
+from cinder.openstack.common import exception as common_exception
+from cinder.openstack.common import importutils
+from cinder.scheduler import driver
+from cinder.scheduler import least_cost
+
+
+filter_scheduler_opts = [
+    cfg.IntOpt('scheduler_max_attempts',
+               default=3,
+               help='Maximum number of attempts to schedule a volume'),
+    ]
+
+FLAGS = flags.FLAGS
+FLAGS.register_opts(filter_scheduler_opts)
+
+LOG = logging.getLogger(__name__)
+
+
+class FilterScheduler(driver.Scheduler):
+    """Scheduler that can be used for filtering and weighing."""
+    def __init__(self, *args, **kwargs):
+        super(FilterScheduler, self).__init__(*args, **kwargs)
+        self.cost_function_cache = {}
+
+    def schedule(self, context, topic, method, *args, **kwargs):
+        """The schedule() contract requires we return the one
+        best-suited host for this request.
+
+        NOTE: We're only focused on volumes right now, so this
+        method will always raise NoValidHost()."""
+        msg = _("No host selection for %s defined.") % topic
+        raise exception.NoValidHost(reason=msg)
+
+    def schedule_create_volume(self, context, volume_id, snapshot_id=None,
+                               request_spec=None, filter_properties=None,
+                               **_kwargs):
+        """Picks the best host for a volume and casts create_volume
+        to it."""
+        self.schedule_create_volumes(context, [volume_id],
+                                     snapshot_id=snapshot_id,
+                                     request_spec=request_spec,
+                                     filter_properties=filter_properties)
+
+    def schedule_create_volumes(self, context, volume_ids, snapshot_id=None,
+                                request_spec=None, filter_properties=None,
+                                **_kwargs):
+        """Picks the best host for each volume in a batch of identical
+        volumes and casts create_volume to it.
+
+        The host states are read once and every placement is consumed
+        from them, so later volumes in the batch see the capacity taken
+        by earlier ones.  Either every volume gets a host or NoValidHost
+        is raised and nothing is cast.
+        """
+        elevated = context.elevated()
+        volume_ref = db.volume_get(context, volume_ids[0])
+        if request_spec is None:
+            request_spec = self._build_request_spec(elevated, volume_ref)
+        if filter_properties is None:
+            filter_properties = {}
+
+        volume_properties = request_spec['volume_properties']
+        availability_zone = volume_properties.get('availability_zone')
+        if availability_zone and ':' in availability_zone:
+            zone, _x, host = availability_zone.partition(':')
+            volume_properties['availability_zone'] = zone
+            if context.is_admin:
+                filter_properties['force_hosts'] = [host]
+
+        topic = FLAGS.volume_topic
+        cost_functions = self.get_cost_functions(topic)
+        hosts = self.host_manager.get_all_host_states(elevated, topic)
+
+        placements = []
+        for volume_id in volume_ids:
+            volume_filter_properties = copy.deepcopy(filter_properties)
+            self._populate_retry(volume_filter_properties, {'id': volume_id})
+            weighted_host = self._choose_host(hosts, cost_functions,
+                                              request_spec,
+                                              volume_filter_properties)
+            if not weighted_host:
+                msg = _("No host has enough capacity or matches the "
+                        "requested volume type")
+                raise exception.NoValidHost(reason=msg)
+
+            host_state = weighted_host.host_state
+            self._add_retry_host(volume_filter_properties, host_state.host)
+            # NOTE: consume now so the next request sees the reduced
+            # capacity without waiting for the volume service to report it.
+            host_state.consume_from_volume(volume_properties)
+            placements.append((volume_id, host_state.host,
+                               volume_filter_properties))
+
+        driver.cast_to_volume_hosts(context, 'create_volume',
+                [(host, {'volume_id': volume_id,
+                         'snapshot_id': snapshot_id,
+                         'request_spec': request_spec,
+                         'filter_properties': volume_filter_properties})
+                 for volume_id, host, volume_filter_properties in placements])
+
+    def _build_request_spec(self, context, volume_ref):
+        volume_type = None
+        if volume_ref['volume_type_id']:
+            volume_type = db.volume_type_get(context,
+                                             volume_ref['volume_type_id'])
+        volume_properties = {
+            'size': volume_ref['size'],
+            'availability_zone': volume_ref['availability_zone'],
+            'volume_type_id': volume_ref['volume_type_id'],
+            }
+        return {'volume_properties': volume_properties,
+                'volume_type': volume_type}
+
+    def _max_attempts(self):
+        max_attempts = FLAGS.scheduler_max_attempts
+        if max_attempts < 1:
+            msg = _("Invalid value for 'scheduler_max_attempts', "
+                    "must be >= 1")
+            raise exception.InvalidParameterValue(err=msg)
+        return max_attempts
+
+    def _populate_retry(self, filter_properties, volume_ref):
+        """Populate filter properties with history of retries for this
+        request. If maximum retries is exceeded, raise NoValidHost.
+        """
+        max_attempts = self._max_attempts()
+        retry = filter_properties.pop('retry', {})
+
+        if max_attempts == 1:
+            # re-scheduling is disabled.
+            return
+
+        # retry is enabled, update attempt count:
+        if retry:
+            retry['num_attempts'] += 1
+        else:
+            retry = {
+                'num_attempts': 1,
+                'hosts': []  # list of volume service hosts tried
+            }
+        filter_properties['retry'] = retry
+
+        if retry['num_attempts'] > max_attempts:
+            volume_id = volume_ref['id']
+            msg = _("Exceeded max scheduling attempts %(max_attempts)d for "
+                    "volume %(volume_id)s") % locals()
+            raise exception.NoValidHost(reason=msg)
+
+    def _add_retry_host(self, filter_properties, host):
+        """Add a retry entry for the selected volume host. In the event that
+        the request gets re-scheduled, this entry will signal that the given
+        host has already been tried.
+        """
+        retry = filter_properties.get('retry', None)
+        if not retry:
+            return
+        hosts = retry['hosts']
+        hosts.append(host)
+
+    def _schedule(self, elevated, topic, request_spec, filter_properties):
+        """Returns the WeightedHost with the lowest cost among the hosts
+        that pass the filters, or None.
+        """
+        cost_functions = self.get_cost_functions(topic)
+        hosts = self.host_manager.get_all_host_states(elevated, topic)
+        return self._choose_host(hosts, cost_functions, request_spec,
+                                 filter_properties)
+
+    def _choose_host(self, hosts, cost_functions, request_spec,
+                     filter_properties):
+        """Returns the WeightedHost with the lowest cost among the given
+        hosts that pass the filters, or None.
+        """
+        filter_properties.update({'request_spec': request_spec,
+                                  'volume_type': request_spec.get(
+                                      'volume_type')})
+
+        # Filter local hosts based on requirements ...
+        hosts = self.host_manager.filter_hosts(hosts, filter_properties)
+        if not hosts:
+            return None
+
+        LOG.debug(_("Filtered %(hosts)s") % locals())
+
+        # weighted_host = WeightedHost() ... the best
+        # host for the job.
+        weighted_host = least_cost.weighted_sum(cost_functions, hosts,
+                                                filter_properties)
+        LOG.debug(_("Weighted %(weighted_host)s") % locals())
+        return weighted_host
+
+    def get_cost_functions(self, topic=None):
+        """Returns a list of tuples containing weights and cost functions to
+        use for weighing hosts
+        """
+        if topic is None:
+            topic = FLAGS.volume_topic
+        if topic in self.cost_function_cache:
+            return self.cost_function_cache[topic]
+
+        cost_fns = []
+        for cost_fn_str in FLAGS.least_cost_functions:
+            if '.' in cost_fn_str:
+                short_name = cost_fn_str.split('.')[-1]
+            else:
+                short_name = cost_fn_str
+                cost_fn_str = "%s.%s.%s" % (
+                        __name__, self.__class__.__name__, short_name)
+            if not (short_name.startswith('volume_') or
+                    short_name.startswith('noop')):
+                continue
+
+            try:
+                # NOTE: import_class is somewhat misnamed since
+                # the weighing function can be any non-class callable
+                # (i.e., no 'self')
+                cost_fn = importutils.import_class(cost_fn_str)
+            except common_exception.NotFound:
+                raise exception.SchedulerCostFunctionNotFound(
+                        cost_fn_str=cost_fn_str)
+
+            try:
+                flag_name = "%s_weight" % cost_fn.__name__
+                weight = getattr(FLAGS, flag_name)
+            except AttributeError:
+                raise exception.SchedulerWeightFlagNotFound(
+                        flag_name=flag_name)
+            cost_fns.append((weight, cost_fn))
+
+        self.cost_function_cache[topic] = cost_fns
+        return cost_fns
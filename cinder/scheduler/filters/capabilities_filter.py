@@ -0,0 +1,53 @@
+# Copyright (c) 2011 OpenStack, LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from cinder import log as logging
+from cinder.scheduler import filters
+from cinder.scheduler.filters import extra_specs_ops
+
+
+LOG = logging.getLogger(__name__)
+
+
+class CapabilitiesFilter(filters.BaseHostFilter):
+    """HostFilter to work with volume type extra_specs.
+
+    Every extra spec of the requested volume type must be satisfied by
+    the capabilities the host last reported.  Values may use the
+    operators understood by extra_specs_ops, e.g. '>= 10' or '<in> ssd'.
+    """
+
+    def _satisfies_extra_specs(self, capabilities, volume_type):
+        if 'extra_specs' not in volume_type:
+            return True
+
+        for key, req in volume_type['extra_specs'].iteritems():
+            cap = capabilities.get(key, None)
+            if not extra_specs_ops.match(cap, req):
+                return False
+        return True
+
+    def host_passes(self, host_state, filter_properties):
+        """Return a list of hosts that can create volume_type."""
+        volume_type = filter_properties.get('volume_type')
+        if not volume_type:
+            return True
+
+        if not self._satisfies_extra_specs(host_state.capabilities,
+                                           volume_type):
+            LOG.debug(_("%(host_state)s fails volume type extra_specs "
+                        "requirements"), locals())
+            return False
+        return True
@@ -0,0 +1,62 @@
+# Copyright (c) 2012 OpenStack, LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from cinder import flags
+from cinder import log as logging
+from cinder.openstack.common import cfg
+from cinder.scheduler import filters
+
+
+LOG = logging.getLogger(__name__)
+
+capacity_filter_opts = [
+    cfg.IntOpt('reserved_host_capacity_gb',
+               default=0,
+               help='Amount of reported free capacity in GB to keep '
+                    'unallocated on each volume host'),
+    ]
+
+FLAGS = flags.FLAGS
+FLAGS.register_opts(capacity_filter_opts)
+flags.DECLARE('max_gigabytes', 'cinder.scheduler.simple')
+
+
+class CapacityFilter(filters.BaseHostFilter):
+    """Only return hosts with enough capacity for the requested volume.
+
+    Hosts that do not report their free capacity are only checked
+    against the max_gigabytes allocation limit.
+    """
+
+    def host_passes(self, host_state, filter_properties):
+        spec = filter_properties.get('request_spec', {})
+        volume_size = spec.get('volume_properties', {}).get('size', 0)
+
+        allocated = host_state.allocated_capacity_gb + volume_size
+        if allocated > FLAGS.max_gigabytes:
+            LOG.debug(_("%(host_state)s would exceed max_gigabytes "
+                        "(%(allocated)s GB allocated)"), locals())
+            return False
+
+        free_capacity_gb = host_state.free_capacity_gb
+        if free_capacity_gb is None:
+            return True
+        usable_capacity_gb = free_capacity_gb - FLAGS.reserved_host_capacity_gb
+        if usable_capacity_gb < volume_size:
+            LOG.debug(_("%(host_state)s does not have %(volume_size)d GB "
+                        "usable capacity, it only has "
+                        "%(usable_capacity_gb)s GB."), locals())
+            return False
+        return True
@@ -17,20 +17,307 @@
 Manage hosts in the current zone.
 """
 
-# FIXME(ja): this code was written only for compute. re-implement for volumes
+from cinder import db
+from cinder import exception
+from cinder import flags
+from cinder import log as logging
+from cinder.openstack.common import cfg
+from cinder.openstack.common import importutils
+from cinder.scheduler import filters
+from cinder import utils
+
+
+host_manager_opts = [
+    cfg.MultiStrOpt('scheduler_available_filters',
+            default=['cinder.scheduler.filters.standard_filters'],
+            help='Filter classes available to the scheduler which may '
+                    'be specified more than once.  An entry of '
+                    '"cinder.scheduler.filters.standard_filters" '
+                    'maps to all filters included with cinder.'),
+    cfg.ListOpt('scheduler_default_filters',
+                default=[
+                  'AvailabilityZoneFilter',
+                  'CapacityFilter',
+                  'CapabilitiesFilter',
+                  'RetryFilter',
+                  ],
+                help='Which filter class names to use for filtering hosts '
+                      'when not specified in the request.'),
+    cfg.IntOpt('scheduler_host_usage_sync_interval',
+               default=60,
+               help='Number of seconds between refreshes of the per-host '
+                    'allocated capacity and volume count from the database. '
+                    'In between, usage is tracked in memory from the '
+                    'placements made by this scheduler'),
+    ]
+
+FLAGS = flags.FLAGS
+FLAGS.register_opts(host_manager_opts)
+
+LOG = logging.getLogger(__name__)
 
 
 class HostState(object):
-    pass
+    """Mutable and immutable information tracked for a volume host.
+
+    Capacity figures come from the capabilities the volume service
+    publishes; allocated capacity and volume count are seeded from the
+    database and adjusted as volumes are placed on the host.
+    """
+
+    def __init__(self, host, topic, capabilities=None, service=None):
+        self.host = host
+        self.topic = topic
+
+        # Mutable available resources.
+        # These will change as resources are virtually "consumed".
+        # None means the backend did not report the value.
+        self.total_capacity_gb = None
+        self.free_capacity_gb = None
+        self.allocated_capacity_gb = 0
+        self.volume_count = 0
+
+        self.updated = None
+
+        self.update_capabilities(topic, capabilities, service)
+
+    def update_capabilities(self, topic, capabilities=None, service=None):
+        if capabilities is None:
+            capabilities = {}
+        self.capabilities = capabilities.get(topic, None) or {}
+        if service is None:
+            service = {}
+        self.service = service
+
+    def update_from_volume_capability(self, capability):
+        """Update capacity information from a volume service report."""
+        if not capability:
+            return
+
+        if 'total_capacity_gb' in capability:
+            self.total_capacity_gb = capability['total_capacity_gb']
+        if 'free_capacity_gb' in capability:
+            self.free_capacity_gb = capability['free_capacity_gb']
+        self.updated = capability.get('timestamp', utils.utcnow())
+
+    def passes_filters(self, filter_fns, filter_properties):
+        """Return whether or not this host passes filters."""
+
+        if self.host in filter_properties.get('ignore_hosts', []):
+            LOG.debug(_('Host filter fails for ignored host %(host)s'),
+                      {'host': self.host})
+            return False
+
+        force_hosts = filter_properties.get('force_hosts', [])
+        if force_hosts:
+            if not self.host in force_hosts:
+                LOG.debug(_('Host filter fails for non-forced host %(host)s'),
+                          {'host': self.host})
+            return self.host in force_hosts
+
+        for filter_fn in filter_fns:
+            if not filter_fn(self, filter_properties):
+                LOG.debug(_('Host filter function %(func)s failed for '
+                            '%(host)s'),
+                          {'func': repr(filter_fn),
+                           'host': self.host})
+                return False
+
+        LOG.debug(_('Host filter passes for %(host)s'), {'host': self.host})
+        return True
+
+    def update_from_usage(self, volume_count, allocated_capacity_gb):
+        """Reset usage counters to the figures stored in the database."""
+        self.volume_count = volume_count
+        self.allocated_capacity_gb = allocated_capacity_gb
+
+    def consume_from_volume(self, volume):
+        """Incrementally update host state from a volume placement."""
+        size = volume['size']
+        self.allocated_capacity_gb += size
+        self.volume_count += 1
+        if self.free_capacity_gb is not None:
+            self.free_capacity_gb -= size
+        self.updated = utils.utcnow()
+
+    def __repr__(self):
+        return ("host '%s': allocated_capacity_gb: %s, free_capacity_gb: %s, "
+                "volume_count: %s" % (self.host, self.allocated_capacity_gb,
+                                      self.free_capacity_gb,
+                                      self.volume_count))
 
 
 class HostManager(object):
+    """Base HostManager class."""
+
+    # Can be overriden in a subclass
+    host_state_cls = HostState
+
+    def __init__(self):
+        # { <host> : { <service> : { cap k : v }}}
+        self.service_states = {}
+        # { <host> : HostState }
+        self.host_state_map = {}
+        self.usage_last_synced = None
+        self.filter_classes = self._get_filter_classes()
+        # { (<filter name>, ...) : [<host_passes>, ...] }
+        self.filter_fns_cache = {}
+
+    def _get_filter_classes(self):
+        """Get the list of possible filter classes"""
+        filter_classes = []
+        for item in FLAGS.scheduler_available_filters:
+            obj = importutils.import_class(item)
+            if filters._is_filter_class(obj):
+                filter_classes.append(obj)
+            else:
+                # Assume function that returns a list of filter classes
+                filter_classes.extend(obj())
+        return filter_classes
+
+    def _choose_host_filters(self, filters):
+        """Since the caller may specify which filters to use we need
+        to have an authoritative list of what is permissible. This
+        function checks the filter names against a predefined set
+        of acceptable filters.
+        """
+        if filters is None:
+            filters = FLAGS.scheduler_default_filters
+        if not isinstance(filters, (list, tuple)):
+            filters = [filters]
+        cache_key = tuple(filters)
+        if cache_key in self.filter_fns_cache:
+            return self.filter_fns_cache[cache_key]
+
+        good_filters = []
+        bad_filters = []
+        for filter_name in filters:
+            found_class = False
+            for cls in self.filter_classes:
+                if cls.__name__ == filter_name:
+                    found_class = True
+                    filter_instance = cls()
+                    # Get the filter function
+                    filter_func = getattr(filter_instance,
+                            'host_passes', None)
+                    if filter_func:
+                        good_filters.append(filter_func)
+                    break
+            if not found_class:
+                bad_filters.append(filter_name)
+        if bad_filters:
+            msg = ", ".join(bad_filters)
+            raise exception.SchedulerHostFilterNotFound(filter_name=msg)
+        self.filter_fns_cache[cache_key] = good_filters
+        return good_filters
+
+    def filter_hosts(self, hosts, filter_properties, filters=None):
+        """Filter hosts and return only ones passing all filters"""
+        filtered_hosts = []
+        filter_fns = self._choose_host_filters(filters)
+        for host in hosts:
+            if host.passes_filters(filter_fns, filter_properties):
+                filtered_hosts.append(host)
+        return filtered_hosts
+
+    def get_host_list(self):
+        """Returns a list of dicts for each host that the HostManager
+        knows about. Each dict contains the host_name and the service
+        for that host.
+        """
+        ret = []
+        for host, host_dict in self.service_states.iteritems():
+            for service_name in host_dict:
+                ret.append({"service": service_name, "host_name": host})
+        return ret
+
+    def get_service_capabilities(self):
+        """Returns the last capabilities reported by each host."""
+        return dict((host, dict(host_dict))
+                    for host, host_dict in self.service_states.iteritems())
+
+    def update_service_capabilities(self, service_name, host, capabilities):
+        """Update the per-service capabilities based on this notification."""
+        if service_name != 'volume':
+            LOG.debug(_('Ignoring %(service_name)s service update '
+                        'from %(host)s'), locals())
+            return
+
+        LOG.debug(_("Received %(service_name)s service update from "
+                    "%(host)s.") % locals())
+        service_caps = self.service_states.get(host, {})
+        # Copy the capabilities, so we don't modify the original dict
+        capab_copy = dict(capabilities)
+        capab_copy["timestamp"] = utils.utcnow()  # Reported time
+        service_caps[service_name] = capab_copy
+        self.service_states[host] = service_caps
+
+        host_state = self.host_state_map.get(host)
+        if host_state:
+            host_state.update_capabilities(service_name, service_caps,
+                                           host_state.service)
+            host_state.update_from_volume_capability(capab_copy)
+
+    def _sync_usage(self, context):
+        """Reload allocated capacity and volume counts from the database.
+
+        Only runs when the in-memory figures are older than
+        scheduler_host_usage_sync_interval, so the aggregate query is
+        paid once per interval rather than once per request.
+        """
+        now = utils.utcnow()
+        if (self.usage_last_synced is not None and
+            utils.total_seconds(now - self.usage_last_synced) <
+                FLAGS.scheduler_host_usage_sync_interval):
+            return
+
+        usage = db.volume_data_get_for_hosts(context)
+        for host, host_state in self.host_state_map.iteritems():
+            volume_count, gigabytes = usage.get(host, (0, 0))
+            host_state.update_from_usage(volume_count, gigabytes)
+        self.usage_last_synced = now
+
+    def get_all_host_states(self, context, topic=None):
+        """Returns the list of HostStates for every up and enabled
+        volume service, refreshed from the in-memory capability cache.
+
+        The returned HostState objects are owned by the HostManager, so
+        consuming from them is remembered for later requests.
+        """
+        if topic is None:
+            topic = FLAGS.volume_topic
+
+        services = db.service_get_all_by_topic(context, topic)
+        active_hosts = set()
+        new_hosts = False
+        for service in services:
+            host = service['host']
+            active_hosts.add(host)
+            capabilities = self.service_states.get(host, None)
+            host_state = self.host_state_map.get(host)
+            if host_state:
+                host_state.update_capabilities('volume', capabilities,
+                                               dict(service.iteritems()))
+            else:
+                host_state = self.host_state_cls(host, 'volume',
+                        capabilities=capabilities,
+                        service=dict(service.iteritems()))
+                if capabilities:
+                    host_state.update_from_volume_capability(
+                            capabilities.get('volume'))
+                self.host_state_map[host] = host_state
+                new_hosts = True
 
-    def get_host_list(self, *args):
-        pass
+        for host in self.host_state_map.keys():
+            if host not in active_hosts:
+                LOG.debug(_("Removing non-active host %s from scheduler "
+                            "cache"), host)
+                del self.host_state_map[host]
 
-    def update_service_capabilities(self, *args):
-        pass
+        if new_hosts:
+            # NOTE: newly seen hosts have no usage figures yet.
+            self.usage_last_synced = None
+        self._sync_usage(context)
 
-    def get_service_capabilities(self, *args):
-        pass
+        return [host_state for host_state in self.host_state_map.values()
+                if utils.service_is_up(host_state.service)]
@@ -0,0 +1,139 @@
+# Copyright (c) 2011 OpenStack, LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Least Cost is an algorithm for choosing which host to place a volume on.
+
+Each cost function is multiplied by its weight (the flag named
+<cost function name>_weight) and the host with the lowest weighted sum
+wins.  Cost functions for volumes are prefixed with 'volume_'.
+"""
+
+from cinder import flags
+from cinder import log as logging
+from cinder.openstack.common import cfg
+
+
+LOG = logging.getLogger(__name__)
+
+least_cost_opts = [
+    cfg.ListOpt('least_cost_functions',
+            default=[
+              'cinder.scheduler.least_cost.volume_free_capacity_cost_fn'
+            ],
+            help='Which cost functions the FilterScheduler should use'),
+    cfg.FloatOpt('noop_cost_fn_weight',
+             default=1.0,
+               help='How much weight to give the noop cost function'),
+    cfg.FloatOpt('volume_free_capacity_cost_fn_weight',
+             default=-1.0,
+               help='How much weight to give the free capacity cost '
+                    'function. The default of -1.0 spreads volumes onto '
+                    'the hosts with the most free space; a positive value '
+                    'fills hosts up first'),
+    cfg.FloatOpt('volume_allocated_ratio_cost_fn_weight',
+             default=1.0,
+               help='How much weight to give the allocated ratio cost '
+                    'function, which prefers hosts with the smallest '
+                    'share of their capacity allocated'),
+    cfg.FloatOpt('volume_count_cost_fn_weight',
+             default=1.0,
+               help='How much weight to give the volume count cost '
+                    'function, which prefers hosts with fewer volumes'),
+    ]
+
+FLAGS = flags.FLAGS
+FLAGS.register_opts(least_cost_opts)
+
+
+class WeightedHost(object):
+    """Reduced set of information about a host that has been weighed.
+    This is an attempt to remove some of the ad-hoc dict structures
+    previously used."""
+
+    def __init__(self, weight, host_state=None):
+        self.weight = weight
+        self.host_state = host_state
+
+    def to_dict(self):
+        x = dict(weight=self.weight)
+        if self.host_state:
+            x['host'] = self.host_state.host
+        return x
+
+    def __repr__(self):
+        if self.host_state:
+            return "WeightedHost host: %s" % self.host_state.host
+        return "WeightedHost with no host_state"
+
+
+def _numeric(value):
+    """Capacity reported as None, 'unknown' or 'infinite' weighs as 0."""
+    if isinstance(value, (int, long, float)):
+        return value
+    return 0
+
+
+def noop_cost_fn(host_state, weighing_properties):
+    """Return a pre-weight cost of 1 for each host"""
+    return 1
+
+
+def volume_free_capacity_cost_fn(host_state, weighing_properties):
+    """More free capacity = higher cost. So hosts with less free space
+    will be preferred.
+
+    Note: the weight for this function in default configuration
+    is -1.0. With a -1.0 this function runs in reverse, so hosts
+    with the most free capacity will be preferred.
+    """
+    return _numeric(host_state.free_capacity_gb)
+
+
+def volume_allocated_ratio_cost_fn(host_state, weighing_properties):
+    """Fraction of the host's reported capacity already allocated."""
+    total_capacity_gb = _numeric(host_state.total_capacity_gb)
+    if not total_capacity_gb:
+        return 0
+    return float(host_state.allocated_capacity_gb) / total_capacity_gb
+
+
+def volume_count_cost_fn(host_state, weighing_properties):
+    """Number of volumes already placed on the host."""
+    return host_state.volume_count
+
+
+def weighted_sum(weighted_fns, host_states, weighing_properties):
+    """Use the weighted-sum method to compute a score for an array of objects.
+
+    :param host_states:  list of HostState objects
+    :param weighted_fns: list of weights and functions like::
+
+        [(weight, objective-functions), ...]
+
+    :param weighing_properties: an arbitrary dict of values that can
+        influence weights.
+
+    :returns: a single WeightedHost object which represents the best
+              candidate.
+    """
+
+    min_score, best_host = None, None
+    for host_state in host_states:
+        score = sum(weight * fn(host_state, weighing_properties)
+                    for weight, fn in weighted_fns)
+        if min_score is None or score < min_score:
+            min_score, best_host = score, host_state
+
+    return WeightedHost(min_score, host_state=best_host)
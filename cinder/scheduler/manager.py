@@ -21,6 +21,7 @@
 Scheduler Service
 """
 
+import copy
 import functools
 
 from cinder import db
@@ -31,6 +32,7 @@ from cinder import manager
 from cinder.notifier import api as notifier
 from cinder.openstack.common import cfg
 from cinder.openstack.common import importutils
+from cinder import quota
 from cinder import utils
 
 
@@ -57,6 +59,10 @@ class SchedulerManager(manager.Manager):
         """Converts all method calls to use the schedule method"""
         return functools.partial(self._schedule, key)
 
+    @manager.periodic_task
+    def _expire_reservations(self, context):
+        quota.expire(context)
+
     def get_host_list(self, context):
         """Get a list of hosts from the HostManager."""
         return self.driver.get_host_list()
@@ -96,6 +102,83 @@ class SchedulerManager(manager.Manager):
                                              {'vm_state': vm_states.ERROR},
                                              context, ex, *args, **kwargs)
 
+    def create_volume(self, context, topic, volume_id, snapshot_id=None,
+                      request_spec=None, filter_properties=None):
+        """Tries to call schedule_create_volume on the driver.
+        Sets volume status to error on exceptions
+        """
+        if not hasattr(self.driver, 'schedule_create_volume'):
+            return self._schedule('create_volume', context, topic,
+                    volume_id=volume_id, snapshot_id=snapshot_id,
+                    request_spec=request_spec,
+                    filter_properties=filter_properties)
+        try:
+            return self.driver.schedule_create_volume(context, volume_id,
+                    snapshot_id=snapshot_id, request_spec=request_spec,
+                    filter_properties=filter_properties)
+        except exception.NoValidHost as ex:
+            # don't reraise
+            self._set_volume_state_and_notify('create_volume',
+                                              {'status': 'error'},
+                                              context, ex, volume_id,
+                                              request_spec)
+        except Exception as ex:
+            with utils.save_and_reraise_exception():
+                self._set_volume_state_and_notify('create_volume',
+                                                  {'status': 'error'},
+                                                  context, ex, volume_id,
+                                                  request_spec)
+
+    def create_volumes(self, context, topic, volume_ids, snapshot_id=None,
+                       request_spec=None, filter_properties=None):
+        """Tries to place a batch of identical volumes in one pass with
+        schedule_create_volumes on the driver, falling back to one
+        create_volume per volume.  Sets the volumes' status to error if
+        the batch can't be placed.
+        """
+        if not hasattr(self.driver, 'schedule_create_volumes'):
+            for volume_id in volume_ids:
+                self.create_volume(context, topic, volume_id,
+                        snapshot_id=snapshot_id,
+                        request_spec=copy.deepcopy(request_spec),
+                        filter_properties=copy.deepcopy(filter_properties))
+            return
+        try:
+            return self.driver.schedule_create_volumes(context, volume_ids,
+                    snapshot_id=snapshot_id, request_spec=request_spec,
+                    filter_properties=filter_properties)
+        except exception.NoValidHost as ex:
+            # don't reraise
+            for volume_id in volume_ids:
+                self._set_volume_state_and_notify('create_volume',
+                                                  {'status': 'error'},
+                                                  context, ex, volume_id,
+                                                  request_spec)
+        except Exception as ex:
+            with utils.save_and_reraise_exception():
+                for volume_id in volume_ids:
+                    self._set_volume_state_and_notify('create_volume',
+                                                      {'status': 'error'},
+                                                      context, ex, volume_id,
+                                                      request_spec)
+
+    def _set_volume_state_and_notify(self, method, updates, context, ex,
+                                     volume_id, request_spec):
+        """changes volume state and notifies"""
+        LOG.warning(_("Failed to schedule_%(method)s: %(ex)s") % locals())
+
+        volume_state = updates['status']
+        db.volume_update(context, volume_id, updates)
+
+        payload = dict(request_spec=request_spec or {},
+                       volume_id=volume_id,
+                       state=volume_state,
+                       method=method,
+                       reason=ex)
+
+        notifier.notify(notifier.publisher_id("scheduler"),
+                        'scheduler.' + method, notifier.ERROR, payload)
+
     def run_instance(self, context, topic, *args, **kwargs):
         """Tries to call schedule_run_instance on the driver.
         Sets instance vm_state to ERROR on exceptions
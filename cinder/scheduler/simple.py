@@ -110,12 +110,63 @@ class SimpleScheduler(chance.ChanceScheduler):
         return instances
 
     def schedule_create_volume(self, context, volume_id, *_args, **_kwargs):
-        """Picks a host that is up and has the fewest volumes."""
+        """Picks a host that is up and has the fewest allocated gigabytes.
+
+        Host usage comes from the scheduler's in-memory HostState cache
+        instead of aggregating the volumes table on every request.
+        """
         elevated = context.elevated()
 
         volume_ref = db.volume_get(context, volume_id)
-        availability_zone = volume_ref.get('availability_zone')
+        zone, host = self._volume_zone_and_host(context, elevated,
+                volume_ref.get('availability_zone'))
+        if host:
+            driver.cast_to_volume_host(context, host, 'create_volume',
+                    volume_id=volume_id, **_kwargs)
+            return None
+
+        host_states = self._volume_host_states(elevated, zone)
+        host_state = self._least_allocated_host(host_states, volume_ref)
+        host_state.consume_from_volume(volume_ref)
+        driver.cast_to_volume_host(context, host_state.host,
+                'create_volume', volume_id=volume_id, **_kwargs)
+        return None
+
+    def schedule_create_volumes(self, context, volume_ids, *_args,
+                                **_kwargs):
+        """Places a batch of identical volumes using a single read of the
+        host states, spreading them over the least allocated hosts.
+
+        Either every volume gets a host or NoValidHost is raised and
+        nothing is cast.
+        """
+        elevated = context.elevated()
+
+        volume_ref = db.volume_get(context, volume_ids[0])
+        zone, host = self._volume_zone_and_host(context, elevated,
+                volume_ref.get('availability_zone'))
+        if host:
+            driver.cast_to_volume_hosts(context, 'create_volume',
+                    [(host, dict(_kwargs, volume_id=volume_id))
+                     for volume_id in volume_ids])
+            return None
 
+        host_states = self._volume_host_states(elevated, zone)
+        placements = []
+        for volume_id in volume_ids:
+            host_state = self._least_allocated_host(host_states, volume_ref)
+            host_state.consume_from_volume(volume_ref)
+            placements.append((volume_id, host_state.host))
+
+        driver.cast_to_volume_hosts(context, 'create_volume',
+                [(host, dict(_kwargs, volume_id=volume_id))
+                 for volume_id, host in placements])
+        return None
+
+    def _volume_zone_and_host(self, context, elevated, availability_zone):
+        """Splits a 'zone:host' availability zone.  The host is only
+        honoured for admins, and only if its volume service is up.
+        """
         zone, host = None, None
         if availability_zone:
             zone, _x, host = availability_zone.partition(':')
@@ -123,22 +174,31 @@ class SimpleScheduler(chance.ChanceScheduler):
             service = db.service_get_by_args(elevated, host, 'cinder-volume')
             if not utils.service_is_up(service):
                 raise exception.WillNotSchedule(host=host)
-            driver.cast_to_volume_host(context, host, 'create_volume',
-                    volume_id=volume_id, **_kwargs)
-            return None
+            return zone, host
+        return zone, None
 
-        results = db.service_get_all_volume_sorted(elevated)
+    def _volume_host_states(self, elevated, zone):
+        host_states = self.host_manager.get_all_host_states(elevated)
         if zone:
-            results = [(service, gigs) for (service, gigs) in results
-                       if service['availability_zone'] == zone]
-        for result in results:
-            (service, volume_gigabytes) = result
-            if volume_gigabytes + volume_ref['size'] > FLAGS.max_gigabytes:
+            host_states = [host_state for host_state in host_states
+                           if host_state.service['availability_zone'] == zone]
+        return [host_state for host_state in host_states
+                if not host_state.service['disabled']]
+
+    def _least_allocated_host(self, host_states, volume_ref):
+        """Returns the least allocated host state with room for the
+        volume.
+        """
+        size = volume_ref['size']
+        host_states = sorted(host_states, key=lambda host_state:
+                             host_state.allocated_capacity_gb)
+        for host_state in host_states:
+            if host_state.allocated_capacity_gb + size > FLAGS.max_gigabytes:
                 msg = _("Not enough allocatable volume gigabytes remaining")
                 raise exception.NoValidHost(reason=msg)
-            if utils.service_is_up(service) and not service['disabled']:
-                driver.cast_to_volume_host(context, service['host'],
-                        'create_volume', volume_id=volume_id, **_kwargs)
-                return None
+            if (host_state.free_capacity_gb is not None and
+                host_state.free_capacity_gb < size):
+                continue
+            return host_state
         msg = _("Is the appropriate service running?")
         raise exception.NoValidHost(reason=msg)
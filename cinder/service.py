@@ -19,12 +19,17 @@
 
 """Generic Node base class for all workers that run on hosts."""
 
+import errno
 import inspect
 import os
 import random
 import signal
+import sys
+import time
 
 import eventlet
+import eventlet.greenio
+import eventlet.hubs
 import greenlet
 
 from cinder import context
@@ -32,6 +37,7 @@ from cinder import db
 from cinder import exception
 from cinder import flags
 from cinder import log as logging
+from cinder.notifier import rabbit_notifier
 from cinder.openstack.common import cfg
 from cinder.openstack.common import importutils
 from cinder import rpc
@@ -60,6 +66,11 @@ service_opts = [
     cfg.IntOpt('osapi_volume_listen_port',
                default=8776,
                help='port for os volume api to listen'),
+    cfg.IntOpt('osapi_volume_workers',
+               default=1,
+               help='Number of processes serving the OpenStack Volume API. '
+                    'More than 1 forks workers that share the listening '
+                    'socket'),
     ]
 
 FLAGS = flags.FLAGS
@@ -129,6 +140,226 @@ class Launcher(object):
                 pass
 
 
+class SignalExit(SystemExit):
+    def __init__(self, signo, exccode=1):
+        super(SignalExit, self).__init__(exccode)
+        self.signo = signo
+
+
+class ServerWrapper(object):
+    def __init__(self, server, workers):
+        self.server = server
+        self.workers = workers
+        self.children = set()
+        self.forktimes = []
+
+
+class ProcessLauncher(object):
+    """Launch servers in forked worker processes and supervise them.
+
+    The listening socket of each server is bound once in the parent and
+    shared by its workers.  Workers that die are restarted.  SIGTERM and
+    SIGINT stop the workers and then the parent; SIGHUP restarts all of
+    the workers.
+    """
+
+    def __init__(self):
+        """Initialize the process launcher.
+
+        :returns: None
+
+        """
+        self.children = {}
+        self.sigcaught = None
+        self.running = True
+        rfd, self.writepipe = os.pipe()
+        self.readpipe = eventlet.greenio.GreenPipe(rfd, 'r')
+
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        signal.signal(signal.SIGHUP, self._handle_sighup)
+
+    def _handle_signal(self, signo, frame):
+        self.sigcaught = signo
+        self.running = False
+
+        # Allow the process to be killed again and die from natural causes
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    def _handle_sighup(self, signo, frame):
+        LOG.info(_('Caught SIGHUP, restarting children'))
+        self._signal_children(signal.SIGTERM)
+
+    def _signal_children(self, signo):
+        for pid in self.children:
+            try:
+                os.kill(pid, signo)
+            except OSError as exc:
+                if exc.errno != errno.ESRCH:
+                    raise
+
+    def _pipe_watcher(self):
+        # This will block until the write end is closed when the parent
+        # dies unexpectedly
+        self.readpipe.read()
+
+        LOG.info(_('Parent process has died unexpectedly, exiting'))
+
+        sys.exit(1)
+
+    def _child_process(self, server):
+        # Setup child signal handlers differently
+        def _sigterm(*args):
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            raise SignalExit(signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, _sigterm)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        # Block SIGINT and let the parent send us a SIGTERM
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        # Reopen the eventlet hub to make sure we don't share an epoll
+        # fd with parent and/or siblings, which would be bad
+        eventlet.hubs.use_hub()
+
+        # Close write to ensure only parent has it open
+        os.close(self.writepipe)
+        # Create greenthread to watch for parent to close pipe
+        eventlet.spawn(self._pipe_watcher)
+
+        # Reseed random number generator
+        random.seed()
+
+        Launcher.run_server(server)
+
+    def _start_child(self, wrap):
+        if len(wrap.forktimes) > wrap.workers:
+            # Limit ourselves to one process a second (over the period of
+            # number of workers * 1 second). This will allow workers to
+            # start up quickly but ensure we don't fork off children that
+            # die instantly too quickly.
+            if time.time() - wrap.forktimes[0] < wrap.workers:
+                LOG.info(_('Forking too fast, sleeping'))
+                time.sleep(1)
+
+            wrap.forktimes.pop(0)
+
+        wrap.forktimes.append(time.time())
+
+        pid = os.fork()
+        if pid == 0:
+            # NOTE: All exceptions are caught to ensure this doesn't fall
+            # back into the loop spawning children. It would be bad for a
+            # child to spawn more children.
+            status = 0
+            try:
+                self._child_process(wrap.server)
+            except SignalExit as exc:
+                LOG.info(_('Caught SIGTERM, exiting'))
+                status = exc.code
+            except SystemExit as exc:
+                status = exc.code
+            except BaseException:
+                LOG.exception(_('Unhandled exception'))
+                status = 2
+            finally:
+                # NOTE: cleanup must not raise either, or the child would
+                # skip os._exit and return to the parent's loop.
+                try:
+                    wrap.server.stop()
+                except Exception:
+                    LOG.exception(_('Failed to stop server'))
+                try:
+                    rabbit_notifier.flush()
+                except Exception:
+                    LOG.exception(_('Failed to flush notifications'))
+
+            os._exit(status)
+
+        LOG.info(_('Started child %d'), pid)
+
+        wrap.children.add(pid)
+        self.children[pid] = wrap
+
+        return pid
+
+    def launch_server(self, server, workers=None):
+        """Bind the server's socket and fork workers to serve it.
+
+        :param server: The server you would like to start.
+        :param workers: Number of workers, defaults to server.workers.
+        :returns: None
+
+        """
+        if workers is None:
+            workers = getattr(server, 'workers', 1)
+        listen = getattr(server, 'listen', None)
+        if listen:
+            listen()
+
+        wrap = ServerWrapper(server, workers)
+
+        LOG.info(_('Starting %d workers'), wrap.workers)
+        while self.running and len(wrap.children) < wrap.workers:
+            self._start_child(wrap)
+
+    def _wait_child(self):
+        try:
+            pid, status = os.wait()
+        except OSError as exc:
+            if exc.errno not in (errno.EINTR, errno.ECHILD):
+                raise
+            return None
+
+        if os.WIFSIGNALED(status):
+            sig = os.WTERMSIG(status)
+            LOG.info(_('Child %(pid)d killed by signal %(sig)d'), locals())
+        else:
+            code = os.WEXITSTATUS(status)
+            LOG.info(_('Child %(pid)d exited with status %(code)d'),
+                     locals())
+
+        if pid not in self.children:
+            LOG.warn(_('pid %d not in child list'), pid)
+            return None
+
+        wrap = self.children.pop(pid)
+        wrap.children.remove(pid)
+        return wrap
+
+    def stop(self):
+        """Ask the workers to stop and stop respawning them.
+
+        :returns: None
+
+        """
+        self.running = False
+        self._signal_children(signal.SIGTERM)
+
+    def wait(self):
+        """Loop waiting on children to die and respawning as necessary."""
+        while self.running:
+            wrap = self._wait_child()
+            if not wrap:
+                continue
+
+            while self.running and len(wrap.children) < wrap.workers:
+                self._start_child(wrap)
+
+        if self.sigcaught:
+            LOG.info(_('Caught signal %d, stopping children'),
+                     self.sigcaught)
+
+        self._signal_children(signal.SIGTERM)
+
+        # Wait for children to die
+        if self.children:
+            LOG.info(_('Waiting on %d children to exit'), len(self.children))
+            while self.children:
+                self._wait_child()
+
+
 class Service(object):
     """Service object for binaries running on hosts.
 
@@ -339,6 +570,7 @@ class WSGIService(object):
         self.app = self.loader.load_app(name)
         self.host = getattr(FLAGS, '%s_listen' % name, "0.0.0.0")
         self.port = getattr(FLAGS, '%s_listen_port' % name, 0)
+        self.workers = getattr(FLAGS, '%s_workers' % name, 1) or 1
         self.server = wsgi.Server(name,
                                   self.app,
                                   host=self.host,
@@ -365,6 +597,15 @@ class WSGIService(object):
         manager_class = importutils.import_class(manager_class_name)
         return manager_class()
 
+    def listen(self):
+        """Bind the listening socket, so that forked workers share it.
+
+        :returns: None
+
+        """
+        self.server.listen()
+        self.port = self.server.port
+
     def start(self):
         """Start serving this service using loaded configuration.
 
@@ -407,7 +648,10 @@ _launcher = None
 def serve(*servers):
     global _launcher
     if not _launcher:
-        _launcher = Launcher()
+        if max([getattr(server, 'workers', 1) for server in servers]) > 1:
+            _launcher = ProcessLauncher()
+        else:
+            _launcher = Launcher()
     for server in servers:
         _launcher.launch_server(server)
 
@@ -427,4 +671,6 @@ def wait():
         _launcher.wait()
     except KeyboardInterrupt:
         _launcher.stop()
+    # Publish notifications still held back by notification_batch_window
+    rabbit_notifier.flush()
     rpc.cleanup()
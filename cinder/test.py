@@ -182,7 +182,7 @@ class TestCase(unittest.TestCase):
 
         """
         for k in self._overridden_opts:
-            FLAGS.set_override(k, None)
+            FLAGS.clear_override(k)
         self._overridden_opts = []
 
     def start_service(self, name, host=None, **kwargs):
@@ -27,6 +27,7 @@ from cinder.api import openstack as openstack_api
 from cinder.api.openstack import auth
 from cinder.api.openstack import urlmap
 from cinder.api.openstack import volume
+from cinder.api.openstack.volume import limits
 from cinder.api.openstack.volume import versions
 from cinder.api.openstack import wsgi as os_wsgi
 from cinder import context
@@ -88,15 +89,14 @@ def wsgi_app(inner_app_v1=None, fake_auth=True, fake_auth_context=None,
 
 def stub_out_rate_limiting(stubs):
     def fake_rate_init(self, app):
-        # super(limits.RateLimitingMiddleware, self).__init__(app)
+        super(limits.RateLimitingMiddleware, self).__init__(app)
         self.application = app
 
-    # FIXME(ja): unsure about limits in volumes
-    # stubs.Set(cinder.api.openstack.compute.limits.RateLimitingMiddleware,
-    #     '__init__', fake_rate_init)
+    stubs.Set(limits.RateLimitingMiddleware,
+        '__init__', fake_rate_init)
 
-    # stubs.Set(cinder.api.openstack.compute.limits.RateLimitingMiddleware,
-    #     '__call__', fake_wsgi)
+    stubs.Set(limits.RateLimitingMiddleware,
+        '__call__', fake_wsgi)
 
 
 class FakeToken(object):
@@ -230,5 +230,6 @@ def stub_volume_get_notfound(self, context, volume_id):
     raise exc.NotFound
 
 
-def stub_volume_get_all(self, context, search_opts=None):
+def stub_volume_get_all(self, context, marker=None, limit=None,
+                        sort_key=None, sort_dir=None, filters=None):
     return [stub_volume_get(self, context, '1')]
@@ -196,6 +196,40 @@ class PaginationParamsTest(test.TestCase):
                          {'marker': marker, 'limit': 20})
 
 
+class IterPagesTest(test.TestCase):
+    """
+    Unit tests for `cinder.api.openstack.common.iter_pages`.
+    """
+
+    def setUp(self):
+        super(IterPagesTest, self).setUp()
+        self.items = [{'id': i} for i in range(7)]
+        self.calls = []
+
+    def _fetch(self, marker=None, limit=None):
+        self.calls.append((marker, limit))
+        start = 0 if marker is None else marker + 1
+        return self.items[start:start + limit]
+
+    def test_all_pages(self):
+        items = common.iter_pages(self._fetch, page_size=3)
+        self.assertEqual(list(items), self.items)
+        self.assertEqual(self.calls, [(None, 3), (2, 3), (5, 3)])
+
+    def test_limit_and_marker(self):
+        items = common.iter_pages(self._fetch, marker=0, limit=4,
+                                  page_size=3)
+        self.assertEqual(list(items), self.items[1:5])
+        self.assertEqual(self.calls, [(0, 3), (3, 1)])
+
+    def test_first_page_fetched_eagerly(self):
+        def fetch(marker=None, limit=None):
+            raise exception.MarkerNotFound(marker=marker)
+
+        self.assertRaises(exception.MarkerNotFound,
+                          common.iter_pages, fetch, marker='bogus')
+
+
 class MiscFunctionsTest(test.TestCase):
 
     def test_remove_major_version_from_href(self):
@@ -802,6 +802,35 @@ class ResponseObjectTest(test.TestCase):
                                                      default_serializers)
             self.assertEqual(serializer, mtype)
 
+    def test_materialize(self):
+        stream = wsgi.StreamingList(iter([1, 2, 3]),
+                                    lambda count, last: {'last': last})
+        robj = wsgi.ResponseObject({'items': stream})
+        self.assertTrue(robj.is_streaming())
+        robj.materialize()
+        self.assertFalse(robj.is_streaming())
+        self.assertEqual(robj.obj, {'items': [1, 2, 3], 'last': 3})
+
+    def test_serialize_streaming(self):
+        stream = wsgi.StreamingList(iter([{'id': 1}, {'id': 2}]),
+                                    lambda count, last: {'count': count})
+        robj = wsgi.ResponseObject({'items': stream, 'other': 'foo'})
+        request = wsgi.Request.blank('/tests/123')
+        response = robj.serialize(request, 'application/json',
+                                  dict(json=wsgi.JSONDictSerializer))
+        self.assertEqual(response.content_length, None)
+        self.assertEqual(json.loads(response.body),
+                         {'items': [{'id': 1}, {'id': 2}],
+                          'other': 'foo', 'count': 2})
+
+    def test_serialize_streaming_chunks(self):
+        serializer = wsgi.JSONDictSerializer()
+        serializer.chunk_items = 2
+        stream = wsgi.StreamingList(iter(range(5)))
+        chunks = list(serializer.serialize_iter({'items': stream}))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(json.loads(''.join(chunks)), {'items': range(5)})
+
     def test_serialize(self):
         class JSONSerializer(object):
             def serialize(self, obj):
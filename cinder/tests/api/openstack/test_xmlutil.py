@@ -652,6 +652,63 @@ class TemplateTest(test.TestCase):
                          str(obj['test']['image']['id']))
         self.assertEqual(result[idx].text, obj['test']['image']['name'])
 
+    def test_compile(self):
+        obj = {
+            'test': {
+                'name': 'foobar',
+                'values': [1, 2, 3],
+                'image': {
+                    'name': 'image_foobar',
+                    'id': 42,
+                    },
+                },
+            }
+
+        root = xmlutil.TemplateElement('test', selector='test',
+                                       name='name', id='id')
+        value = xmlutil.SubTemplateElement(root, 'value', selector='values')
+        value.text = xmlutil.Selector()
+        xmlutil.SubTemplateElement(root, 'image', selector='image',
+                                   id='id')
+        master = xmlutil.MasterTemplate(root, 1, nsmap=dict(f='foo'))
+
+        root_slave = xmlutil.TemplateElement('test', selector='test',
+                                             name='missing')
+        image = xmlutil.SubTemplateElement(root_slave, 'image',
+                                           selector='image')
+        image.text = xmlutil.Selector('name')
+        master.attach(xmlutil.SlaveTemplate(root_slave, 1,
+                                            nsmap=dict(b='bar')))
+
+        # The compiled template must render what _serialize() does
+        expected = master._serialize(None, obj, master._siblings(),
+                                     master._nsmap())
+        result = master.make_tree(obj)
+        self.assertEqual(etree.tostring(result), etree.tostring(expected))
+        self.assertEqual(result.get('name'), 'foobar')
+        self.assertEqual(result[3].text, 'image_foobar')
+
+    def test_compile_cached(self):
+        elem = xmlutil.TemplateElement('test')
+        tmpl = xmlutil.MasterTemplate(elem, 1)
+        compiled = tmpl.compile()
+        self.assertEqual(tmpl.compile(), compiled)
+
+        # Copies share the compiled elements of their master...
+        self.assertEqual(tmpl.copy().compile(), compiled)
+
+        # ...unless they have different slaves
+        copy = tmpl.copy()
+        copy.attach(xmlutil.TemplateElement('test'))
+        self.assertNotEqual(copy.compile(), compiled)
+
+        # Modifying the template recompiles it
+        elem.set('name')
+        self.assertNotEqual(tmpl.compile(), compiled)
+        self.assertEqual(tmpl.serialize(dict(name='foo')),
+                         "<?xml version='1.0' encoding='UTF-8'?>\n"
+                         '<test name="foo"/>')
+
 
 class MasterTemplateBuilder(xmlutil.TemplateBuilder):
     def construct(self):
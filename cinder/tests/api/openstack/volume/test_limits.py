@@ -0,0 +1,246 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2011 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Tests dealing with HTTP rate-limiting.
+"""
+
+import json
+import time
+
+import webob
+import webob.dec
+
+from cinder.api.openstack.volume import limits
+from cinder.common import memorycache
+from cinder import context
+from cinder import test
+
+
+TEST_LIMITS = [
+    limits.Limit("GET", "/delayed", "^/delayed", 1, limits.PER_MINUTE),
+    limits.Limit("POST", "*", ".*", 7, limits.PER_MINUTE),
+    limits.Limit("POST", "/volumes", "^/volumes", 3, limits.PER_MINUTE),
+    limits.Limit("PUT", "*", "", 10, limits.PER_MINUTE),
+]
+
+
+class BaseLimitTestSuite(test.TestCase):
+    """Base test suite which provides relevant stubs and time abstraction."""
+
+    def setUp(self):
+        super(BaseLimitTestSuite, self).setUp()
+        self.time = 0.0
+        self.stubs.Set(time, "time", self._get_time)
+
+    def _get_time(self):
+        """Return the "time" according to this test suite."""
+        return self.time
+
+
+class LimiterTest(BaseLimitTestSuite):
+    """Tests for the `Limiter` class with the in-process store."""
+
+    def _get_store(self):
+        return limits.LocalLimitStore()
+
+    def setUp(self):
+        super(LimiterTest, self).setUp()
+        self.limiter = limits.Limiter(TEST_LIMITS, store=self._get_store())
+
+    def _check(self, num, verb, url, project_id=None):
+        """Check and yield results from checks."""
+        for x in xrange(num):
+            yield self.limiter.check_for_delay(verb, url, project_id)[0]
+
+    def _check_sum(self, num, verb, url, project_id=None):
+        """Check and sum results from checks."""
+        results = self._check(num, verb, url, project_id)
+        return sum(item for item in results if item)
+
+    def test_no_delay_GET(self):
+        delay = self.limiter.check_for_delay("GET", "/anything")
+        self.assertEqual(delay, (None, None))
+
+    def test_no_delay_PUT(self):
+        delay = self.limiter.check_for_delay("PUT", "/anything")
+        self.assertEqual(delay, (None, None))
+
+    def test_delay_POST(self):
+        expected = [None] * 7
+        results = list(self._check(7, "POST", "/anything"))
+        self.assertEqual(expected, results)
+
+        delay = self.limiter.check_for_delay("POST", "/anything")[0]
+        self.assertAlmostEqual(delay, 60.0 / 7, 4)
+
+    def test_delay_POST_volumes(self):
+        results = list(self._check(3, "POST", "/volumes"))
+        self.assertEqual([None] * 3, results)
+        self.assertTrue(self.limiter.check_for_delay("POST", "/volumes")[0])
+
+    def test_delay_refills(self):
+        self.assertEqual(None, self.limiter.check_for_delay("GET",
+                                                            "/delayed")[0])
+        self.assertTrue(self.limiter.check_for_delay("GET", "/delayed")[0])
+        self.time += 60.0
+        self.assertEqual(None, self.limiter.check_for_delay("GET",
+                                                            "/delayed")[0])
+
+    def test_projects_are_separate(self):
+        self.assertEqual(self._check_sum(3, "POST", "/volumes", "p1"), 0)
+        self.assertEqual(self._check_sum(3, "POST", "/volumes", "p2"), 0)
+        self.assertTrue(self._check_sum(1, "POST", "/volumes", "p1") > 0)
+
+    def test_get_limits(self):
+        self.limiter.check_for_delay("GET", "/delayed", "p1")
+        delayed = self.limiter.get_limits("p1")[0]
+        self.assertEqual(delayed["remaining"], 0)
+        self.assertEqual(delayed["unit"], "MINUTE")
+        self.assertEqual(delayed["resetTime"], 60)
+
+
+class MemcacheLimiterTest(LimiterTest):
+    """Runs the `Limiter` tests against the shared store."""
+
+    def _get_store(self):
+        return limits.MemcacheLimitStore(memorycache.Client())
+
+    def test_delay_POST(self):
+        results = list(self._check(7, "POST", "/anything"))
+        self.assertEqual([None] * 7, results)
+
+        self.time = 20.0
+        delay = self.limiter.check_for_delay("POST", "/anything")[0]
+        self.assertEqual(delay, 40.0)
+
+
+class ParseLimitsTest(BaseLimitTestSuite):
+    """Tests for the default limits parser."""
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, limits.Limiter.parse_limits,
+                          ';;;;;')
+
+    def test_bad_rule(self):
+        self.assertRaises(ValueError, limits.Limiter.parse_limits,
+                          'GET, *, .*, 20, minute')
+
+    def test_bad_unit(self):
+        self.assertRaises(ValueError, limits.Limiter.parse_limits,
+                          '(GET, *, .*, 20, lightyears)')
+
+    def test_multiple_rules(self):
+        parsed = limits.Limiter.parse_limits('(get, *, .*, 20, minute);'
+                                             '(PUT, /foo*, /foo.*, 10, hour)')
+        self.assertEqual([l.verb for l in parsed], ['GET', 'PUT'])
+        self.assertEqual([l.value for l in parsed], [20, 10])
+        self.assertEqual([l.unit for l in parsed],
+                         [limits.PER_MINUTE, limits.PER_HOUR])
+
+
+class LimitMiddlewareTest(BaseLimitTestSuite):
+    """Tests for the `limits.RateLimitingMiddleware` class."""
+
+    @webob.dec.wsgify
+    def _empty_app(self, request):
+        """Do-nothing WSGI app."""
+        pass
+
+    def setUp(self):
+        super(LimitMiddlewareTest, self).setUp()
+        _limits = '(GET, *, .*, 1, MINUTE)'
+        self.app = limits.RateLimitingMiddleware(self._empty_app, _limits)
+
+    def test_limited_request_json(self):
+        request = webob.Request.blank("/")
+        response = request.get_response(self.app)
+        self.assertEqual(200, response.status_int)
+
+        request = webob.Request.blank("/")
+        response = request.get_response(self.app)
+        self.assertEqual(response.status_int, 413)
+        self.assertEqual(response.headers['Retry-After'], '60')
+
+        body = json.loads(response.body)
+        expected = "Only 1 GET request(s) can be made to * every minute."
+        self.assertEqual(body["overLimitFault"]["details"], expected)
+
+    def test_limits_in_environ(self):
+        request = webob.Request.blank("/")
+        request.environ["cinder.context"] = context.RequestContext('fake',
+                                                                   'p1')
+        calls = []
+        get_limits = self.app._limiter.get_limits
+
+        def fake_get_limits(project_id):
+            calls.append(project_id)
+            return get_limits(project_id)
+
+        self.stubs.Set(self.app._limiter, 'get_limits', fake_get_limits)
+        request.get_response(self.app)
+        # Limits are only looked up when something asks for them
+        self.assertEqual(calls, [])
+        self.assertEqual(len(request.environ["cinder.get_limits"]()), 1)
+        self.assertEqual(calls, ['p1'])
+
+
+class LimitsControllerTest(BaseLimitTestSuite):
+    """Tests for `limits.LimitsController` class."""
+
+    def setUp(self):
+        super(LimitsControllerTest, self).setUp()
+        self.controller = limits.create_resource()
+
+    def test_index_json(self):
+        request = webob.Request.blank("/")
+        request.accept = "application/json"
+        request.environ["wsgiorg.routing_args"] = (None, {
+            "action": "index",
+            "controller": "",
+        })
+        request.environ["cinder.context"] = context.RequestContext('fake',
+                                                                   'fake')
+        request.environ["cinder.limits"] = [
+            limits.Limit("GET", "*", ".*", 10, 60).display(10, 0),
+            limits.Limit("POST", "*", ".*", 5, 60).display(4, 12),
+        ]
+        response = request.get_response(self.controller)
+        body = json.loads(response.body)
+        rates = body["limits"]["rate"]
+        self.assertEqual(len(rates), 1)
+        self.assertEqual(rates[0]["uri"], "*")
+        self.assertEqual([l["verb"] for l in rates[0]["limit"]],
+                         ["GET", "POST"])
+        self.assertEqual(rates[0]["limit"][1]["next-available"], 12)
+        self.assertTrue("maxTotalVolumes" in body["limits"]["absolute"])
+
+    def test_index_looks_limits_up(self):
+        request = webob.Request.blank("/")
+        request.accept = "application/json"
+        request.environ["wsgiorg.routing_args"] = (None, {
+            "action": "index",
+            "controller": "",
+        })
+        request.environ["cinder.context"] = context.RequestContext('fake',
+                                                                   'fake')
+        request.environ["cinder.get_limits"] = lambda: [
+            limits.Limit("GET", "*", ".*", 10, 60).display(10, 0),
+        ]
+        response = request.get_response(self.controller)
+        body = json.loads(response.body)
+        self.assertEqual(len(body["limits"]["rate"]), 1)
@@ -67,7 +67,8 @@ def stub_snapshot_get(self, context, snapshot_id):
     return param
 
 
-def stub_snapshot_get_all(self, context):
+def stub_snapshot_get_all(self, context, marker=None, limit=None,
+                          sort_key=None, sort_dir=None, filters=None):
     param = _get_default_snapshot_param()
     return [param]
 
@@ -159,6 +160,30 @@ class SnapshotApiTest(test.TestCase):
         resp_snapshot = resp_snapshots.pop()
         self.assertEqual(resp_snapshot['id'], UUID)
 
+    def test_snapshot_list_pushes_paging_and_filters_down(self):
+        calls = []
+
+        def stub_get_all(self, context, **kwargs):
+            calls.append(kwargs)
+            return [_get_default_snapshot_param()]
+
+        self.stubs.Set(volume.api.API, 'get_all_snapshots', stub_get_all)
+        req = fakes.HTTPRequest.blank('/v1/snapshots?limit=1&volume_id=12')
+        resp_dict = self.controller.index(req)
+        self.assertEqual(calls, [{'marker': None, 'limit': 1,
+                                  'sort_key': 'created_at',
+                                  'sort_dir': 'desc',
+                                  'filters': {'volume_id': '12'}}])
+        next_link = resp_dict['snapshots_links'][0]
+        self.assertEqual(next_link['rel'], 'next')
+        self.assertTrue('marker=%s' % UUID in next_link['href'])
+
+    def test_snapshot_list_bad_sort_params(self):
+        for query in ('sort_dir=up', 'sort_key=volume'):
+            req = fakes.HTTPRequest.blank('/v1/snapshots?%s' % query)
+            self.assertRaises(webob.exc.HTTPBadRequest,
+                              self.controller.index, req)
+
 
 class SnapshotSerializerTest(test.TestCase):
     def _verify_snapshot(self, snap, tree):
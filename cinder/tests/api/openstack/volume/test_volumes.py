@@ -18,7 +18,9 @@ import datetime
 from lxml import etree
 import webob
 
+from cinder.api.openstack import wsgi
 from cinder.api.openstack.volume import volumes
+from cinder import exception
 from cinder import flags
 from cinder import test
 from cinder.tests.api.openstack import fakes
@@ -65,6 +67,42 @@ class VolumeApiTest(test.TestCase):
                                'size': 100}}
         self.assertEqual(res_dict, expected)
 
+    def test_volume_create_batch(self):
+        def stub_volume_create_batch(self, context, count, size, name,
+                                     description, min_count=None, **param):
+            vols = []
+            for i in xrange(min_count):
+                vol = fakes.stub_volume_create(self, context, size, name,
+                                               description, **param)
+                vol['id'] = str(i + 1)
+                vols.append(vol)
+            return vols
+
+        self.stubs.Set(volume_api.API, "create_batch",
+                       stub_volume_create_batch)
+
+        vol = {"size": 100,
+               "display_name": "Volume Test Name",
+               "display_description": "Volume Test Desc",
+               "count": "3",
+               "min_count": 2}
+        body = {"volume": vol}
+        req = fakes.HTTPRequest.blank('/v1/volumes')
+        res = self.controller.create(req, body)
+        volumes = res.obj['volumes']
+        self.assertEqual(len(volumes), 2)
+        self.assertEqual([v['id'] for v in volumes], ['1', '2'])
+        self.assertEqual(volumes[0]['size'], 100)
+
+    def test_volume_create_batch_bad_count(self):
+        vol = {"size": 100, "count": "lots"}
+        body = {"volume": vol}
+        req = fakes.HTTPRequest.blank('/v1/volumes')
+        self.assertRaises(webob.exc.HTTPBadRequest,
+                          self.controller.create,
+                          req,
+                          body)
+
     def test_volume_create_no_body(self):
         body = {}
         req = fakes.HTTPRequest.blank('/v1/volumes')
@@ -113,6 +151,82 @@ class VolumeApiTest(test.TestCase):
                                  'size': 1}]}
         self.assertEqual(res_dict, expected)
 
+    def test_volume_list_pushes_paging_and_filters_down(self):
+        calls = []
+
+        def stub_get_all(self, context, **kwargs):
+            calls.append(kwargs)
+            return [fakes.stub_volume('1')]
+
+        self.stubs.Set(volume_api.API, 'get_all', stub_get_all)
+        req = fakes.HTTPRequest.blank('/v1/volumes?marker=prev&limit=1'
+                                      '&sort_key=size&sort_dir=asc'
+                                      '&status=available&host=host1'
+                                      '&metadata={"tier":"gold"}')
+        res_dict = self.controller.index(req)
+        # host is dropped for non-admin callers
+        self.assertEqual(calls, [{'marker': 'prev', 'limit': 1,
+                                  'sort_key': 'size', 'sort_dir': 'asc',
+                                  'filters': {'status': 'available',
+                                              'metadata': {'tier': 'gold'}}}])
+        self.assertEqual(len(res_dict['volumes']), 1)
+        next_link = res_dict['volumes_links'][0]
+        self.assertEqual(next_link['rel'], 'next')
+        self.assertTrue('marker=1' in next_link['href'])
+
+    def test_volume_list_host_filter_admin_only(self):
+        def stub_get_all(self, context, marker=None, limit=None,
+                         sort_key=None, sort_dir=None, filters=None):
+            return [fakes.stub_volume(filters['host'])]
+
+        self.stubs.Set(volume_api.API, 'get_all', stub_get_all)
+        req = fakes.HTTPRequest.blank('/v1/volumes?host=host1',
+                                      use_admin_context=True)
+        res_dict = self.controller.index(req)
+        self.assertEqual(res_dict['volumes'][0]['id'], 'host1')
+        self.assertFalse('volumes_links' in res_dict)
+
+    def test_volume_list_bad_metadata_filter(self):
+        req = fakes.HTTPRequest.blank('/v1/volumes?metadata=tier')
+        self.assertRaises(webob.exc.HTTPBadRequest,
+                          self.controller.index, req)
+
+    def test_volume_list_bad_sort_params(self):
+        for query in ('sort_dir=up', 'sort_key=metadata'):
+            req = fakes.HTTPRequest.blank('/v1/volumes?%s' % query)
+            self.assertRaises(webob.exc.HTTPBadRequest,
+                              self.controller.index, req)
+
+    def test_volume_list_marker_not_found(self):
+        def stub_get_all(self, context, marker=None, **kwargs):
+            raise exception.MarkerNotFound(marker=marker)
+
+        self.stubs.Set(volume_api.API, 'get_all', stub_get_all)
+        req = fakes.HTTPRequest.blank('/v1/volumes?marker=bogus')
+        self.assertRaises(webob.exc.HTTPBadRequest,
+                          self.controller.index, req)
+
+    def test_volume_list_streaming(self):
+        calls = []
+
+        def stub_get_all(self, context, marker=None, limit=None, **kwargs):
+            calls.append((marker, limit))
+            start = 0 if marker is None else int(marker)
+            return [fakes.stub_volume(str(i))
+                    for i in range(start + 1, min(start + limit, 5) + 1)]
+
+        self.stubs.Set(volume_api.API, 'get_all', stub_get_all)
+        self.flags(osapi_stream_lists=True, osapi_stream_page_size=2)
+        req = fakes.HTTPRequest.blank('/v1/volumes/detail?limit=5')
+        res_dict = self.controller.detail(req)
+        stream = res_dict['volumes']
+        self.assertTrue(isinstance(stream, wsgi.StreamingList))
+        self.assertEqual([vol['id'] for vol in stream],
+                         ['1', '2', '3', '4', '5'])
+        self.assertEqual(calls, [(None, 2), ('2', 2), ('4', 1)])
+        next_link = stream.get_extra()['volumes_links'][0]
+        self.assertTrue('marker=5' in next_link['href'])
+
     def test_volume_show(self):
         req = fakes.HTTPRequest.blank('/v1/volumes/1')
         res_dict = self.controller.show(req, '1')
@@ -30,5 +30,7 @@ FLAGS.set_default('iscsi_num_targets', 8)
 FLAGS.set_default('verbose', True)
 FLAGS.set_default('sql_connection', "sqlite://")
 FLAGS.set_default('sqlite_synchronous', False)
+flags.DECLARE('quota_cache_ttl', 'cinder.quota')
+FLAGS.set_default('quota_cache_ttl', 0)
 flags.DECLARE('policy_file', 'cinder.policy')
 FLAGS.set_default('policy_file', 'cinder/tests/policy.json')
@@ -94,6 +94,9 @@ class _IntegratedTestBase(test.TestCase):
         # Auto-assign ports to allow concurrent tests
         f['osapi_volume_listen_port'] = 0
 
+        # Tests make requests faster than the default rate limits allow
+        f['api_rate_limit'] = False
+
         return f
 
     def get_unused_server_name(self):
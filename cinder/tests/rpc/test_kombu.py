@@ -88,6 +88,33 @@ class RpcKombuTestCase(common.BaseRpcAMQPTestCase):
 
         self.assertEqual(self.received_message, message)
 
+    def test_topic_send_caches_publisher(self):
+        """Test that topic sends reuse one producer until a reconnect"""
+        conn = self.rpc.create_connection(FLAGS)
+        received = []
+
+        conn.declare_topic_consumer('a_topic', received.append)
+        conn.topic_send('a_topic', 'first')
+        conn.topic_send('a_topic', 'second')
+        self.assertEqual(len(conn.publishers), 1)
+        conn.consume(limit=2)
+        self.assertEqual(received, ['first', 'second'])
+
+        conn.direct_send('a_direct', 'not cached')
+        self.assertEqual(len(conn.publishers), 1)
+
+        conn.reconnect()
+        self.assertEqual(conn.publishers, {})
+        conn.close()
+
+    def test_reset_keeps_publishers_without_consumers(self):
+        conn = self.rpc.create_connection(FLAGS)
+        conn.topic_send('a_topic', 'message')
+        publishers = dict(conn.publishers)
+        conn.reset()
+        self.assertEqual(conn.publishers, publishers)
+        conn.close()
+
     def test_direct_send_receive(self):
         """Test sending to a direct exchange/queue"""
         conn = self.rpc.create_connection(FLAGS)
@@ -348,3 +375,26 @@ class RpcKombuTestCase(common.BaseRpcAMQPTestCase):
             self.assertTrue(value in unicode(exc))
             #Traceback should be included in exception message
             self.assertTrue('exception.ConvertedException' in unicode(exc))
+
+
+class RpcKombuSingleReplyQueueTestCase(common.BaseRpcAMQPTestCase):
+    def setUp(self):
+        self.rpc = impl_kombu
+        impl_kombu.register_opts(FLAGS)
+        super(RpcKombuSingleReplyQueueTestCase, self).setUp()
+        self.flags(amqp_rpc_single_reply_queue=True)
+
+    def tearDown(self):
+        impl_kombu.cleanup()
+        super(RpcKombuSingleReplyQueueTestCase, self).tearDown()
+
+    def test_calls_share_reply_queue(self):
+        value = 42
+        for i in xrange(2):
+            result = self.rpc.call(FLAGS, self.context, 'test',
+                                   {"method": "echo",
+                                    "args": {"value": value}})
+            self.assertEqual(value, result)
+        reply_proxy = impl_kombu.Connection.pool.reply_proxy
+        self.assertTrue(reply_proxy.reply_q.startswith('reply_'))
+        self.assertEqual(reply_proxy._call_waiters, {})
@@ -19,44 +19,67 @@ Fakes For Scheduler tests.
 import mox
 
 from cinder import db
+from cinder import flags
 from cinder.scheduler import host_manager
+from cinder import utils
+
+FLAGS = flags.FLAGS
 
 
 class FakeHostManager(host_manager.HostManager):
-    """host1: free_ram_mb=1024-512-512=0, free_disk_gb=1024-512-512=0
-       host2: free_ram_mb=2048-512=1536  free_disk_gb=2048-512=1536
-       host3: free_ram_mb=4096-1024=3072  free_disk_gb=4096-1024=3072
-       host4: free_ram_mb=8192  free_disk_gb=8192"""
+    """host1: total_capacity_gb=1024, free_capacity_gb=1024
+       host2: total_capacity_gb=2048, free_capacity_gb=300
+       host3: total_capacity_gb=512, free_capacity_gb=512
+       host4: total_capacity_gb=2048, free_capacity_gb=200"""
 
     def __init__(self):
         super(FakeHostManager, self).__init__()
 
         self.service_states = {
             'host1': {
-                'compute': {'host_memory_free': 1073741824},
+                'volume': {'total_capacity_gb': 1024,
+                           'free_capacity_gb': 1024},
             },
             'host2': {
-                'compute': {'host_memory_free': 2147483648},
+                'volume': {'total_capacity_gb': 2048,
+                           'free_capacity_gb': 300},
             },
             'host3': {
-                'compute': {'host_memory_free': 3221225472},
+                'volume': {'total_capacity_gb': 512,
+                           'free_capacity_gb': 512},
             },
             'host4': {
-                'compute': {'host_memory_free': 999999999},
+                'volume': {'total_capacity_gb': 2048,
+                           'free_capacity_gb': 200},
             },
         }
 
-    def get_host_list_from_db(self, context):
-        return [
-            ('host1', dict(free_disk_gb=1024, free_ram_mb=1024)),
-            ('host2', dict(free_disk_gb=2048, free_ram_mb=2048)),
-            ('host3', dict(free_disk_gb=4096, free_ram_mb=4096)),
-            ('host4', dict(free_disk_gb=8192, free_ram_mb=8192)),
-        ]
-
 
 class FakeHostState(host_manager.HostState):
     def __init__(self, host, topic, attribute_dict):
         super(FakeHostState, self).__init__(host, topic)
         for (key, val) in attribute_dict.iteritems():
             setattr(self, key, val)
+
+
+def fake_volume_services():
+    now = utils.utcnow()
+    return [
+        dict(id=1, host='host1', topic='cinder-volume', disabled=False,
+             availability_zone='zone1', updated_at=now, created_at=now),
+        dict(id=2, host='host2', topic='cinder-volume', disabled=False,
+             availability_zone='zone1', updated_at=now, created_at=now),
+        dict(id=3, host='host3', topic='cinder-volume', disabled=False,
+             availability_zone='zone2', updated_at=now, created_at=now),
+        dict(id=4, host='host4', topic='cinder-volume', disabled=False,
+             availability_zone='zone2', updated_at=now, created_at=now),
+    ]
+
+
+def mox_host_manager_db_calls(mock, context, usage=None):
+    mock.StubOutWithMock(db, 'service_get_all_by_topic')
+    mock.StubOutWithMock(db, 'volume_data_get_for_hosts')
+
+    db.service_get_all_by_topic(mox.IgnoreArg(),
+            FLAGS.volume_topic).AndReturn(fake_volume_services())
+    db.volume_data_get_for_hosts(mox.IgnoreArg()).AndReturn(usage or {})
@@ -0,0 +1,211 @@
+# Copyright 2011 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests For Filter Scheduler.
+"""
+
+import mox
+
+from cinder import context
+from cinder import db
+from cinder import exception
+from cinder.scheduler import driver
+from cinder.scheduler import filter_scheduler
+from cinder.scheduler import least_cost
+from cinder import test
+from cinder.tests.scheduler import fakes
+
+
+class FilterSchedulerTestCase(test.TestCase):
+    """Test case for Filter Scheduler."""
+
+    def setUp(self):
+        super(FilterSchedulerTestCase, self).setUp()
+        self.sched = filter_scheduler.FilterScheduler()
+        self.sched.host_manager = fakes.FakeHostManager()
+        self.context = context.get_admin_context()
+        self.volume = {'id': 31337, 'size': 100,
+                       'availability_zone': None, 'volume_type_id': None}
+
+    def _request_spec(self, size=100, availability_zone=None,
+                      volume_type=None):
+        return {'volume_properties': {'size': size,
+                                      'availability_zone': availability_zone,
+                                      'volume_type_id': None},
+                'volume_type': volume_type}
+
+    def _stub_schedule(self, usage=None):
+        fakes.mox_host_manager_db_calls(self.mox, self.context, usage)
+        self.mox.StubOutWithMock(db, 'volume_get')
+        self.mox.StubOutWithMock(driver, 'cast_to_volume_host')
+        db.volume_get(self.context, 31337).AndReturn(self.volume)
+
+    def test_schedule_create_volume_most_free_capacity(self):
+        self._stub_schedule()
+        driver.cast_to_volume_host(self.context, 'host1', 'create_volume',
+                volume_id=31337, snapshot_id=None,
+                request_spec=mox.IgnoreArg(),
+                filter_properties=mox.IgnoreArg())
+
+        self.mox.ReplayAll()
+        self.sched.schedule_create_volume(self.context, 31337,
+                request_spec=self._request_spec())
+        self.mox.VerifyAll()
+
+        host_state = self.sched.host_manager.host_state_map['host1']
+        self.assertEqual(host_state.free_capacity_gb, 924)
+        self.assertEqual(host_state.allocated_capacity_gb, 100)
+
+    def test_schedule_create_volume_availability_zone(self):
+        self._stub_schedule()
+        driver.cast_to_volume_host(self.context, 'host3', 'create_volume',
+                volume_id=31337, snapshot_id=None,
+                request_spec=mox.IgnoreArg(),
+                filter_properties=mox.IgnoreArg())
+
+        self.mox.ReplayAll()
+        self.sched.schedule_create_volume(self.context, 31337,
+                request_spec=self._request_spec(availability_zone='zone2'))
+
+    def test_schedule_create_volume_forced_host(self):
+        self._stub_schedule()
+        driver.cast_to_volume_host(self.context, 'host4', 'create_volume',
+                volume_id=31337, snapshot_id=None,
+                request_spec=mox.IgnoreArg(),
+                filter_properties=mox.IgnoreArg())
+
+        self.mox.ReplayAll()
+        self.sched.schedule_create_volume(self.context, 31337,
+                request_spec=self._request_spec(
+                        availability_zone='zone2:host4'))
+
+    def test_schedule_create_volume_no_capacity(self):
+        self._stub_schedule()
+
+        self.mox.ReplayAll()
+        self.assertRaises(exception.NoValidHost,
+                          self.sched.schedule_create_volume,
+                          self.context, 31337,
+                          request_spec=self._request_spec(size=2000))
+
+    def test_schedule_create_volume_builds_request_spec(self):
+        self.volume['volume_type_id'] = 1
+        self._stub_schedule()
+        self.mox.StubOutWithMock(db, 'volume_type_get')
+        db.volume_type_get(mox.IgnoreArg(), 1).AndReturn(
+                {'id': 1, 'extra_specs': {'storage_protocol': 'iSCSI'}})
+
+        self.mox.ReplayAll()
+        # No host reports the storage protocol, so none qualifies.
+        self.assertRaises(exception.NoValidHost,
+                          self.sched.schedule_create_volume,
+                          self.context, 31337)
+
+    def test_max_attempts(self):
+        self.flags(scheduler_max_attempts=4)
+        self.assertEqual(4, self.sched._max_attempts())
+
+    def test_invalid_max_attempts(self):
+        self.flags(scheduler_max_attempts=0)
+        self.assertRaises(exception.InvalidParameterValue,
+                          self.sched._max_attempts)
+
+    def test_retry_disabled(self):
+        """Retry info should not get populated when re-scheduling is off"""
+        self.flags(scheduler_max_attempts=1)
+        filter_properties = {}
+        self.sched._populate_retry(filter_properties, self.volume)
+        self.assertFalse('retry' in filter_properties)
+
+    def test_retry_attempt_one(self):
+        """Test retry logic on initial scheduling attempt"""
+        self.flags(scheduler_max_attempts=2)
+        filter_properties = {}
+        self.sched._populate_retry(filter_properties, self.volume)
+        self.assertEqual(filter_properties['retry'],
+                         {'num_attempts': 1, 'hosts': []})
+
+    def test_retry_exceeded_max_attempts(self):
+        """Test for necessary explosion when max retries is exceeded"""
+        self.flags(scheduler_max_attempts=2)
+        filter_properties = {'retry': {'num_attempts': 2,
+                                       'hosts': ['host1', 'host2']}}
+        self.assertRaises(exception.NoValidHost,
+                          self.sched._populate_retry,
+                          filter_properties, self.volume)
+
+    def test_retry_skips_tried_hosts(self):
+        self._stub_schedule()
+        retry = {'num_attempts': 2, 'hosts': ['host1', 'host3']}
+        driver.cast_to_volume_host(self.context, 'host3', 'create_volume',
+                volume_id=31337, snapshot_id=None,
+                request_spec=mox.IgnoreArg(),
+                filter_properties=mox.ContainsKeyValue('retry', retry))
+
+        self.mox.ReplayAll()
+        filter_properties = {'retry': {'num_attempts': 1,
+                                       'hosts': ['host1']}}
+        self.sched.schedule_create_volume(self.context, 31337,
+                request_spec=self._request_spec(),
+                filter_properties=filter_properties)
+
+    def test_schedule_create_volumes_consumes_between_placements(self):
+        self._stub_schedule()
+        self.mox.StubOutWithMock(driver, 'cast_to_volume_hosts')
+        casts = []
+        driver.cast_to_volume_hosts(self.context, 'create_volume',
+                mox.IgnoreArg()).WithSideEffects(
+                        lambda ctxt, method, c: casts.extend(c))
+
+        self.mox.ReplayAll()
+        # host1 starts with 1024G free and host3 with 512G, so the third
+        # volume lands on host3 once host1 is down to 424G.
+        self.sched.schedule_create_volumes(self.context, [31337, 2, 3],
+                request_spec=self._request_spec(size=300))
+        self.assertEqual([(host, kwargs['volume_id'])
+                          for host, kwargs in casts],
+                         [('host1', 31337), ('host1', 2), ('host3', 3)])
+        for host, kwargs in casts:
+            self.assertEqual(kwargs['filter_properties']['retry'],
+                             {'num_attempts': 1, 'hosts': [host]})
+        self.assertEqual(
+                self.sched.host_manager.host_state_map['host1'].volume_count,
+                2)
+
+    def test_schedule_create_volumes_all_or_nothing(self):
+        self._stub_schedule()
+
+        self.mox.ReplayAll()
+        # Only host1 fits a 600G volume, and only once, so the second
+        # one fails the whole batch before anything is cast.
+        self.assertRaises(exception.NoValidHost,
+                          self.sched.schedule_create_volumes,
+                          self.context, [31337, 2],
+                          request_spec=self._request_spec(size=600))
+
+    def test_get_cost_functions(self):
+        self.flags(least_cost_functions=[
+                'cinder.scheduler.least_cost.volume_free_capacity_cost_fn',
+                'cinder.scheduler.least_cost.volume_count_cost_fn'],
+                volume_count_cost_fn_weight=2.0)
+        fns = self.sched.get_cost_functions()
+        self.assertEquals(fns, [
+                (-1.0, least_cost.volume_free_capacity_cost_fn),
+                (2.0, least_cost.volume_count_cost_fn)])
+
+    def test_get_cost_functions_not_found(self):
+        self.flags(least_cost_functions=['cinder.scheduler.volume_bogus_fn'])
+        self.assertRaises(exception.SchedulerCostFunctionNotFound,
+                          self.sched.get_cost_functions)
@@ -0,0 +1,188 @@
+# Copyright 2011 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests For Scheduler Host Filters.
+"""
+
+from cinder import context
+from cinder import test
+from cinder.scheduler import filters
+from cinder.scheduler.filters import extra_specs_ops
+from cinder.tests.scheduler import fakes
+
+
+class TestFilter(filters.BaseHostFilter):
+    pass
+
+
+class TestBogusFilter(object):
+    """Class that doesn't inherit from BaseHostFilter"""
+    pass
+
+
+class ExtraSpecsOpsTestCase(test.TestCase):
+    def _do_extra_specs_ops_test(self, value, req, matches):
+        assertion = self.assertTrue if matches else self.assertFalse
+        assertion(extra_specs_ops.match(value, req))
+
+    def test_extra_specs_matches_simple(self):
+        self._do_extra_specs_ops_test(value='1', req='1', matches=True)
+
+    def test_extra_specs_fails_simple(self):
+        self._do_extra_specs_ops_test(value='', req='1', matches=False)
+
+    def test_extra_specs_matches_with_op_ge(self):
+        self._do_extra_specs_ops_test(value='12', req='>= 2', matches=True)
+
+    def test_extra_specs_fails_with_op_ge(self):
+        self._do_extra_specs_ops_test(value='1', req='>= 2', matches=False)
+
+    def test_extra_specs_matches_with_op_in(self):
+        self._do_extra_specs_ops_test(value='12311321', req='<in> 11',
+                                      matches=True)
+
+    def test_extra_specs_matches_with_op_or(self):
+        self._do_extra_specs_ops_test(value='12', req='<or> 11 <or> 12',
+                                      matches=True)
+
+    def test_extra_specs_fails_with_op_or(self):
+        self._do_extra_specs_ops_test(value='13', req='<or> 11 <or> 12',
+                                      matches=False)
+
+    def test_extra_specs_matches_with_op_seq(self):
+        self._do_extra_specs_ops_test(value='123', req='s== 123',
+                                      matches=True)
+
+
+class HostFiltersTestCase(test.TestCase):
+    """Test case for host filters."""
+
+    def setUp(self):
+        super(HostFiltersTestCase, self).setUp()
+        self.context = context.RequestContext('fake', 'fake')
+        classes = filters.standard_filters()
+        self.class_map = {}
+        for cls in classes:
+            self.class_map[cls.__name__] = cls
+
+    def _host(self, attributes, service=None, capabilities=None):
+        if service is None:
+            service = {'availability_zone': 'zone1'}
+        host = fakes.FakeHostState('host1', 'volume', attributes)
+        host.service = service
+        host.capabilities = capabilities or {}
+        return host
+
+    def test_standard_filters(self):
+        self.assertTrue('AvailabilityZoneFilter' in self.class_map)
+        self.assertTrue('CapacityFilter' in self.class_map)
+        self.assertTrue('CapabilitiesFilter' in self.class_map)
+        self.assertTrue('RetryFilter' in self.class_map)
+
+    def test_all_filters(self):
+        # Double check at least a couple of known filters exist
+        self.assertFalse('TestBogusFilter' in self.class_map)
+        self.assertFalse(filters._is_filter_class(TestBogusFilter))
+        self.assertTrue(filters._is_filter_class(TestFilter))
+
+    def test_availability_zone_filter_same(self):
+        filt_cls = self.class_map['AvailabilityZoneFilter']()
+        host = self._host({})
+        request_spec = {'volume_properties': {'availability_zone': 'zone1'}}
+        filter_properties = {'request_spec': request_spec}
+        self.assertTrue(filt_cls.host_passes(host, filter_properties))
+
+    def test_availability_zone_filter_different(self):
+        filt_cls = self.class_map['AvailabilityZoneFilter']()
+        host = self._host({})
+        request_spec = {'volume_properties': {'availability_zone': 'zone2'}}
+        filter_properties = {'request_spec': request_spec}
+        self.assertFalse(filt_cls.host_passes(host, filter_properties))
+
+    def test_capacity_filter_passes(self):
+        filt_cls = self.class_map['CapacityFilter']()
+        host = self._host({'free_capacity_gb': 200,
+                           'allocated_capacity_gb': 10})
+        filter_properties = {'request_spec':
+                             {'volume_properties': {'size': 100}}}
+        self.assertTrue(filt_cls.host_passes(host, filter_properties))
+
+    def test_capacity_filter_fails_free_capacity(self):
+        filt_cls = self.class_map['CapacityFilter']()
+        host = self._host({'free_capacity_gb': 120,
+                           'allocated_capacity_gb': 10})
+        filter_properties = {'request_spec':
+                             {'volume_properties': {'size': 100}}}
+        self.flags(reserved_host_capacity_gb=30)
+        self.assertFalse(filt_cls.host_passes(host, filter_properties))
+
+    def test_capacity_filter_fails_max_gigabytes(self):
+        filt_cls = self.class_map['CapacityFilter']()
+        host = self._host({'allocated_capacity_gb': 950})
+        filter_properties = {'request_spec':
+                             {'volume_properties': {'size': 100}}}
+        self.flags(max_gigabytes=1000)
+        self.assertFalse(filt_cls.host_passes(host, filter_properties))
+
+    def test_capacity_filter_passes_unreported_capacity(self):
+        filt_cls = self.class_map['CapacityFilter']()
+        host = self._host({'allocated_capacity_gb': 10})
+        filter_properties = {'request_spec':
+                             {'volume_properties': {'size': 100}}}
+        self.assertTrue(filt_cls.host_passes(host, filter_properties))
+
+    def test_capabilities_filter_passes_no_volume_type(self):
+        filt_cls = self.class_map['CapabilitiesFilter']()
+        host = self._host({}, capabilities={'opt1': '1'})
+        self.assertTrue(filt_cls.host_passes(host, {}))
+
+    def test_capabilities_filter_passes_extra_specs(self):
+        filt_cls = self.class_map['CapabilitiesFilter']()
+        host = self._host({}, capabilities={'storage_protocol': 'iSCSI',
+                                            'qos': '5'})
+        volume_type = {'extra_specs': {'storage_protocol': 'iSCSI',
+                                       'qos': '>= 2'}}
+        filter_properties = {'volume_type': volume_type}
+        self.assertTrue(filt_cls.host_passes(host, filter_properties))
+
+    def test_capabilities_filter_fails_extra_specs(self):
+        filt_cls = self.class_map['CapabilitiesFilter']()
+        host = self._host({}, capabilities={'storage_protocol': 'iSCSI'})
+        volume_type = {'extra_specs': {'storage_protocol': 'FC'}}
+        filter_properties = {'volume_type': volume_type}
+        self.assertFalse(filt_cls.host_passes(host, filter_properties))
+
+    def test_retry_filter_disabled(self):
+        """Test case where retry/re-scheduling is disabled"""
+        filt_cls = self.class_map['RetryFilter']()
+        host = self._host({})
+        filter_properties = {}
+        self.assertTrue(filt_cls.host_passes(host, filter_properties))
+
+    def test_retry_filter_pass(self):
+        """Host not previously tried"""
+        filt_cls = self.class_map['RetryFilter']()
+        host = self._host({})
+        retry = dict(num_attempts=1, hosts=['host2', 'host3'])
+        filter_properties = dict(retry=retry)
+        self.assertTrue(filt_cls.host_passes(host, filter_properties))
+
+    def test_retry_filter_fail(self):
+        """Host was already tried"""
+        filt_cls = self.class_map['RetryFilter']()
+        host = self._host({})
+        retry = dict(num_attempts=1, hosts=['host1'])
+        filter_properties = dict(retry=retry)
+        self.assertFalse(filt_cls.host_passes(host, filter_properties))
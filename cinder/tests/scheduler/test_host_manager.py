@@ -0,0 +1,197 @@
+# Copyright (c) 2011 OpenStack, LLC
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests For HostManager
+"""
+
+import datetime
+
+from cinder import context
+from cinder import db
+from cinder.scheduler import host_manager
+from cinder import test
+from cinder.tests.scheduler import fakes
+from cinder import utils
+
+
+class HostManagerTestCase(test.TestCase):
+    """Test case for HostManager class"""
+
+    def setUp(self):
+        super(HostManagerTestCase, self).setUp()
+        self.host_manager = host_manager.HostManager()
+        self.context = context.get_admin_context()
+
+    def test_update_service_capabilities(self):
+        service_states = self.host_manager.service_states
+        self.assertDictMatch(service_states, {})
+        self.mox.StubOutWithMock(utils, 'utcnow')
+        utils.utcnow().AndReturn(31337)
+        utils.utcnow().AndReturn(31338)
+
+        host1_volume_capabs = dict(free_capacity_gb=4321, timestamp=1)
+        host2_volume_capabs = dict(free_capacity_gb=5432, timestamp=1)
+
+        self.mox.ReplayAll()
+        self.host_manager.update_service_capabilities('volume', 'host1',
+                host1_volume_capabs)
+        self.host_manager.update_service_capabilities('volume', 'host2',
+                host2_volume_capabs)
+
+        # Make sure dictionary isn't re-assigned
+        self.assertEqual(self.host_manager.service_states, service_states)
+        # Make sure original dictionary wasn't copied
+        self.assertEqual(host1_volume_capabs['timestamp'], 1)
+
+        host1_volume_capabs['timestamp'] = 31337
+        host2_volume_capabs['timestamp'] = 31338
+
+        expected = {'host1': {'volume': host1_volume_capabs},
+                    'host2': {'volume': host2_volume_capabs}}
+        self.assertDictMatch(service_states, expected)
+
+    def test_update_service_capabilities_ignores_other_services(self):
+        self.host_manager.update_service_capabilities('compute', 'host1',
+                dict(free_ram_mb=1024))
+        self.assertDictMatch(self.host_manager.service_states, {})
+
+    def test_get_host_list(self):
+        self.host_manager.update_service_capabilities('volume', 'host1', {})
+        self.assertEqual(self.host_manager.get_host_list(),
+                         [{'service': 'volume', 'host_name': 'host1'}])
+
+    def test_get_all_host_states(self):
+        fake_manager = fakes.FakeHostManager()
+        usage = {'host1': (3, 30), 'host3': (1, 100)}
+        fakes.mox_host_manager_db_calls(self.mox, self.context, usage)
+
+        self.mox.ReplayAll()
+        host_states = fake_manager.get_all_host_states(self.context)
+        self.mox.VerifyAll()
+
+        self.assertEqual(len(host_states), 4)
+        host_state_map = fake_manager.host_state_map
+        self.assertEqual(host_state_map['host1'].total_capacity_gb, 1024)
+        self.assertEqual(host_state_map['host1'].free_capacity_gb, 1024)
+        self.assertEqual(host_state_map['host1'].allocated_capacity_gb, 30)
+        self.assertEqual(host_state_map['host1'].volume_count, 3)
+        self.assertEqual(host_state_map['host2'].free_capacity_gb, 300)
+        self.assertEqual(host_state_map['host2'].allocated_capacity_gb, 0)
+        self.assertEqual(host_state_map['host3'].allocated_capacity_gb, 100)
+        self.assertEqual(host_state_map['host3'].service['availability_zone'],
+                         'zone2')
+
+    def test_get_all_host_states_uses_cached_usage(self):
+        fakes.mox_host_manager_db_calls(self.mox, self.context,
+                                        {'host1': (1, 10)})
+        # Second pass only needs the service list.
+        db.service_get_all_by_topic(self.context, 'cinder-volume').AndReturn(
+                fakes.fake_volume_services())
+
+        self.mox.ReplayAll()
+        host_states = self.host_manager.get_all_host_states(self.context)
+        host_state = self.host_manager.host_state_map['host1']
+        host_state.consume_from_volume({'size': 5})
+
+        host_states = self.host_manager.get_all_host_states(self.context)
+        self.mox.VerifyAll()
+
+        host_state = self.host_manager.host_state_map['host1']
+        self.assertEqual(host_state.allocated_capacity_gb, 15)
+        self.assertEqual(host_state.volume_count, 2)
+
+    def test_get_all_host_states_resyncs_usage_after_interval(self):
+        self.flags(scheduler_host_usage_sync_interval=60)
+        fakes.mox_host_manager_db_calls(self.mox, self.context,
+                                        {'host1': (1, 10)})
+        db.service_get_all_by_topic(self.context, 'cinder-volume').AndReturn(
+                fakes.fake_volume_services())
+        db.volume_data_get_for_hosts(self.context).AndReturn(
+                {'host1': (2, 12)})
+
+        self.mox.ReplayAll()
+        self.host_manager.get_all_host_states(self.context)
+        self.host_manager.usage_last_synced -= datetime.timedelta(seconds=61)
+        self.host_manager.get_all_host_states(self.context)
+        self.mox.VerifyAll()
+
+        host_state = self.host_manager.host_state_map['host1']
+        self.assertEqual(host_state.allocated_capacity_gb, 12)
+        self.assertEqual(host_state.volume_count, 2)
+
+    def test_get_all_host_states_drops_down_and_removed_hosts(self):
+        services = fakes.fake_volume_services()
+        services[0]['updated_at'] = datetime.datetime(2000, 1, 1)
+        services[0]['created_at'] = datetime.datetime(2000, 1, 1)
+        self.mox.StubOutWithMock(db, 'service_get_all_by_topic')
+        self.mox.StubOutWithMock(db, 'volume_data_get_for_hosts')
+        db.service_get_all_by_topic(self.context,
+                                    'cinder-volume').AndReturn(services)
+        db.volume_data_get_for_hosts(self.context).AndReturn({})
+        db.service_get_all_by_topic(self.context,
+                                    'cinder-volume').AndReturn(services[1:])
+
+        self.mox.ReplayAll()
+        host_states = self.host_manager.get_all_host_states(self.context)
+        self.assertEqual(sorted(h.host for h in host_states),
+                         ['host2', 'host3', 'host4'])
+        self.assertTrue('host1' in self.host_manager.host_state_map)
+
+        self.host_manager.get_all_host_states(self.context)
+        self.mox.VerifyAll()
+        self.assertFalse('host1' in self.host_manager.host_state_map)
+
+    def test_capability_update_refreshes_existing_host_state(self):
+        fakes.mox_host_manager_db_calls(self.mox, self.context)
+        self.mox.ReplayAll()
+        self.host_manager.get_all_host_states(self.context)
+        self.mox.VerifyAll()
+
+        self.host_manager.update_service_capabilities('volume', 'host2',
+                dict(total_capacity_gb=100, free_capacity_gb=40))
+        host_state = self.host_manager.host_state_map['host2']
+        self.assertEqual(host_state.total_capacity_gb, 100)
+        self.assertEqual(host_state.free_capacity_gb, 40)
+        self.assertEqual(host_state.service['availability_zone'], 'zone1')
+
+
+class HostStateTestCase(test.TestCase):
+    """Test case for HostState class"""
+
+    def test_update_from_volume_capability(self):
+        host = host_manager.HostState('fakehost', 'volume')
+        self.assertEqual(host.free_capacity_gb, None)
+
+        host.update_from_volume_capability(dict(total_capacity_gb=1024,
+                                                free_capacity_gb=512,
+                                                timestamp=None))
+        self.assertEqual(host.total_capacity_gb, 1024)
+        self.assertEqual(host.free_capacity_gb, 512)
+
+    def test_consume_from_volume(self):
+        host = host_manager.HostState('fakehost', 'volume')
+        host.update_from_volume_capability(dict(free_capacity_gb=100))
+        host.update_from_usage(2, 20)
+
+        host.consume_from_volume({'size': 10})
+        self.assertEqual(host.free_capacity_gb, 90)
+        self.assertEqual(host.allocated_capacity_gb, 30)
+        self.assertEqual(host.volume_count, 3)
+
+    def test_consume_from_volume_without_capacity_report(self):
+        host = host_manager.HostState('fakehost', 'volume')
+        host.consume_from_volume({'size': 10})
+        self.assertEqual(host.free_capacity_gb, None)
+        self.assertEqual(host.allocated_capacity_gb, 10)
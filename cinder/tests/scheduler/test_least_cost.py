@@ -0,0 +1,102 @@
+# Copyright 2011 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Tests For Least Cost functions.
+"""
+from cinder import context
+from cinder.scheduler import least_cost
+from cinder import test
+from cinder.tests.scheduler import fakes
+
+
+def offset(hostinfo, options):
+    return hostinfo.free_capacity_gb + 10000
+
+
+def scale(hostinfo, options):
+    return hostinfo.free_capacity_gb * 2
+
+
+class LeastCostTestCase(test.TestCase):
+    def setUp(self):
+        super(LeastCostTestCase, self).setUp()
+        self.host_manager = fakes.FakeHostManager()
+
+    def _get_all_hosts(self):
+        ctxt = context.get_admin_context()
+        fakes.mox_host_manager_db_calls(self.mox, ctxt)
+        self.mox.ReplayAll()
+        host_states = self.host_manager.get_all_host_states(ctxt)
+        self.mox.VerifyAll()
+        self.mox.ResetAll()
+        return host_states
+
+    def test_weighted_sum_happy_day(self):
+        fn_tuples = [(1.0, offset), (1.0, scale)]
+        hostinfo_list = self._get_all_hosts()
+
+        # host1: free_capacity_gb=1024
+        # host2: free_capacity_gb=300
+        # host3: free_capacity_gb=512
+        # host4: free_capacity_gb=200
+
+        # [offset, scale]=
+        # [11024, 2048]
+        # [10300, 600]
+        # [10512, 1024]
+        # [10200, 400]
+
+        # so, host4 should win:
+        options = {}
+        weighted_host = least_cost.weighted_sum(fn_tuples, hostinfo_list,
+                options)
+        self.assertEqual(weighted_host.weight, 10600)
+        self.assertEqual(weighted_host.host_state.host, 'host4')
+
+    def test_weighted_sum_single_function(self):
+        fn_tuples = [(1.0, offset), ]
+        hostinfo_list = self._get_all_hosts()
+
+        # so, host4 should win:
+        options = {}
+        weighted_host = least_cost.weighted_sum(fn_tuples, hostinfo_list,
+                options)
+        self.assertEqual(weighted_host.weight, 10200)
+        self.assertEqual(weighted_host.host_state.host, 'host4')
+
+    def test_volume_free_capacity_cost_fn_spreads(self):
+        fn_tuples = [(-1.0, least_cost.volume_free_capacity_cost_fn)]
+        hostinfo_list = self._get_all_hosts()
+
+        weighted_host = least_cost.weighted_sum(fn_tuples, hostinfo_list, {})
+        self.assertEqual(weighted_host.weight, -1024)
+        self.assertEqual(weighted_host.host_state.host, 'host1')
+
+    def test_volume_allocated_ratio_cost_fn(self):
+        host_state = fakes.FakeHostState('host1', 'volume',
+                                         {'total_capacity_gb': 200,
+                                          'allocated_capacity_gb': 50})
+        self.assertEqual(
+                least_cost.volume_allocated_ratio_cost_fn(host_state, {}),
+                0.25)
+
+        host_state.total_capacity_gb = 'unknown'
+        self.assertEqual(
+                least_cost.volume_allocated_ratio_cost_fn(host_state, {}), 0)
+
+    def test_volume_count_cost_fn(self):
+        host_state = fakes.FakeHostState('host1', 'volume',
+                                         {'volume_count': 7})
+        self.assertEqual(least_cost.volume_count_cost_fn(host_state, {}), 7)
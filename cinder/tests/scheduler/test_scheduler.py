@@ -22,6 +22,8 @@ Tests For Scheduler
 import datetime
 import json
 
+import mox
+
 from cinder import context
 from cinder import db
 from cinder import exception
@@ -31,6 +33,7 @@ from cinder import rpc
 from cinder.rpc import common as rpc_common
 from cinder.scheduler import driver
 from cinder.scheduler import manager
+from cinder.scheduler import simple
 from cinder import test
 from cinder.tests.scheduler import fakes
 from cinder import utils
@@ -132,6 +135,76 @@ class SchedulerManagerTestCase(test.TestCase):
         self.manager.noexist(self.context, self.topic,
                 *self.fake_args, **self.fake_kwargs)
 
+    def test_create_volume_no_valid_host_puts_volume_in_error(self):
+        """Test that NoValidHost is caught and the volume is set to error"""
+        fake_volume_id = 1
+        request_spec = {'volume_properties': {'size': 1}}
+
+        self._mox_schedule_method_helper('schedule_create_volume')
+        self.mox.StubOutWithMock(db, 'volume_update')
+        self.mox.StubOutWithMock(notifier, 'notify')
+
+        self.manager.driver.schedule_create_volume(self.context,
+                fake_volume_id, snapshot_id=None, request_spec=request_spec,
+                filter_properties={}).AndRaise(exception.NoValidHost(
+                        reason=''))
+        db.volume_update(self.context, fake_volume_id, {'status': 'error'})
+        notifier.notify(mox.IgnoreArg(), 'scheduler.create_volume',
+                        notifier.ERROR, mox.IgnoreArg())
+
+        self.mox.ReplayAll()
+        self.manager.create_volume(self.context, self.topic, fake_volume_id,
+                request_spec=request_spec, filter_properties={})
+
+    def test_create_volume_exception_puts_volume_in_error(self):
+        """Test that other exceptions also set the volume to error"""
+        fake_volume_id = 1
+
+        self._mox_schedule_method_helper('schedule_create_volume')
+        self.mox.StubOutWithMock(db, 'volume_update')
+        self.mox.StubOutWithMock(notifier, 'notify')
+
+        self.manager.driver.schedule_create_volume(self.context,
+                fake_volume_id, snapshot_id=None, request_spec=None,
+                filter_properties=None).AndRaise(self.AnException('!'))
+        db.volume_update(self.context, fake_volume_id, {'status': 'error'})
+        notifier.notify(mox.IgnoreArg(), 'scheduler.create_volume',
+                        notifier.ERROR, mox.IgnoreArg())
+
+        self.mox.ReplayAll()
+        self.assertRaises(self.AnException, self.manager.create_volume,
+                          self.context, self.topic, fake_volume_id)
+
+    def test_create_volumes_no_valid_host_puts_volumes_in_error(self):
+        """Test that NoValidHost sets every volume in the batch to error"""
+        self._mox_schedule_method_helper('schedule_create_volumes')
+        self.mox.StubOutWithMock(db, 'volume_update')
+        self.mox.StubOutWithMock(notifier, 'notify')
+
+        self.manager.driver.schedule_create_volumes(self.context, [1, 2],
+                snapshot_id=None, request_spec=None,
+                filter_properties=None).AndRaise(exception.NoValidHost(
+                        reason=''))
+        for volume_id in (1, 2):
+            db.volume_update(self.context, volume_id, {'status': 'error'})
+            notifier.notify(mox.IgnoreArg(), 'scheduler.create_volume',
+                            notifier.ERROR, mox.IgnoreArg())
+
+        self.mox.ReplayAll()
+        self.manager.create_volumes(self.context, self.topic, [1, 2])
+
+    def test_create_volumes_fallback(self):
+        """Drivers without batch support get one create_volume each"""
+        self.mox.StubOutWithMock(self.manager, 'create_volume')
+        for volume_id in (1, 2):
+            self.manager.create_volume(self.context, self.topic, volume_id,
+                    snapshot_id=None, request_spec={'volume_properties': {}},
+                    filter_properties=None)
+
+        self.mox.ReplayAll()
+        self.manager.create_volumes(self.context, self.topic, [1, 2],
+                request_spec={'volume_properties': {}})
+
     def _mox_schedule_method_helper(self, method_name):
         # Make sure the method exists that we're going to test call
         def stub_method(*args, **kwargs):
@@ -222,6 +295,114 @@ class SchedulerDriverBaseTestCase(SchedulerTestCase):
                          *fake_args, **fake_kwargs)
 
 
+class SimpleSchedulerTestCase(test.TestCase):
+    """Test case for SimpleScheduler volume placement"""
+
+    def setUp(self):
+        super(SimpleSchedulerTestCase, self).setUp()
+        self.driver = simple.SimpleScheduler()
+        self.driver.host_manager = fakes.FakeHostManager()
+        self.context = context.get_admin_context()
+
+    def _stub_volume(self, size, availability_zone=None):
+        volume = {'id': 31337, 'size': size,
+                  'availability_zone': availability_zone}
+        db.volume_get(self.context, 31337).AndReturn(volume)
+
+    def test_schedule_create_volume_least_allocated(self):
+        fakes.mox_host_manager_db_calls(self.mox, self.context,
+                {'host1': (2, 20), 'host2': (1, 10), 'host3': (1, 15),
+                 'host4': (2, 50)})
+        self.mox.StubOutWithMock(db, 'volume_get')
+        self.mox.StubOutWithMock(driver, 'cast_to_volume_host')
+        self._stub_volume(10)
+        driver.cast_to_volume_host(self.context, 'host2', 'create_volume',
+                                   volume_id=31337)
+        # host2 now has 20GB allocated, so host3 is the least loaded.
+        db.service_get_all_by_topic(mox.IgnoreArg(),
+                FLAGS.volume_topic).AndReturn(fakes.fake_volume_services())
+        self._stub_volume(10)
+        driver.cast_to_volume_host(self.context, 'host3', 'create_volume',
+                                   volume_id=31337)
+
+        self.mox.ReplayAll()
+        self.driver.schedule_create_volume(self.context, 31337)
+        self.driver.schedule_create_volume(self.context, 31337)
+        self.mox.VerifyAll()
+
+        host_state_map = self.driver.host_manager.host_state_map
+        self.assertEqual(host_state_map['host2'].allocated_capacity_gb, 20)
+        self.assertEqual(host_state_map['host2'].free_capacity_gb, 290)
+        self.assertEqual(host_state_map['host3'].volume_count, 2)
+
+    def test_schedule_create_volume_skips_full_hosts(self):
+        fakes.mox_host_manager_db_calls(self.mox, self.context,
+                {'host1': (1, 100), 'host3': (1, 100), 'host4': (1, 100)})
+        self.mox.StubOutWithMock(db, 'volume_get')
+        self.mox.StubOutWithMock(driver, 'cast_to_volume_host')
+        self._stub_volume(600)
+        driver.cast_to_volume_host(self.context, 'host1', 'create_volume',
+                                   volume_id=31337)
+
+        self.mox.ReplayAll()
+        self.driver.schedule_create_volume(self.context, 31337)
+
+    def test_schedule_create_volume_availability_zone(self):
+        fakes.mox_host_manager_db_calls(self.mox, self.context)
+        self.mox.StubOutWithMock(db, 'volume_get')
+        self.mox.StubOutWithMock(driver, 'cast_to_volume_host')
+        self._stub_volume(300, availability_zone='zone2')
+        driver.cast_to_volume_host(self.context, 'host3', 'create_volume',
+                                   volume_id=31337)
+
+        self.mox.ReplayAll()
+        self.driver.schedule_create_volume(self.context, 31337)
+
+    def test_schedule_create_volume_over_max_gigabytes(self):
+        self.flags(max_gigabytes=100)
+        fakes.mox_host_manager_db_calls(self.mox, self.context,
+                {'host1': (1, 95), 'host2': (1, 95), 'host3': (1, 95),
+                 'host4': (1, 95)})
+        self.mox.StubOutWithMock(db, 'volume_get')
+        self._stub_volume(10)
+
+        self.mox.ReplayAll()
+        self.assertRaises(exception.NoValidHost,
+                          self.driver.schedule_create_volume,
+                          self.context, 31337)
+
+    def test_schedule_create_volumes_single_pass(self):
+        fakes.mox_host_manager_db_calls(self.mox, self.context,
+                {'host1': (2, 22), 'host2': (1, 10), 'host3': (1, 15),
+                 'host4': (2, 50)})
+        self.mox.StubOutWithMock(db, 'volume_get')
+        self.mox.StubOutWithMock(driver, 'cast_to_volume_hosts')
+        self._stub_volume(10)
+        # host states are read once and each placement is consumed
+        # before the next volume is placed.
+        driver.cast_to_volume_hosts(self.context, 'create_volume',
+                [(host, {'volume_id': volume_id})
+                 for volume_id, host in ((31337, 'host2'), (2, 'host3'),
+                                         (3, 'host2'), (4, 'host1'))])
+
+        self.mox.ReplayAll()
+        self.driver.schedule_create_volumes(self.context, [31337, 2, 3, 4])
+
+    def test_schedule_create_volumes_all_or_nothing(self):
+        self.flags(max_gigabytes=100)
+        fakes.mox_host_manager_db_calls(self.mox, self.context,
+                {'host1': (1, 60), 'host2': (1, 95), 'host3': (1, 95),
+                 'host4': (1, 95)})
+        self.mox.StubOutWithMock(db, 'volume_get')
+        self.mox.StubOutWithMock(driver, 'cast_to_volume_hosts')
+        self._stub_volume(20)
+
+        self.mox.ReplayAll()
+        self.assertRaises(exception.NoValidHost,
+                          self.driver.schedule_create_volumes,
+                          self.context, [31337, 2, 3])
+
+
 class SchedulerDriverModuleTestCase(test.TestCase):
     """Test case for scheduler driver module methods"""
 
@@ -292,6 +473,32 @@ class SchedulerDriverModuleTestCase(test.TestCase):
         driver.cast_to_volume_host(self.context, host, method,
                 update_db=False, **fake_kwargs)
 
+    def test_cast_to_volume_hosts(self):
+        method = 'fake_method'
+
+        self.mox.StubOutWithMock(utils, 'utcnow')
+        self.mox.StubOutWithMock(db, 'volume_update')
+        self.mox.StubOutWithMock(db, 'queue_get_for')
+        self.mox.StubOutWithMock(rpc, 'cast_many')
+
+        utils.utcnow().AndReturn('fake-now')
+        db.volume_update(self.context, 1,
+                {'host': 'fake_host1', 'scheduled_at': 'fake-now'})
+        db.queue_get_for(self.context,
+                         FLAGS.volume_topic, 'fake_host1').AndReturn('q1')
+        db.volume_update(self.context, 2,
+                {'host': 'fake_host2', 'scheduled_at': 'fake-now'})
+        db.queue_get_for(self.context,
+                         FLAGS.volume_topic, 'fake_host2').AndReturn('q2')
+        rpc.cast_many(self.context,
+                [('q1', {'method': method, 'args': {'volume_id': 1}}),
+                 ('q2', {'method': method, 'args': {'volume_id': 2}})])
+
+        self.mox.ReplayAll()
+        driver.cast_to_volume_hosts(self.context, method,
+                [('fake_host1', {'volume_id': 1}),
+                 ('fake_host2', {'volume_id': 2})])
+
     def test_cast_to_host_volume_topic(self):
         host = 'fake_host1'
         method = 'fake_method'
@@ -15,6 +15,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import httplib
+import socket
+
 from cinder import exception
 from cinder import log as logging
 from cinder.volume import san
@@ -23,6 +26,48 @@ from cinder import test
 LOG = logging.getLogger(__name__)
 
 
+class FakeResponse(object):
+    status = 200
+
+    def read(self):
+        return '{"result": {}}'
+
+
+class FakeHTTPConnection(object):
+    """A reused keep-alive connection failing as scripted."""
+
+    def __init__(self, send_errors=None, response_errors=None):
+        self.sock = object()
+        self.send_errors = send_errors or []
+        self.response_errors = response_errors or []
+        self.requests = 0
+        self.closed = 0
+
+    def request(self, method, url, body, headers):
+        self.requests += 1
+        if self.send_errors:
+            raise self.send_errors.pop(0)
+
+    def getresponse(self):
+        if self.response_errors:
+            raise self.response_errors.pop(0)
+        return FakeResponse()
+
+    def close(self):
+        self.closed += 1
+
+
+class FakeConnectionPool(object):
+    def __init__(self, connection):
+        self.connection = connection
+
+    def get(self):
+        return self.connection
+
+    def put(self, connection):
+        pass
+
+
 class SolidFireVolumeTestCase(test.TestCase):
     def setUp(self):
         super(SolidFireVolumeTestCase, self).setUp()
@@ -79,6 +124,22 @@ class SolidFireVolumeTestCase(test.TestCase):
                                            'qos':None}]}}
             return result
 
+        elif method is 'ListActiveVolumes':
+            LOG.info('Called Fake ListActiveVolumes...')
+            result = {'result': {'volumes': [{
+                                           'volumeID': params['startVolumeID'],
+                                           'name': 'testvol',
+                                           'accountID': 25,
+                                           'iqn': 'testvol.5',
+                                           'sliceCount': 1,
+                                           'totalSize': 1048576 * 1024,
+                                           'enable512e': False,
+                                           'access': "readWrite",
+                                           'status': "active",
+                                           'attributes':None,
+                                           'qos':None}]}}
+            return result
+
         else:
             LOG.error('Crap, unimplemented API call in Fake:%s' % method)
 
@@ -97,6 +158,52 @@ class SolidFireVolumeTestCase(test.TestCase):
                    'size': 1}
         sfv = san.SolidFireSanISCSIDriver()
         model_update = sfv.create_volume(testvol)
+        self.assertEqual(model_update['provider_location'],
+                         '1.1.1.1:3260 '
+                         'iqn.2010-01.com.solidfire:testvol.5 0')
+
+    def test_create_volume_caches_lookups(self):
+        calls = []
+
+        def _fake_issue_api_request(obj, method, params):
+            calls.append(method)
+            return self.fake_issue_api_request(method, params)
+
+        self.stubs.Set(san.SolidFireSanISCSIDriver, '_issue_api_request',
+                       _fake_issue_api_request)
+        testvol = {'project_id': 'testprjid',
+                   'name': 'testvol',
+                   'size': 1}
+        sfv = san.SolidFireSanISCSIDriver()
+        sfv.create_volume(testvol)
+        del calls[:]
+        sfv.create_volume(testvol)
+        self.assertEqual(calls, ['CreateVolume', 'ListActiveVolumes'])
+
+    def test_create_volume_uses_create_result(self):
+        calls = []
+
+        def _fake_issue_api_request(obj, method, params):
+            calls.append(method)
+            if method is 'CreateVolume':
+                return {'result': {'volumeID': 5,
+                                   'volume': {'volumeID': 5,
+                                              'iqn': 'testvol.5'}},
+                        'id': 1}
+            return self.fake_issue_api_request(method, params)
+
+        self.stubs.Set(san.SolidFireSanISCSIDriver, '_issue_api_request',
+                       _fake_issue_api_request)
+        testvol = {'project_id': 'testprjid',
+                   'name': 'testvol',
+                   'size': 1}
+        sfv = san.SolidFireSanISCSIDriver()
+        model_update = sfv.create_volume(testvol)
+        self.assertFalse('ListActiveVolumes' in calls)
+        self.assertFalse('ListVolumesForAccount' in calls)
+        self.assertEqual(model_update['provider_location'],
+                         '1.1.1.1:3260 '
+                         'iqn.2010-01.com.solidfire:testvol.5 0')
 
     def test_create_volume_fails(self):
         self.stubs.Set(san.SolidFireSanISCSIDriver, '_issue_api_request',
@@ -184,3 +291,39 @@ class SolidFireVolumeTestCase(test.TestCase):
         sfv = san.SolidFireSanISCSIDriver()
         self.assertRaises(exception.SolidFireAPIException,
                           sfv._get_cluster_info)
+
+    def _api_driver(self, connection):
+        sfv = san.SolidFireSanISCSIDriver()
+        sfv.connpool = FakeConnectionPool(connection)
+        return sfv
+
+    def test_issue_api_request_retries_closed_connection(self):
+        conn = FakeHTTPConnection(
+            response_errors=[httplib.BadStatusLine("''")])
+        sfv = self._api_driver(conn)
+        self.assertEqual(sfv._issue_api_request('GetClusterInfo', None),
+                         {'result': {}})
+        self.assertEqual(conn.requests, 2)
+
+    def test_issue_api_request_retries_send_error(self):
+        conn = FakeHTTPConnection(send_errors=[socket.error()])
+        sfv = self._api_driver(conn)
+        sfv._issue_api_request('GetClusterInfo', None)
+        self.assertEqual(conn.requests, 2)
+
+    def test_issue_api_request_timeout_not_retried(self):
+        conn = FakeHTTPConnection(response_errors=[socket.timeout()])
+        sfv = self._api_driver(conn)
+        self.assertRaises(socket.timeout, sfv._issue_api_request,
+                          'CreateVolume', {})
+        self.assertEqual(conn.requests, 1)
+        self.assertEqual(conn.closed, 1)
+
+    def test_issue_api_request_new_connection_not_retried(self):
+        conn = FakeHTTPConnection(
+            response_errors=[httplib.BadStatusLine("''")])
+        conn.sock = None
+        sfv = self._api_driver(conn)
+        self.assertRaises(httplib.BadStatusLine, sfv._issue_api_request,
+                          'CreateVolume', {})
+        self.assertEqual(conn.requests, 1)
@@ -18,11 +18,16 @@
 
 """Unit tests for the DB API"""
 
+import datetime
+import functools
+
+from cinder.api.openstack import common
 from cinder import test
 from cinder import context
 from cinder import db
 from cinder import exception
 from cinder import flags
+from cinder import utils
 
 FLAGS = flags.FLAGS
 
@@ -329,3 +334,202 @@ class AggregateDBApiTestCase(test.TestCase):
         self.assertRaises(exception.AggregateHostNotFound,
                           db.aggregate_host_delete,
                           ctxt, result.id, _get_fake_aggr_hosts()[0])
+
+
+class QuotaReserveDBApiTestCase(test.TestCase):
+    def setUp(self):
+        super(QuotaReserveDBApiTestCase, self).setUp()
+        self.context = context.RequestContext('fake', 'fake')
+        self.quotas = {'volumes': 5, 'gigabytes': 100}
+        self.expire = utils.utcnow() + datetime.timedelta(seconds=60)
+
+    def _create_volume(self, size):
+        return db.volume_create(context.get_admin_context(),
+                                {'project_id': 'fake', 'size': size})
+
+    def _reserve(self, **deltas):
+        return db.quota_reserve(self.context, self.quotas, deltas,
+                                self.expire, 0, 0)
+
+    def _usages(self):
+        return db.quota_usage_get_all_by_project(self.context, 'fake')
+
+    def test_reserve_syncs_new_usage(self):
+        self._create_volume(10)
+        self._create_volume(20)
+        reservations = self._reserve(volumes=1, gigabytes=5)
+        self.assertEqual(len(reservations), 2)
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 2, 'reserved': 1})
+        self.assertEqual(usages['gigabytes'], {'in_use': 30, 'reserved': 5})
+
+    def test_reserve_uses_counters_after_sync(self):
+        self._reserve(volumes=1, gigabytes=5)
+        # Volumes created behind the counters' back are not recounted.
+        self._create_volume(10)
+        self._reserve(volumes=1, gigabytes=5)
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 0, 'reserved': 2})
+        self.assertEqual(usages['gigabytes'], {'in_use': 0, 'reserved': 10})
+
+    def test_reserve_over_quota(self):
+        self._create_volume(90)
+        try:
+            self._reserve(volumes=1, gigabytes=20)
+            self.fail('OverQuota not raised')
+        except exception.OverQuota as e:
+            self.assertEqual(e.kwargs['overs'], ['gigabytes'])
+            self.assertEqual(e.kwargs['usages']['gigabytes'],
+                             {'in_use': 90, 'reserved': 0})
+        usages = self._usages()
+        self.assertEqual(usages['gigabytes'], {'in_use': 90, 'reserved': 0})
+
+    def test_reserve_unlimited(self):
+        self.quotas['gigabytes'] = -1
+        self._reserve(volumes=1, gigabytes=1000)
+
+    def test_commit(self):
+        reservations = self._reserve(volumes=1, gigabytes=5)
+        db.reservation_commit(self.context, reservations)
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 1, 'reserved': 0})
+        self.assertEqual(usages['gigabytes'], {'in_use': 5, 'reserved': 0})
+
+        reservations = self._reserve(volumes=-1, gigabytes=-5)
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 1, 'reserved': 0})
+        db.reservation_commit(self.context, reservations)
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 0, 'reserved': 0})
+        self.assertEqual(usages['gigabytes'], {'in_use': 0, 'reserved': 0})
+
+    def test_rollback(self):
+        reservations = self._reserve(volumes=1, gigabytes=5)
+        db.reservation_rollback(self.context, reservations)
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 0, 'reserved': 0})
+        self.assertEqual(usages['gigabytes'], {'in_use': 0, 'reserved': 0})
+
+    def test_expire(self):
+        self.expire = utils.utcnow() - datetime.timedelta(seconds=1)
+        self._reserve(volumes=1, gigabytes=5)
+        db.reservation_expire(context.get_admin_context())
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 0, 'reserved': 0})
+        self.assertEqual(usages['gigabytes'], {'in_use': 0, 'reserved': 0})
+
+    def test_until_refresh(self):
+        db.quota_reserve(self.context, self.quotas,
+                         {'volumes': 1, 'gigabytes': 5}, self.expire, 1, 0)
+        self._create_volume(10)
+        db.quota_reserve(self.context, self.quotas,
+                         {'volumes': 1, 'gigabytes': 5}, self.expire, 1, 0)
+        # The second reservation ran the refresh countdown down to
+        # zero, so it recounted the volume created in between.
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 1, 'reserved': 2})
+
+
+class VolumeListDBApiTestCase(test.TestCase):
+    def setUp(self):
+        super(VolumeListDBApiTestCase, self).setUp()
+        self.context = context.get_admin_context()
+        now = utils.utcnow()
+        self.volumes = []
+        for i in xrange(4):
+            created_at = now + datetime.timedelta(seconds=i)
+            self.volumes.append(db.volume_create(self.context,
+                    {'project_id': 'fake', 'size': 1,
+                     'display_name': 'vol%d' % (i % 2),
+                     'status': 'available' if i < 3 else 'error',
+                     'host': 'host%d' % (i % 2),
+                     'created_at': created_at,
+                     'metadata': {'tier': 'gold' if i % 2 else 'silver'}}))
+
+    def _ids(self, volumes):
+        return [volume['id'] for volume in volumes]
+
+    def test_volume_get_all_sorted_newest_first(self):
+        volumes = db.volume_get_all(self.context)
+        self.assertEqual(self._ids(volumes),
+                         self._ids(reversed(self.volumes)))
+
+    def test_volume_get_all_marker_and_limit(self):
+        volumes = db.volume_get_all(self.context, sort_key='created_at',
+                                    sort_dir='asc', limit=2)
+        self.assertEqual(self._ids(volumes), self._ids(self.volumes[:2]))
+        volumes = db.volume_get_all(self.context,
+                                    marker=volumes[-1]['id'],
+                                    sort_key='created_at', sort_dir='asc')
+        self.assertEqual(self._ids(volumes), self._ids(self.volumes[2:]))
+
+    def test_volume_get_all_marker_not_found(self):
+        self.assertRaises(exception.MarkerNotFound, db.volume_get_all,
+                          self.context, marker='nonexistent')
+
+    def test_volume_get_all_deleted_marker(self):
+        db.volume_destroy(self.context, self.volumes[1]['id'])
+        volumes = db.volume_get_all(self.context,
+                                    marker=self.volumes[1]['id'],
+                                    sort_key='created_at', sort_dir='asc')
+        self.assertEqual(self._ids(volumes), self._ids(self.volumes[2:]))
+
+    def test_volume_stream_survives_deleted_page_end(self):
+        fetch = functools.partial(db.volume_get_all, self.context,
+                                  sort_key='created_at', sort_dir='asc')
+        volumes = common.iter_pages(fetch, page_size=2)
+        seen = [volumes.next()['id'], volumes.next()['id']]
+        # The last item of the first page goes away mid-stream
+        db.volume_destroy(self.context, seen[-1])
+        seen.extend(volume['id'] for volume in volumes)
+        self.assertEqual(seen, self._ids(self.volumes))
+
+    def test_volume_get_all_invalid_sort(self):
+        self.assertRaises(exception.InvalidSortKey, db.volume_get_all,
+                          self.context, sort_key='bogus')
+        self.assertRaises(exception.InvalidInput, db.volume_get_all,
+                          self.context, sort_dir='sideways')
+
+    def test_volume_get_all_filters(self):
+        volumes = db.volume_get_all(self.context, sort_dir='asc',
+                                    filters={'display_name': 'vol1',
+                                             'status': 'available'})
+        self.assertEqual(self._ids(volumes), [self.volumes[1]['id']])
+        volumes = db.volume_get_all(self.context, sort_dir='asc',
+                                    filters={'host': 'host0'})
+        self.assertEqual(self._ids(volumes),
+                         self._ids([self.volumes[0], self.volumes[2]]))
+
+    def test_volume_get_all_metadata_filter(self):
+        filters = {'metadata': {'tier': 'gold'}}
+        volumes = db.volume_get_all(self.context, sort_dir='asc',
+                                    filters=filters)
+        self.assertEqual(self._ids(volumes),
+                         self._ids([self.volumes[1], self.volumes[3]]))
+        # The caller's filters are left alone.
+        self.assertEqual(filters, {'metadata': {'tier': 'gold'}})
+
+    def test_volume_get_all_by_project(self):
+        db.volume_create(self.context, {'project_id': 'other', 'size': 1})
+        ctxt = context.RequestContext('fake', 'fake')
+        volumes = db.volume_get_all_by_project(ctxt, 'fake', limit=1,
+                                               filters={'status': 'error'})
+        self.assertEqual(self._ids(volumes), [self.volumes[3]['id']])
+
+    def test_snapshot_get_all_paged_and_filtered(self):
+        snapshots = []
+        for i in xrange(3):
+            snapshots.append(db.snapshot_create(self.context,
+                    {'project_id': 'fake',
+                     'volume_id': self.volumes[i % 2]['id'],
+                     'status': 'available',
+                     'created_at': utils.utcnow() +
+                                   datetime.timedelta(seconds=i)}))
+        result = db.snapshot_get_all(self.context, sort_dir='asc', limit=2,
+                filters={'volume_id': self.volumes[0]['id']})
+        self.assertEqual(self._ids(result),
+                         self._ids([snapshots[0], snapshots[2]]))
+        result = db.snapshot_get_all_by_project(self.context, 'fake',
+                                                marker=snapshots[2]['id'])
+        self.assertEqual(self._ids(result),
+                         self._ids([snapshots[1], snapshots[0]]))
@@ -0,0 +1,86 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2012 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Unit tests for the SQLAlchemy session handling."""
+
+import sqlite3
+import time
+
+from cinder.db.sqlalchemy import session
+from cinder import test
+
+
+class FakeConnectionRecord(object):
+    def __init__(self):
+        self.info = {}
+
+
+class FakeCursor(object):
+    def __init__(self, statements):
+        self.statements = statements
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+
+class FakeConnection(object):
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self.statements)
+
+
+class MySQLPingListenerTestCase(test.TestCase):
+    def setUp(self):
+        super(MySQLPingListenerTestCase, self).setUp()
+        self.time = 100.0
+        self.stubs.Set(time, 'time', lambda: self.time)
+        self.con = FakeConnection()
+        self.record = FakeConnectionRecord()
+
+    def test_ping_every_checkout(self):
+        listener = session.MySQLPingListener()
+        listener.connect(self.con, self.record)
+        listener.checkout(self.con, self.record, None)
+        listener.checkout(self.con, self.record, None)
+        self.assertEqual(self.con.statements, ['select 1', 'select 1'])
+
+    def test_ping_idle_connections(self):
+        listener = session.MySQLPingListener(10)
+        listener.connect(self.con, self.record)
+        listener.checkout(self.con, self.record, None)
+        self.assertEqual(self.con.statements, [])
+
+        listener.checkin(self.con, self.record)
+        self.time += 11
+        listener.checkout(self.con, self.record, None)
+        self.assertEqual(self.con.statements, ['select 1'])
+
+
+class TimedQueuePoolTestCase(test.TestCase):
+    def test_pool_stats(self):
+        pool = session.TimedQueuePool(lambda: sqlite3.connect(':memory:'),
+                                      pool_size=1, max_overflow=0)
+        pool.connect().close()
+        self.stubs.Set(session, '_ENGINE', type('Engine', (), {'pool': pool}))
+
+        stats = session.get_pool_stats()
+        self.assertEqual(stats['checkouts'], 1)
+        self.assertEqual(stats['checked_out'], 0)
+        self.assertEqual(stats['size'], 1)
+        self.assertTrue(stats['max_wait_time'] >= 0)
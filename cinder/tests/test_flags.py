@@ -144,3 +144,40 @@ class FlagsTestCase(test.TestCase):
         self.FLAGS.register_opt(cfg.StrOpt('blaa',
                                            default='$foo$bar', help='desc'))
         self.assertEqual(self.FLAGS.blaa, 'foobar')
+
+    def test_cached_values(self):
+        self.FLAGS.register_opt(cfg.StrOpt('foo', default='foo', help='desc'))
+        self.FLAGS.register_opt(cfg.StrOpt('bar',
+                                           default='$foo', help='desc'))
+        self.assertEqual(self.FLAGS.bar, 'foo')
+        self.assertEqual(self.FLAGS.bar, 'foo')
+        stats = self.FLAGS.cache_stats()
+        self.assertEqual(stats['hits'], 1)
+
+        self.FLAGS.set_override('foo', 'blaa')
+        self.assertEqual(self.FLAGS.bar, 'blaa')
+        self.FLAGS.clear_override('foo')
+        self.assertEqual(self.FLAGS.bar, 'foo')
+        self.FLAGS.set_default('foo', 'baz')
+        self.assertEqual(self.FLAGS.bar, 'baz')
+        self.FLAGS.clear_default('foo')
+        self.assertEqual(self.FLAGS.bar, 'foo')
+
+    def test_cached_group_values(self):
+        group = cfg.OptGroup('grp')
+        self.FLAGS.register_group(group)
+        self.FLAGS.register_opt(cfg.MultiStrOpt('foo', default=['bar'],
+                                                help='desc'), group=group)
+        self.assertEqual(self.FLAGS.grp.foo, ['bar'])
+        self.FLAGS.grp.foo.append('blaa')
+        self.assertEqual(self.FLAGS.grp.foo, ['bar'])
+
+        self.FLAGS.set_override('foo', ['blaa'], group='grp')
+        self.assertEqual(self.FLAGS.grp.foo, ['blaa'])
+
+    def test_cache_cleared_on_parse(self):
+        self.FLAGS.register_cli_opt(cfg.StrOpt('foo', default='foo',
+                                               help='desc'))
+        self.assertEqual(self.FLAGS.foo, 'foo')
+        self.FLAGS(['flags_test', '--foo=bar'])
+        self.assertEqual(self.FLAGS.foo, 'bar')
@@ -23,8 +23,10 @@ import BaseHTTPServer
 import httplib
 import StringIO
 
+import eventlet
 from lxml import etree
 
+from cinder import exception
 from cinder import log as logging
 from cinder import test
 from cinder.volume import netapp
@@ -925,3 +927,49 @@ class NetAppDriverTestCase(test.TestCase):
         properties = connection_info['data']
         self.driver.terminate_connection(volume, connector)
         self.driver._remove_destroy(self.VOLUME_NAME, self.PROJECT_ID)
+
+
+class FakeJobEvent(object):
+    def __init__(self, event_type, status='normal'):
+        self.EventType = event_type
+        self.EventStatus = status
+        self.ErrorMessage = 'failed'
+
+
+class DfmJobTrackerTestCase(test.TestCase):
+    """Test case for DfmJobTracker"""
+
+    def setUp(self):
+        super(DfmJobTrackerTestCase, self).setUp()
+        self.flags(netapp_job_poll_interval=0,
+                   netapp_job_poll_max_interval=0)
+        self.progress = {}
+        self.polls = []
+        self.tracker = netapp.DfmJobTracker(self._get_progress)
+
+    def _get_progress(self, job_id, seen):
+        self.polls.append((job_id, seen))
+        if not self.progress[job_id]:
+            return []
+        return self.progress[job_id].pop(0)
+
+    def test_wait_resumes_from_seen_events(self):
+        self.progress[1] = [[FakeJobEvent('lun-create')], [],
+                            [FakeJobEvent('job-end')]]
+        events = self.tracker.wait(1)
+        self.assertEqual([ev.EventType for ev in events],
+                         ['lun-create', 'job-end'])
+        self.assertEqual(self.polls, [(1, 0), (1, 1), (1, 1)])
+
+    def test_wait_shares_poller(self):
+        self.progress[1] = [[], [FakeJobEvent('job-end')]]
+        self.progress[2] = [[FakeJobEvent('job-end')]]
+        waiter = eventlet.spawn(self.tracker.wait, 1)
+        self.tracker.wait(2)
+        self.assertEqual(len(waiter.wait()), 1)
+        self.assertEqual(sorted(self.polls), [(1, 0), (1, 0), (2, 0)])
+        self.assertEqual(self.tracker._poller, None)
+
+    def test_wait_job_error(self):
+        self.progress[1] = [[FakeJobEvent('lun-create', status='error')]]
+        self.assertRaises(exception.Error, self.tracker.wait, 1)
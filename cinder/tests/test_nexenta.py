@@ -20,7 +20,8 @@ Unit tests for OpenStack Cinder volume driver
 """
 
 import base64
-import urllib2
+import httplib
+import socket
 
 import cinder.flags
 import cinder.test
@@ -208,24 +209,23 @@ class TestNexentaJSONRPC(cinder.test.TestCase):
     HEADERS = {'Authorization': 'Basic %s' % (base64.b64encode(
                                                 ':'.join((USER, PASSWORD))),),
                'Content-Type': 'application/json'}
-    REQUEST = 'the request'
+    REQUEST = '{"object": null, "params": ["arg1", "arg2"], "method": null}'
 
     def setUp(self):
         super(TestNexentaJSONRPC, self).setUp()
         self.proxy = jsonrpc.NexentaJSONProxy(
             self.URL, self.USER, self.PASSWORD, auto=True)
-        self.mox.StubOutWithMock(urllib2, 'Request', True)
-        self.mox.StubOutWithMock(urllib2, 'urlopen')
+        self.mox.StubOutWithMock(httplib, 'HTTPConnection')
+        self.mox.StubOutWithMock(httplib, 'HTTPSConnection')
+        self.conn_mock = self.mox.CreateMockAnything()
+        self.conn_mock.sock = None
         self.resp_mock = self.mox.CreateMockAnything()
-        self.resp_info_mock = self.mox.CreateMockAnything()
-        self.resp_mock.info().AndReturn(self.resp_info_mock)
-        urllib2.urlopen(self.REQUEST).AndReturn(self.resp_mock)
+        self.resp_mock.status = 200
 
     def test_call(self):
-        urllib2.Request(self.URL,
-                '{"object": null, "params": ["arg1", "arg2"], "method": null}',
-                self.HEADERS).AndReturn(self.REQUEST)
-        self.resp_info_mock.status = ''
+        httplib.HTTPConnection('example.com').AndReturn(self.conn_mock)
+        self.conn_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+        self.conn_mock.getresponse().AndReturn(self.resp_mock)
         self.resp_mock.read().AndReturn(
                 '{"error": null, "result": "the result"}')
         self.mox.ReplayAll()
@@ -233,37 +233,75 @@ class TestNexentaJSONRPC(cinder.test.TestCase):
         self.assertEquals("the result", result)
 
     def test_call_deep(self):
-        urllib2.Request(self.URL,
+        httplib.HTTPConnection('example.com').AndReturn(self.conn_mock)
+        self.conn_mock.request('POST', '/',
               '{"object": "obj1.subobj", "params": ["arg1", "arg2"],'
                                                           ' "method": "meth"}',
-              self.HEADERS).AndReturn(self.REQUEST)
-        self.resp_info_mock.status = ''
+              self.HEADERS)
+        self.conn_mock.getresponse().AndReturn(self.resp_mock)
         self.resp_mock.read().AndReturn(
             '{"error": null, "result": "the result"}')
         self.mox.ReplayAll()
         result = self.proxy.obj1.subobj.meth('arg1', 'arg2')
         self.assertEquals("the result", result)
 
+    def test_call_reuses_connection(self):
+        httplib.HTTPConnection('example.com').AndReturn(self.conn_mock)
+        for i in range(2):
+            self.conn_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+            self.conn_mock.getresponse().AndReturn(self.resp_mock)
+            self.resp_mock.read().AndReturn(
+                '{"error": null, "result": "the result"}')
+        self.mox.ReplayAll()
+        self.proxy('arg1', 'arg2')
+        self.conn_mock.sock = 'connected'
+        self.assertEquals("the result", self.proxy('arg1', 'arg2'))
+
+    def test_call_reconnects_stale_connection(self):
+        self.conn_mock.sock = 'connected'
+        httplib.HTTPConnection('example.com').AndReturn(self.conn_mock)
+        self.conn_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+        self.conn_mock.getresponse().AndRaise(httplib.BadStatusLine(''))
+        self.conn_mock.close()
+        self.conn_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+        self.conn_mock.getresponse().AndReturn(self.resp_mock)
+        self.resp_mock.read().AndReturn(
+            '{"error": null, "result": "the result"}')
+        self.mox.ReplayAll()
+        result = self.proxy('arg1', 'arg2')
+        self.assertEquals("the result", result)
+
+    def test_call_timeout_not_retried(self):
+        self.conn_mock.sock = 'connected'
+        httplib.HTTPConnection('example.com').AndReturn(self.conn_mock)
+        self.conn_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+        self.conn_mock.getresponse().AndRaise(socket.timeout())
+        self.conn_mock.close()
+        self.conn_mock.close()
+        self.mox.ReplayAll()
+        self.assertRaises(socket.timeout, self.proxy, 'arg1', 'arg2')
+
     def test_call_auto(self):
-        urllib2.Request(self.URL,
-                '{"object": null, "params": ["arg1", "arg2"], "method": null}',
-                self.HEADERS).AndReturn(self.REQUEST)
-        urllib2.Request(self.URL_S,
-                '{"object": null, "params": ["arg1", "arg2"], "method": null}',
-                self.HEADERS).AndReturn(self.REQUEST)
-        self.resp_info_mock.status = 'EOF in headers'
+        httplib.HTTPConnection('example.com').AndReturn(self.conn_mock)
+        self.conn_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+        self.conn_mock.getresponse().AndRaise(httplib.BadStatusLine(''))
+        self.conn_mock.close()
+        conn_s_mock = self.mox.CreateMockAnything()
+        conn_s_mock.sock = None
+        httplib.HTTPSConnection('example.com').AndReturn(conn_s_mock)
+        conn_s_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+        conn_s_mock.getresponse().AndReturn(self.resp_mock)
         self.resp_mock.read().AndReturn(
             '{"error": null, "result": "the result"}')
-        urllib2.urlopen(self.REQUEST).AndReturn(self.resp_mock)
         self.mox.ReplayAll()
         result = self.proxy('arg1', 'arg2')
         self.assertEquals("the result", result)
+        self.assertEquals(self.URL_S, self.proxy.transport.url)
 
     def test_call_error(self):
-        urllib2.Request(self.URL,
-                '{"object": null, "params": ["arg1", "arg2"], "method": null}',
-                self.HEADERS).AndReturn(self.REQUEST)
-        self.resp_info_mock.status = ''
+        httplib.HTTPConnection('example.com').AndReturn(self.conn_mock)
+        self.conn_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+        self.conn_mock.getresponse().AndReturn(self.resp_mock)
         self.resp_mock.read().AndReturn(
             '{"error": {"message": "the error"}, "result": "the result"}')
         self.mox.ReplayAll()
@@ -271,11 +309,12 @@ class TestNexentaJSONRPC(cinder.test.TestCase):
                           self.proxy, 'arg1', 'arg2')
 
     def test_call_fail(self):
-        urllib2.Request(self.URL,
-                '{"object": null, "params": ["arg1", "arg2"], "method": null}',
-                self.HEADERS).AndReturn(self.REQUEST)
-        self.resp_info_mock.status = 'EOF in headers'
-        self.proxy.auto = False
+        httplib.HTTPConnection('example.com').AndReturn(self.conn_mock)
+        self.conn_mock.request('POST', '/', self.REQUEST, self.HEADERS)
+        self.conn_mock.getresponse().AndRaise(httplib.BadStatusLine(''))
+        self.conn_mock.close()
+        self.conn_mock.close()
+        self.proxy.transport.auto = False
         self.mox.ReplayAll()
         self.assertRaises(jsonrpc.NexentaJSONException,
                           self.proxy, 'arg1', 'arg2')
@@ -18,6 +18,7 @@ from cinder import flags
 from cinder import log
 import cinder.notifier.no_op_notifier
 from cinder.notifier import api as notifier_api
+from cinder.notifier import rabbit_notifier
 from cinder import test
 
 
@@ -94,6 +95,35 @@ class NotifierTestCase(test.TestCase):
         notifier_api.notify('publisher_id', 'event_type', 'DEBUG', dict(a=3))
         self.assertEqual(self.test_topic, 'testnotify.debug')
 
+    def test_rabbit_notification_batch(self):
+        flags.DECLARE('notification_topics', 'cinder.notifier.rabbit_notifier')
+        self.stubs.Set(cinder.flags.FLAGS, 'notification_driver',
+                'cinder.notifier.rabbit_notifier')
+        self.flags(notification_topics=['a', 'b'],
+                   notification_batch_window=60,
+                   notification_batch_size=4)
+        # Do not leave held notifications or a timer to later tests
+        self.stubs.Set(rabbit_notifier, '_pending', [])
+        self.stubs.Set(rabbit_notifier, '_flush_timer', None)
+
+        self.batches = []
+
+        def mock_notify_many(context, msgs):
+            self.batches.append([topic for topic, msg in msgs])
+
+        self.stubs.Set(cinder.rpc, 'notify_many', mock_notify_many)
+        notifier_api.notify('publisher_id', 'event_type', 'DEBUG', dict(a=3))
+        self.assertEqual(self.batches, [])
+        notifier_api.notify('publisher_id', 'event_type', 'INFO', dict(a=3))
+        self.assertEqual(self.batches,
+                         [['a.debug', 'b.debug', 'a.info', 'b.info']])
+
+        notifier_api.notify('publisher_id', 'event_type', 'WARN', dict(a=3))
+        rabbit_notifier.flush()
+        self.assertEqual(self.batches[1:], [['a.warn', 'b.warn']])
+        self.assertEqual(rabbit_notifier._pending, [])
+        self.assertEqual(rabbit_notifier._flush_timer, None)
+
     def test_error_notification(self):
         self.stubs.Set(cinder.flags.FLAGS, 'notification_driver',
             'cinder.notifier.rabbit_notifier')
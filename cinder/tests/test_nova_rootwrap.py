@@ -17,7 +17,9 @@
 import os
 import subprocess
 
+from cinder.rootwrap import daemon
 from cinder.rootwrap import filters
+from cinder.rootwrap import volume
 from cinder.rootwrap import wrapper
 from cinder import test
 
@@ -54,6 +56,35 @@ class RootwrapTestCase(test.TestCase):
         filtermatch = wrapper.match_filter(self.filters, invalid)
         self.assertTrue(filtermatch is None)
 
+    def test_wipe_filters(self):
+        volume_filters = volume.filterlist
+        allowed = [
+            ['ionice', '-c3', 'dd', 'if=/dev/zero',
+             'of=/dev/cinder-volumes/wipe-volume-1', 'count=1024', 'bs=1M',
+             'oflag=direct'],
+            ['cgexec', '-g', 'blkio:cinder-volume-wipe', 'ionice', '-c3',
+             'dd', 'if=/dev/zero', 'of=/dev/cinder-volumes/wipe-volume-1',
+             'count=1024', 'bs=1M', 'oflag=direct'],
+            ['cgset', '-r', 'blkio.throttle.write_bps_device=253:3 1048576',
+             'cinder-volume-wipe'],
+            ]
+        denied = [
+            ['ionice', '-c3', '/bin/sh'],
+            ['ionice', '-c3', 'dd', 'if=/dev/zero', 'of=/dev/sda',
+             'count=1024', 'bs=1M', 'oflag=direct'],
+            ['ionice', '-c3', 'dd', 'if=/dev/zero', 'of=/dev/../wipe-x',
+             'count=1024', 'bs=1M', 'oflag=direct'],
+            ['cgexec', '-g', 'blkio:x', '/bin/sh'],
+            ['cgset', '-r', 'blkio.throttle.write_bps_device=253:3 1',
+             'x', 'cpuset.cpus=0'],
+            ]
+        for usercmd in allowed:
+            self.assertFalse(
+                wrapper.match_filter(volume_filters, usercmd) is None)
+        for usercmd in denied:
+            self.assertTrue(
+                wrapper.match_filter(volume_filters, usercmd) is None)
+
     def test_DnsmasqFilter(self):
         usercmd = ['FLAGFILE=A', 'NETWORK_ID=foobar', 'dnsmasq', 'foo']
         f = filters.DnsmasqFilter("/usr/bin/dnsmasq", "root")
@@ -131,3 +162,39 @@ class RootwrapTestCase(test.TestCase):
         usercmd = ["cat", "/"]
         filtermatch = wrapper.match_filter(self.filters, usercmd)
         self.assertTrue(filtermatch is self.filters[-1])
+
+    def test_RegExpFilter_bad_pattern(self):
+        f = filters.RegExpFilter("/bin/ls", "root", 'ls', '/[a-z')
+        self.assertFalse(f.match(["ls", "/root"]))
+
+    def test_FilterIndex_candidates(self):
+        index = wrapper.FilterIndex(self.filters)
+        self.assertEqual(index.candidates(["cat", "/"]),
+                         [self.filters[2], self.filters[3], self.filters[4]])
+        self.assertEqual(index.candidates(["unknown"]), [])
+        usercmd = ["ls", "/root"]
+        self.assertTrue(wrapper.match_filter(index, usercmd) is
+                        self.filters[0])
+
+    def test_FilterIndex_caches_access(self):
+        self.mox.StubOutWithMock(os, 'access')
+        os.access("/nonexistant/cat", os.X_OK).AndReturn(False)
+        os.access("/bin/cat", os.X_OK).AndReturn(True)
+        self.mox.ReplayAll()
+        index = wrapper.FilterIndex(self.filters)
+        usercmd = ["cat", "/"]
+        self.assertTrue(wrapper.match_filter(index, usercmd) is
+                        self.filters[-1])
+        self.assertTrue(wrapper.match_filter(index, usercmd) is
+                        self.filters[-1])
+
+    def test_daemon_run_command(self):
+        (rc, out, err) = daemon.run_command(self.filters, ["cat"], "foo")
+        self.assertEqual(rc, 0)
+        self.assertEqual(out, "foo")
+
+    def test_daemon_run_command_unauthorized(self):
+        (rc, out, err) = daemon.run_command(self.filters, ["rm", "/"])
+        self.assertEqual(rc, daemon.RC_UNAUTHORIZED)
+        (rc, out, err) = daemon.run_command(self.filters, [])
+        self.assertEqual(rc, daemon.RC_NOCOMMAND)
@@ -61,6 +61,20 @@ class PolicyFileTestCase(test.TestCase):
             self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
                               self.context, action, self.target)
 
+    def test_policy_file_checks_are_throttled(self):
+        with utils.tempdir() as tmpdir:
+            tmpfilename = os.path.join(tmpdir, 'policy')
+            self.flags(policy_file=tmpfilename, policy_check_interval=60)
+
+            action = "example:test"
+            with open(tmpfilename, "w") as policyfile:
+                policyfile.write("""{"example:test": []}""")
+            policy.enforce(self.context, action, self.target)
+
+            self.mox.StubOutWithMock(utils, 'read_cached_file')
+            self.mox.ReplayAll()
+            policy.enforce(self.context, action, self.target)
+
 
 class PolicyTestCase(test.TestCase):
     def setUp(self):
@@ -151,6 +165,58 @@ class PolicyTestCase(test.TestCase):
         policy.enforce(admin_context, lowercase_action, self.target)
         policy.enforce(admin_context, uppercase_action, self.target)
 
+    def test_http_decisions_not_memoized(self):
+        responses = ["True", "False"]
+
+        def fakeurlopen(url, post_data):
+            return StringIO.StringIO(responses.pop(0))
+        self.stubs.Set(urllib2, 'urlopen', fakeurlopen)
+        action = "example:get_http"
+        policy.enforce(self.context, action, {})
+        self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
+                          self.context, action, {})
+
+    def test_add_rule_drops_memoized_decisions(self):
+        action = "example:allowed"
+        policy.enforce(self.context, action, self.target)
+        common_policy._BRAIN.add_rule(action, [["false:false"]])
+        self.assertRaises(exception.PolicyNotAuthorized, policy.enforce,
+                          self.context, action, self.target)
+
+
+class BrainTestCase(test.TestCase):
+    def test_rules_compiled_at_load(self):
+        brain = common_policy.Brain({"a": [["role:Admin"], ["rule:b"]],
+                                     "b": [["project_id:%(project_id)s",
+                                            "role:member"]]})
+        check = brain._compiled_rules["a"]
+        self.assertTrue(isinstance(check, common_policy.OrCheck))
+        self.assertTrue(isinstance(check.checks[0],
+                                   common_policy.RoleCheck))
+        self.assertEqual(check.checks[0].role, "admin")
+        self.assertTrue(isinstance(brain._compiled_rules["b"],
+                                   common_policy.AndCheck))
+
+    def test_memo_keyed_on_relevant_attributes(self):
+        brain = common_policy.Brain({"a": [["project_id:%(project_id)s"]]})
+        creds = {'project_id': 'fake', 'roles': ['member'],
+                 'request_id': 'req-1'}
+        self.assertTrue(brain.check(("rule:a",), {'project_id': 'fake',
+                                                  'size': 1}, creds))
+        creds['request_id'] = 'req-2'
+        self.assertTrue(brain.check(("rule:a",), {'project_id': 'fake',
+                                                  'size': 2}, creds))
+        self.assertEqual(len(brain._memo), 1)
+        self.assertFalse(brain.check(("rule:a",), {'project_id': 'other'},
+                                     creds))
+        self.assertEqual(len(brain._memo), 2)
+
+    def test_missing_target_attribute_raises(self):
+        brain = common_policy.Brain({"a": [["project_id:%(project_id)s"]]})
+        self.assertRaises(KeyError, brain.check, ("rule:a",), {},
+                          {'project_id': 'fake', 'roles': []})
+        self.assertEqual(brain._memo, {})
+
 
 class DefaultPolicyTestCase(test.TestCase):
 
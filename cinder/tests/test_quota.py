@@ -314,3 +314,91 @@ class QuotaTestCase(test.TestCase):
                           self.context, 10, '', '', None)
         for volume_id in volume_ids:
             db.volume_destroy(self.context, volume_id)
+
+    def test_create_batch_trims_to_quota(self):
+        casts = []
+        self.stubs.Set(rpc, 'cast',
+                       lambda context, topic, msg: casts.append(msg))
+        volumes = volume.API().create_batch(self.context, 3, 5, '', '',
+                                            min_count=1)
+        self.assertEqual(len(volumes), 2)
+        self.assertEqual(len(casts), 1)
+        self.assertEqual(casts[0]['method'], 'create_volumes')
+        self.assertEqual(casts[0]['args']['volume_ids'],
+                         [vol['id'] for vol in volumes])
+        for vol in volumes:
+            db.volume_destroy(self.context, vol['id'])
+
+    def test_create_batch_below_min_count(self):
+        self.assertRaises(exception.QuotaError,
+                          volume.API().create_batch,
+                          self.context, 3, 5, '', '')
+
+    def test_create_batch_quota_used_concurrently(self):
+        calls = []
+
+        def fake_reserve(context, **deltas):
+            calls.append(deltas['volumes'])
+            # Other requests keep taking quota between the tries
+            usages = {'volumes': {'in_use': 7 + len(calls), 'reserved': 0},
+                      'gigabytes': {'in_use': 0, 'reserved': 0}}
+            raise exception.OverQuota(overs=['volumes'],
+                                      quotas={'volumes': 10,
+                                              'gigabytes': 1000},
+                                      usages=usages)
+
+        self.stubs.Set(quota, 'reserve', fake_reserve)
+        self.assertRaises(exception.QuotaError,
+                          volume.API().create_batch,
+                          self.context, 3, 5, '', '', min_count=1)
+        self.assertEqual(calls, [3, 2, 1])
+
+    def test_create_batch_invalid_min_count(self):
+        self.assertRaises(exception.InvalidInput,
+                          volume.API().create_batch,
+                          self.context, 1, 5, '', '', min_count=2)
+
+    def _usages(self):
+        return db.quota_usage_get_all_by_project(self.context,
+                                                 self.project_id)
+
+    def test_create_commits_reservation(self):
+        self.stubs.Set(rpc, 'cast', lambda context, topic, msg: None)
+        vol = volume.API().create(self.context, 5, '', '', None)
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 1, 'reserved': 0})
+        self.assertEqual(usages['gigabytes'], {'in_use': 5, 'reserved': 0})
+
+        # The volume never got a host, so the API deletes it directly.
+        volume.API().delete(self.context, volume.API().get(self.context,
+                                                           vol['id']))
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 0, 'reserved': 0})
+        self.assertEqual(usages['gigabytes'], {'in_use': 0, 'reserved': 0})
+
+    def test_create_rolls_back_on_db_failure(self):
+        def fake_volume_create(context, values):
+            raise exception.DBError()
+        self.stubs.Set(db, 'volume_create', fake_volume_create)
+        self.assertRaises(exception.DBError,
+                          volume.API().create,
+                          self.context, 5, '', '', None)
+        usages = self._usages()
+        self.assertEqual(usages['volumes'], {'in_use': 0, 'reserved': 0})
+        self.assertEqual(usages['gigabytes'], {'in_use': 0, 'reserved': 0})
+
+    def test_reserve_caches_quota_overrides(self):
+        self.flags(quota_cache_ttl=30)
+        self.stubs.Set(quota, '_LIMITS_CACHE', {})
+        db.quota_create(self.context, self.project_id, 'volumes', 3)
+        reservations = quota.reserve(self.context, volumes=2)
+        quota.rollback(self.context, reservations)
+
+        # The lowered limit isn't seen until the cache entry goes away.
+        db.quota_update(self.context, self.project_id, 'volumes', 1)
+        reservations = quota.reserve(self.context, volumes=2)
+        quota.rollback(self.context, reservations)
+
+        self.stubs.Set(quota, '_LIMITS_CACHE', {})
+        self.assertRaises(exception.OverQuota,
+                          quota.reserve, self.context, volumes=2)
@@ -0,0 +1,114 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2012 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+
+import paramiko
+
+from cinder import exception
+from cinder import test
+from cinder import utils
+from cinder.volume import san
+
+
+class FakeSSHPool(object):
+    """Hands out numbered connections and records what is returned."""
+
+    def __init__(self):
+        self.created = 0
+        self.current_size = 0
+        self.put_back = []
+        self.removed = []
+
+    def get(self):
+        self.created += 1
+        self.current_size += 1
+        return self.created
+
+    def put(self, conn):
+        self.put_back.append(conn)
+
+    def remove(self, conn):
+        self.current_size -= 1
+        self.removed.append(conn)
+
+
+class SanISCSIDriverTestCase(test.TestCase):
+    """Test case for the SSH handling of SanISCSIDriver."""
+
+    def setUp(self):
+        super(SanISCSIDriverTestCase, self).setUp()
+        self.driver = san.SanISCSIDriver()
+        self.pool = FakeSSHPool()
+        self.driver.sshpool = self.pool
+        self.results = []
+        self.stubs.Set(utils, 'ssh_execute', self._fake_ssh_execute)
+
+    def _fake_ssh_execute(self, ssh, cmd, check_exit_code=True):
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def test_run_ssh(self):
+        self.results = [('out', '')]
+        self.assertEqual(self.driver._run_ssh('ls'), ('out', ''))
+        self.assertEqual(self.pool.put_back, [1])
+        self.assertEqual(self.pool.removed, [])
+
+    def test_run_ssh_command_error_keeps_connection(self):
+        self.results = [exception.ProcessExecutionError()]
+        self.assertRaises(exception.ProcessExecutionError,
+                          self.driver._run_ssh, 'ls')
+        self.assertEqual(self.pool.put_back, [1])
+        self.assertEqual(self.pool.removed, [])
+
+    def test_run_ssh_retries_on_ssh_exception(self):
+        self.results = [paramiko.SSHException(), ('out', '')]
+        self.assertEqual(self.driver._run_ssh('ls'), ('out', ''))
+        self.assertEqual(self.pool.removed, [1])
+        self.assertEqual(self.pool.put_back, [2])
+        self.assertEqual(self.pool.current_size, 1)
+
+    def test_run_ssh_retry_socket_error(self):
+        self.results = [paramiko.SSHException(), socket.error()]
+        self.assertRaises(socket.error, self.driver._run_ssh, 'ls')
+        self.assertEqual(self.pool.removed, [1, 2])
+        self.assertEqual(self.pool.put_back, [])
+        self.assertEqual(self.pool.current_size, 0)
+
+    def test_run_ssh_retry_get_fails(self):
+        get = self.pool.get
+
+        def fake_get():
+            if self.pool.created:
+                raise paramiko.SSHException()
+            return get()
+
+        self.stubs.Set(self.pool, 'get', fake_get)
+        self.results = [paramiko.SSHException()]
+        self.assertRaises(paramiko.SSHException, self.driver._run_ssh, 'ls')
+        self.assertEqual(self.pool.removed, [1])
+        self.assertEqual(self.pool.put_back, [])
+        self.assertEqual(self.pool.current_size, 0)
+
+    def test_run_ssh_socket_error(self):
+        self.results = [socket.error()]
+        self.assertRaises(socket.error, self.driver._run_ssh, 'ls')
+        self.assertEqual(self.pool.removed, [1])
+        self.assertEqual(self.pool.put_back, [])
+        self.assertEqual(self.pool.current_size, 0)
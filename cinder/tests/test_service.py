@@ -20,6 +20,9 @@
 Unit Tests for remote procedure calls using queue
 """
 
+import os
+import signal
+
 import mox
 
 from cinder import context
@@ -30,6 +33,8 @@ from cinder.openstack.common import cfg
 from cinder import test
 from cinder import service
 from cinder import manager
+from cinder.notifier import rabbit_notifier
+from cinder import rpc
 from cinder import wsgi
 
 
@@ -205,6 +210,13 @@ class TestWSGIService(test.TestCase):
         self.assertNotEqual(0, test_service.port)
         test_service.stop()
 
+    def test_service_workers(self):
+        self.flags(osapi_volume_workers=4)
+        test_service = service.WSGIService("osapi_volume")
+        self.assertEquals(4, test_service.workers)
+        test_service = service.WSGIService("test_service")
+        self.assertEquals(1, test_service.workers)
+
 
 class TestLauncher(test.TestCase):
 
@@ -219,3 +231,125 @@ class TestLauncher(test.TestCase):
         launcher.launch_server(self.service)
         self.assertEquals(0, self.service.port)
         launcher.stop()
+
+    def test_wait_flushes_notifications(self):
+        calls = []
+
+        class FakeLauncher(object):
+            def wait(self):
+                calls.append('wait')
+
+        self.stubs.Set(service, '_launcher', FakeLauncher())
+        self.stubs.Set(rabbit_notifier, 'flush',
+                       lambda: calls.append('flush'))
+        self.stubs.Set(rpc, 'cleanup', lambda: calls.append('cleanup'))
+        service.wait()
+        self.assertEqual(calls, ['wait', 'flush', 'cleanup'])
+
+
+class FakeWorkerServer(object):
+    workers = 2
+
+    def __init__(self):
+        self.listened = 0
+        self.stopped = 0
+
+    def listen(self):
+        self.listened += 1
+
+    def stop(self):
+        self.stopped += 1
+
+
+class ChildExit(Exception):
+    def __init__(self, status):
+        super(ChildExit, self).__init__(status)
+        self.status = status
+
+
+class ProcessLauncherTestCase(test.TestCase):
+
+    def setUp(self):
+        super(ProcessLauncherTestCase, self).setUp()
+        self.handlers = {}
+        self.stubs.Set(signal, 'signal',
+                       lambda signo, handler: self.handlers.update(
+                           {signo: handler}))
+        self.pids = [101, 102, 103]
+        self.stubs.Set(os, 'fork', lambda: self.pids.pop(0))
+        self.killed = []
+        self.stubs.Set(os, 'kill',
+                       lambda pid, signo: self.killed.append((pid, signo)))
+        self.exited = []
+        self.stubs.Set(os, 'wait', lambda: (self.exited.pop(0), 0))
+        self.launcher = service.ProcessLauncher()
+        self.server = FakeWorkerServer()
+
+    def test_launch_server_forks_workers(self):
+        self.launcher.launch_server(self.server)
+        self.assertEqual(self.server.listened, 1)
+        self.assertEqual(sorted(self.launcher.children), [101, 102])
+        self.assertEqual(self.handlers[signal.SIGTERM],
+                         self.launcher._handle_signal)
+        self.assertEqual(self.handlers[signal.SIGHUP],
+                         self.launcher._handle_sighup)
+
+    def test_wait_respawns_dead_child(self):
+        self.launcher.launch_server(self.server)
+        fork = os.fork
+
+        def fork_and_stop():
+            # Stop supervising once the dead child has been replaced
+            self.launcher.running = False
+            return fork()
+
+        self.stubs.Set(os, 'fork', fork_and_stop)
+        self.exited = [101, 102, 103]
+        self.launcher.wait()
+        self.assertEqual(sorted(pid for pid, signo in self.killed),
+                         [102, 103])
+        self.assertEqual(self.launcher.children, {})
+
+    def test_sigterm_stops_children(self):
+        self.launcher.launch_server(self.server)
+        self.launcher._handle_signal(signal.SIGTERM, None)
+        self.assertFalse(self.launcher.running)
+        self.exited = [101, 102]
+        self.launcher.wait()
+        self.assertEqual(sorted(self.killed),
+                         [(101, signal.SIGTERM), (102, signal.SIGTERM)])
+        self.assertEqual(self.handlers[signal.SIGTERM], signal.SIG_DFL)
+        self.assertEqual(self.launcher.children, {})
+
+    def test_sighup_restarts_children(self):
+        self.launcher.launch_server(self.server)
+        self.launcher._handle_sighup(signal.SIGHUP, None)
+        self.assertTrue(self.launcher.running)
+        self.assertEqual(sorted(self.killed),
+                         [(101, signal.SIGTERM), (102, signal.SIGTERM)])
+
+    def test_child_always_exits(self):
+        def fail_stop():
+            raise AttributeError()
+
+        def fail_flush():
+            raise IOError()
+
+        def fake_exit(status):
+            raise ChildExit(status)
+
+        def fail_child(server):
+            raise exception.CinderException()
+
+        self.pids = [0]
+        self.stubs.Set(self.server, 'stop', fail_stop)
+        self.stubs.Set(rabbit_notifier, 'flush', fail_flush)
+        self.stubs.Set(self.launcher, '_child_process', fail_child)
+        self.stubs.Set(os, '_exit', fake_exit)
+        wrap = service.ServerWrapper(self.server, 1)
+        try:
+            self.launcher._start_child(wrap)
+        except ChildExit as exc:
+            self.assertEqual(exc.status, 2)
+        else:
+            self.fail('child did not exit')
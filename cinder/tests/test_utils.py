@@ -29,6 +29,7 @@ from eventlet import greenpool
 import iso8601
 import lockfile
 import mox
+import paramiko
 
 import cinder
 from cinder import exception
@@ -530,6 +531,33 @@ class ToPrimitiveTestCase(test.TestCase):
         self.assertEquals(ret[2], '<built-in function dir>')
 
 
+class DumpsTestCase(test.TestCase):
+    def test_primitives(self):
+        x = {'a': [1, 2.5, None, True], 'b': u'foo'}
+        self.assertEquals(utils.loads(utils.dumps(x)), x)
+
+    def test_datetime(self):
+        x = {'created_at': datetime.datetime(1, 2, 3, 4, 5, 6, 7)}
+        self.assertEquals(utils.loads(utils.dumps(x)),
+                          {'created_at': '0001-02-03 04:05:06.000007'})
+
+    def test_iteritems(self):
+        class ModelClass(object):
+            def iteritems(self):
+                return iter([('id', 1),
+                             ('created_at', datetime.datetime(1, 2, 3))])
+
+        x = [ModelClass()]
+        self.assertEquals(utils.loads(utils.dumps(x)),
+                          [{'id': 1, 'created_at': '0001-02-03 00:00:00'}])
+
+    def test_instance(self):
+        class MysteryClass(object):
+            pass
+
+        self.assertRaises(TypeError, utils.dumps, [MysteryClass()])
+
+
 class MonkeyPatchTestCase(test.TestCase):
     """Unit test for utils.monkey_patch()."""
     def setUp(self):
@@ -1186,3 +1214,93 @@ class AuditPeriodTest(test.TestCase):
                                            day=1,
                                            month=6,
                                            year=2011))
+
+
+class FakeTransport(object):
+
+    def __init__(self):
+        self.active = True
+        self.keepalive = None
+
+    def set_keepalive(self, interval):
+        self.keepalive = interval
+
+    def is_active(self):
+        return self.active
+
+
+class FakeSSHClient(object):
+
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.closed = False
+
+    def set_missing_host_key_policy(self, policy):
+        pass
+
+    def connect(self, ip, port=22, username=None, password=None,
+                pkey=None, timeout=None):
+        pass
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+
+
+class SSHPoolTestCase(test.TestCase):
+    """Unit tests for utils.SSHPool"""
+
+    def setUp(self):
+        super(SSHPoolTestCase, self).setUp()
+        self.stubs.Set(paramiko, 'SSHClient', FakeSSHClient)
+
+    def _get_pool(self, **kwargs):
+        return utils.SSHPool('127.0.0.1', 22, 10, 'test',
+                             password='test', min_size=1, max_size=2,
+                             **kwargs)
+
+    def test_connection_is_reused(self):
+        pool = self._get_pool()
+        first = pool.get()
+        self.assertEqual(first.transport.keepalive, 10)
+        pool.put(first)
+        self.assertTrue(pool.get() is first)
+        self.assertEqual(pool.current_size, 1)
+
+    def test_dead_connection_is_replaced(self):
+        pool = self._get_pool()
+        first = pool.get()
+        pool.put(first)
+        first.transport.active = False
+        second = pool.get()
+        self.assertFalse(second is first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.current_size, 1)
+
+    def test_idle_connection_is_replaced(self):
+        pool = self._get_pool(idle_timeout=60)
+        first = pool.get()
+        pool.put(first)
+        pool._last_used[first] -= 61
+        second = pool.get()
+        self.assertFalse(second is first)
+        self.assertTrue(first.closed)
+
+    def test_remove_frees_slot(self):
+        pool = self._get_pool()
+        first = pool.get()
+        second = pool.get()
+        pool.remove(first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.current_size, 1)
+        third = pool.get()
+        self.assertFalse(third is first)
+        self.assertEqual(pool.current_size, 2)
+        pool.put(second)
+        pool.put(third)
+
+    def test_no_credentials(self):
+        self.assertRaises(exception.Error, utils.SSHPool,
+                          '127.0.0.1', 22, 10, 'test', min_size=1)
@@ -34,6 +34,7 @@ import cinder.policy
 from cinder import rpc
 from cinder import test
 import cinder.volume.api
+from cinder.volume import wipe
 
 FLAGS = flags.FLAGS
 LOG = logging.getLogger(__name__)
@@ -78,6 +79,15 @@ class VolumeTestCase(test.TestCase):
                           self.context,
                           volume_id)
 
+    def test_delete_volume_releases_quota(self):
+        """Test deleting a volume gives its quota usage back."""
+        volume = self._create_volume(size='2')
+        self.volume.create_volume(self.context, volume['id'])
+        self.volume.delete_volume(self.context, volume['id'])
+        usages = db.quota_usage_get_all_by_project(self.context, 'fake')
+        self.assertEqual(usages['volumes'], {'in_use': 0, 'reserved': 0})
+        self.assertEqual(usages['gigabytes'], {'in_use': 0, 'reserved': 0})
+
     def test_delete_busy_volume(self):
         """Test volume survives deletion if driver reports it as busy."""
         volume = self._create_volume()
@@ -147,6 +157,85 @@ class VolumeTestCase(test.TestCase):
         for volume_id in vols:
             self.volume.delete_volume(self.context, volume_id)
 
+    def test_create_volume_failure_reschedules(self):
+        """Ensure a failed create is sent back to the scheduler."""
+        volume = self._create_volume()
+        volume_id = volume['id']
+        request_spec = {'volume_properties': {'size': 0}}
+        filter_properties = {'retry': {'num_attempts': 1,
+                                       'hosts': [FLAGS.host]}}
+
+        self.mox.StubOutWithMock(self.volume.driver, 'create_volume')
+        self.volume.driver.create_volume(mox.IgnoreArg()).AndRaise(
+                exception.ProcessExecutionError())
+        self.mox.StubOutWithMock(rpc, 'cast')
+        rpc.cast(mox.IgnoreArg(), FLAGS.scheduler_topic,
+                 {"method": "create_volume",
+                  "args": {"topic": FLAGS.volume_topic,
+                           "volume_id": volume_id,
+                           "snapshot_id": None,
+                           "request_spec": request_spec,
+                           "filter_properties": filter_properties}})
+
+        self.mox.ReplayAll()
+        self.volume.create_volume(self.context, volume_id,
+                                  request_spec=request_spec,
+                                  filter_properties=filter_properties)
+        volume = db.volume_get(self.context, volume_id)
+        self.assertEqual(volume['status'], 'creating')
+        self.assertEqual(volume['host'], None)
+        db.volume_destroy(self.context, volume_id)
+
+    def test_create_export_failure_removes_volume(self):
+        """Ensure a volume created before failing is removed on reschedule."""
+        volume = self._create_volume()
+        volume_id = volume['id']
+        request_spec = {'volume_properties': {'size': 0}}
+        filter_properties = {'retry': {'num_attempts': 1,
+                                       'hosts': [FLAGS.host]}}
+
+        self.mox.StubOutWithMock(self.volume.driver, 'create_volume')
+        self.mox.StubOutWithMock(self.volume.driver, 'create_export')
+        self.mox.StubOutWithMock(self.volume.driver, 'remove_export')
+        self.mox.StubOutWithMock(self.volume.driver, 'delete_volume')
+        self.mox.StubOutWithMock(rpc, 'cast')
+        self.volume.driver.create_volume(mox.IgnoreArg())
+        self.volume.driver.create_export(mox.IgnoreArg(),
+                                         mox.IgnoreArg()).AndRaise(
+                exception.ProcessExecutionError())
+        self.volume.driver.remove_export(mox.IgnoreArg(),
+                                         mox.IgnoreArg()).AndRaise(
+                exception.ProcessExecutionError())
+        self.volume.driver.delete_volume(mox.IgnoreArg())
+        rpc.cast(mox.IgnoreArg(), FLAGS.scheduler_topic, mox.IgnoreArg())
+
+        self.mox.ReplayAll()
+        self.volume.create_volume(self.context, volume_id,
+                                  request_spec=request_spec,
+                                  filter_properties=filter_properties)
+        volume = db.volume_get(self.context, volume_id)
+        self.assertEqual(volume['host'], None)
+        db.volume_destroy(self.context, volume_id)
+
+    def test_create_volume_failure_without_retry(self):
+        """Ensure the volume is set to error when it can't be rescheduled."""
+        volume = self._create_volume()
+        volume_id = volume['id']
+
+        self.mox.StubOutWithMock(self.volume.driver, 'create_volume')
+        self.volume.driver.create_volume(mox.IgnoreArg()).AndRaise(
+                exception.ProcessExecutionError())
+
+        self.mox.ReplayAll()
+        self.assertRaises(exception.ProcessExecutionError,
+                          self.volume.create_volume,
+                          self.context, volume_id,
+                          request_spec={'volume_properties': {'size': 0}},
+                          filter_properties={})
+        volume = db.volume_get(self.context, volume_id)
+        self.assertEqual(volume['status'], 'error')
+        db.volume_destroy(self.context, volume_id)
+
     def test_run_attach_detach_volume(self):
         """Make sure volume can be attached and detached from instance."""
         instance_uuid = '12345678-1234-5678-1234-567812345678'
@@ -389,6 +478,131 @@ class VolumeDriverTestCase(DriverTestCase):
         self.output = 'x'
         self.volume.driver.delete_volume({'name': 'test1', 'size': 1024})
 
+    def _copy_volume_commands(self, *args, **kwargs):
+        cmds = []
+
+        def _fake_execute(*cmd, **_kwargs):
+            cmds.append(list(cmd))
+            return None, None
+        self.volume.driver.set_execute(_fake_execute)
+        self.volume.driver._copy_volume('/dev/src', '/dev/dst', *args,
+                                        **kwargs)
+        return cmds
+
+    def test_copy_volume(self):
+        self.assertEqual(self._copy_volume_commands(1),
+                         [['dd', 'if=/dev/src', 'of=/dev/dst', 'bs=4M',
+                           'skip=0', 'seek=0', 'count=256', 'conv=notrunc',
+                           'iflag=direct', 'oflag=direct']])
+
+    def test_copy_volume_sparse_streams(self):
+        self.flags(volume_copy_streams=2, volume_copy_direct_io=False)
+        self.assertEqual(self._copy_volume_commands(1, sparse=True),
+                         [['dd', 'if=/dev/src', 'of=/dev/dst', 'bs=4M',
+                           'skip=0', 'seek=0', 'count=128',
+                           'conv=notrunc,sparse'],
+                          ['dd', 'if=/dev/src', 'of=/dev/dst', 'bs=4M',
+                           'skip=128', 'seek=128', 'count=128',
+                           'conv=notrunc,sparse']])
+
+    def test_copy_volume_progress(self):
+        progress = []
+        cmds = self._copy_volume_commands(40, progress=progress.append)
+        self.assertEqual(len(cmds), 20)
+        self.assertEqual(sum(int(cmd[6].split('=')[1]) for cmd in cmds),
+                         10240)
+        self.assertEqual(progress[0], 5)
+        self.assertEqual(progress[-1], 100)
+
+    def test_copy_small_volume_progress(self):
+        progress = []
+        cmds = self._copy_volume_commands(1, progress=progress.append)
+        self.assertEqual(len(cmds), 1)
+        self.assertEqual(progress, [100])
+
+
+class ThinLVMISCSIDriverTestCase(DriverTestCase):
+    """Test case for ThinLVMISCSIDriver"""
+    driver_name = "cinder.volume.driver.ThinLVMISCSIDriver"
+
+    def setUp(self):
+        super(ThinLVMISCSIDriverTestCase, self).setUp()
+        self.cmds = []
+
+        def _fake_execute(*cmd, **_kwargs):
+            self.cmds.append(list(cmd))
+            return self.output, None
+        self.volume.driver.set_execute(_fake_execute)
+
+    def test_create_volume(self):
+        self.volume.driver.create_volume({'name': 'volume-1', 'size': 1})
+        self.assertEqual(self.cmds,
+                         [['lvcreate', '-T', '-V', '1G', '-n', 'volume-1',
+                           'cinder-volumes/cinder-volumes-pool']])
+
+    def test_create_snapshot(self):
+        self.volume.driver.create_snapshot({'name': 'snapshot-1',
+                                            'volume_name': 'volume-1',
+                                            'volume_size': 1})
+        self.assertEqual(self.cmds,
+                         [['lvcreate', '--name', '_snapshot-1', '--snapshot',
+                           'cinder-volumes/volume-1']])
+
+    def test_create_volume_from_snapshot(self):
+        self.volume.driver.create_volume_from_snapshot(
+            {'name': 'volume-2', 'size': 2},
+            {'name': 'snapshot-1', 'volume_size': 1})
+        self.assertEqual(self.cmds,
+                         [['lvcreate', '--name', 'volume-2', '--snapshot',
+                           'cinder-volumes/_snapshot-1'],
+                          ['lvextend', '-L', '2G',
+                           'cinder-volumes/volume-2']])
+
+    def test_check_for_setup_error(self):
+        outputs = {'vgs': '  cinder-volumes\n', 'lvs': '  -wi-a----\n'}
+
+        def _fake_execute(*cmd, **_kwargs):
+            return outputs[cmd[0]], None
+        self.volume.driver.set_execute(_fake_execute)
+        self.stubs.Set(self.volume.driver.wiper, 'resume', lambda vg: None)
+        self.assertRaises(exception.Error,
+                          self.volume.driver.check_for_setup_error)
+        outputs['lvs'] = '  twi-a-tz--\n'
+        self.volume.driver.check_for_setup_error()
+        self.assertTrue(self.volume.driver._pool_zeroes_blocks)
+
+    def test_delete_snapshot_skips_clearing(self):
+        self.flags(volume_wipe_snapshots=True)
+        self.volume.driver._pool_zeroes_blocks = True
+        self.volume.driver.delete_snapshot({'name': 'snapshot-1',
+                                            'volume_size': 1})
+        self.assertEqual(self.cmds[-1],
+                         ['lvremove', '-f', 'cinder-volumes/_snapshot-1'])
+
+    def test_delete_volume_pool_without_zeroing(self):
+        self.volume.driver._pool_zeroes_blocks = False
+        self.volume.driver._delete_volume({'name': 'volume-1'}, 1)
+        self.assertEqual(self.cmds,
+                         [['blkdiscard', '/dev/cinder-volumes/volume-1'],
+                          ['lvremove', '-f', 'cinder-volumes/volume-1']])
+
+    def test_delete_volume_pool_with_zeroing(self):
+        self.volume.driver._pool_zeroes_blocks = True
+        self.volume.driver._delete_volume({'name': 'volume-1'}, 1)
+        self.assertEqual(self.cmds,
+                         [['lvremove', '-f', 'cinder-volumes/volume-1']])
+
+    def test_get_volume_stats(self):
+        self.flags(lvm_max_over_subscription_ratio=2.0)
+        self.output = ('  cinder-volumes-pool:100.00:25.00:\n'
+                       '  volume-1:150.00:10.00:cinder-volumes-pool\n'
+                       '  other:20.00::\n')
+        stats = self.volume.driver.get_volume_stats(refresh=True)
+        self.assertEqual(stats['total_capacity_gb'], 200.0)
+        self.assertEqual(stats['free_capacity_gb'], 50.0)
+        self.assertEqual(stats['provisioned_capacity_gb'], 150.0)
+        self.assertEqual(stats['pool_free_capacity_gb'], 75.0)
+
 
 class ISCSITestCase(DriverTestCase):
     """Test Case for ISCSIDriver"""
@@ -461,6 +675,106 @@ class ISCSITestCase(DriverTestCase):
 
         self._detach_volume(volume_id_list)
 
+    def test_get_volume_stats(self):
+        """Capacity is parsed from the vgs output."""
+        self.output = "  cinder-volumes   100.00   42.50\n"
+        stats = self.volume.driver.get_volume_stats(refresh=True)
+        self.assertEqual(stats['storage_protocol'], 'iSCSI')
+        self.assertEqual(stats['total_capacity_gb'], 100.0)
+        self.assertEqual(stats['free_capacity_gb'], 42.5)
+
+    def test_get_volume_stats_vgs_failure(self):
+        """Capacity is left unreported when vgs fails."""
+        def _fake_execute(*_args, **_kwargs):
+            raise exception.ProcessExecutionError()
+        self.volume.driver.set_execute(_fake_execute)
+        stats = self.volume.driver.get_volume_stats(refresh=True)
+        self.assertFalse('total_capacity_gb' in stats)
+        self.assertFalse('free_capacity_gb' in stats)
+
+
+class VolumeWiperTestCase(test.TestCase):
+    """Test Case for VolumeWiper"""
+
+    def setUp(self):
+        super(VolumeWiperTestCase, self).setUp()
+        self.cmds = []
+        self.output = None
+        self.wiper = wipe.VolumeWiper(self._fake_execute)
+        self.stubs.Set(self.wiper, '_discard_zeroes_data',
+                       lambda path: False)
+
+    def _fake_execute(self, *cmd, **kwargs):
+        self.cmds.append(list(cmd))
+        return self.output, None
+
+    def test_wipe_in_background(self):
+        self.wiper.wipe('vg', 'volume-1', 1024)
+        self.assertEqual(self.cmds,
+                         [['lvrename', 'vg', 'volume-1', 'wipe-volume-1']])
+        self.wiper.wait()
+        self.assertEqual(self.cmds[1:],
+                         [['ionice', '-c3', 'dd', 'if=/dev/zero',
+                           'of=/dev/vg/wipe-volume-1', 'count=1024', 'bs=1M',
+                           'oflag=direct'],
+                          ['lvremove', '-f', 'vg/wipe-volume-1']])
+
+    def test_wipe_synchronously(self):
+        self.flags(volume_wipe_workers=0, volume_wipe_ionice_class=0)
+        self.wiper.wipe('vg', 'volume-1', 1024)
+        self.assertEqual(self.cmds,
+                         [['lvrename', 'vg', 'volume-1', 'wipe-volume-1'],
+                          ['dd', 'if=/dev/zero', 'of=/dev/vg/wipe-volume-1',
+                           'count=1024', 'bs=1M', 'oflag=direct'],
+                          ['lvremove', '-f', 'vg/wipe-volume-1']])
+
+    def test_wipe_bad_ionice_class(self):
+        self.flags(volume_wipe_workers=0, volume_wipe_ionice_class=4)
+        self.assertRaises(exception.InvalidInput,
+                          self.wiper.wipe, 'vg', 'volume-1', 1024)
+
+    def test_wipe_without_clearing(self):
+        self.wiper.wipe('vg', '_snapshot-1', 1024, clear=False)
+        self.assertEqual(self.cmds, [['lvremove', '-f', 'vg/_snapshot-1']])
+
+    def test_wipe_discard(self):
+        self.flags(volume_wipe_workers=0)
+        self.stubs.Set(self.wiper, '_discard_zeroes_data',
+                       lambda path: True)
+        self.wiper.wipe('vg', 'volume-1', 1024)
+        self.assertEqual(self.cmds,
+                         [['lvrename', 'vg', 'volume-1', 'wipe-volume-1'],
+                          ['blkdiscard', '/dev/vg/wipe-volume-1'],
+                          ['lvremove', '-f', 'vg/wipe-volume-1']])
+
+    def test_wipe_bps_limit(self):
+        self.flags(volume_wipe_workers=0, volume_wipe_ionice_class=0,
+                   volume_wipe_bps_limit=1048576)
+        self.stubs.Set(self.wiper, '_device_number',
+                       lambda path: '253:3')
+        self.wiper.wipe('vg', 'volume-1', 1)
+        self.assertEqual(self.cmds[1:],
+                         [['cgcreate', '-g', 'blkio:cinder-volume-wipe'],
+                          ['cgset', '-r',
+                           'blkio.throttle.write_bps_device=253:3 1048576',
+                           'cinder-volume-wipe'],
+                          ['cgexec', '-g', 'blkio:cinder-volume-wipe',
+                           'dd', 'if=/dev/zero', 'of=/dev/vg/wipe-volume-1',
+                           'count=1', 'bs=1M', 'oflag=direct'],
+                          ['cgset', '-r',
+                           'blkio.throttle.write_bps_device=253:3 0',
+                           'cinder-volume-wipe'],
+                          ['lvremove', '-f', 'vg/wipe-volume-1']])
+
+    def test_resume(self):
+        self.flags(volume_wipe_workers=0, volume_wipe_ionice_class=0)
+        self.output = '  volume-1      1024.00\n  wipe-volume-2   2048.00\n'
+        self.wiper.resume('vg')
+        self.assertEqual(self.cmds[1:],
+                         [['dd', 'if=/dev/zero', 'of=/dev/vg/wipe-volume-2',
+                           'count=2048', 'bs=1M', 'oflag=direct'],
+                          ['lvremove', '-f', 'vg/wipe-volume-2']])
+
 
 class VolumePolicyTestCase(test.TestCase):
 
@@ -47,11 +47,13 @@ from xml.sax import saxutils
 from eventlet import corolocal
 from eventlet import event
 from eventlet import greenthread
+from eventlet import pools
 from eventlet import semaphore
 from eventlet.green import subprocess
 import iso8601
 import lockfile
 import netaddr
+import paramiko
 
 from cinder import exception
 from cinder import flags
@@ -146,6 +148,17 @@ def fetchfile(url, target):
     execute('curl', '--fail', url, '-o', target)
 
 
+_ROOT_HELPER_CLIENT = None
+
+
+def _get_root_helper_client():
+    global _ROOT_HELPER_CLIENT
+    if _ROOT_HELPER_CLIENT is None:
+        from cinder.rootwrap import client
+        _ROOT_HELPER_CLIENT = client.RootwrapClient(FLAGS.root_helper_daemon)
+    return _ROOT_HELPER_CLIENT
+
+
 def execute(*cmd, **kwargs):
     """Helper method to execute command with optional retry.
 
@@ -164,7 +177,8 @@ def execute(*cmd, **kwargs):
     :param attempts:           How many times to retry cmd.
     :param run_as_root:        True | False. Defaults to False. If set to True,
                                the command is prefixed by the command specified
-                               in the root_helper FLAG.
+                               in the root_helper FLAG, or sent to the root
+                               helper daemon if root_helper_daemon is set.
 
     :raises exception.Error: on receiving unknown arguments
     :raises exception.ProcessExecutionError:
@@ -190,28 +204,36 @@ def execute(*cmd, **kwargs):
         raise exception.Error(_('Got unknown keyword args '
                                 'to utils.execute: %r') % kwargs)
 
-    if run_as_root:
+    use_daemon = run_as_root and FLAGS.root_helper_daemon
+    if run_as_root and not use_daemon:
         cmd = shlex.split(FLAGS.root_helper) + list(cmd)
     cmd = map(str, cmd)
 
     while attempts > 0:
         attempts -= 1
         try:
-            LOG.debug(_('Running cmd (subprocess): %s'), ' '.join(cmd))
-            _PIPE = subprocess.PIPE  # pylint: disable=E1101
-            obj = subprocess.Popen(cmd,
-                                   stdin=_PIPE,
-                                   stdout=_PIPE,
-                                   stderr=_PIPE,
-                                   close_fds=True,
-                                   shell=shell)
-            result = None
-            if process_input is not None:
-                result = obj.communicate(process_input)
+            if use_daemon:
+                LOG.debug(_('Running cmd (root helper daemon): %s'),
+                          ' '.join(cmd))
+                (_returncode, stdout, stderr) = \
+                    _get_root_helper_client().execute(cmd, process_input)
+                result = (stdout, stderr)
             else:
-                result = obj.communicate()
-            obj.stdin.close()  # pylint: disable=E1101
-            _returncode = obj.returncode  # pylint: disable=E1101
+                LOG.debug(_('Running cmd (subprocess): %s'), ' '.join(cmd))
+                _PIPE = subprocess.PIPE  # pylint: disable=E1101
+                obj = subprocess.Popen(cmd,
+                                       stdin=_PIPE,
+                                       stdout=_PIPE,
+                                       stderr=_PIPE,
+                                       close_fds=True,
+                                       shell=shell)
+                result = None
+                if process_input is not None:
+                    result = obj.communicate(process_input)
+                else:
+                    result = obj.communicate()
+                obj.stdin.close()  # pylint: disable=E1101
+                _returncode = obj.returncode  # pylint: disable=E1101
             if _returncode:
                 LOG.debug(_('Result was %s') % _returncode)
                 if not ignore_exit_code and _returncode not in check_exit_code:
@@ -302,6 +324,99 @@ def ssh_execute(ssh, cmd, process_input=None,
     return (stdout, stderr)
 
 
+class SSHPool(pools.Pool):
+    """A bounded eventlet pool of SSH connections to a single host.
+
+    Connections send transport keepalives every conn_timeout seconds.  A
+    connection is checked when it is taken from the pool: one whose
+    transport has died, or that has sat unused for more than idle_timeout
+    seconds (0 disables that), is closed and replaced.
+    """
+
+    def __init__(self, ip, port, conn_timeout, login, password=None,
+                 privatekey=None, idle_timeout=0, *args, **kwargs):
+        self.ip = ip
+        self.port = port
+        self.login = login
+        self.password = password
+        self.conn_timeout = conn_timeout
+        self.privatekey = privatekey
+        self.idle_timeout = idle_timeout
+        self._last_used = {}
+        super(SSHPool, self).__init__(*args, **kwargs)
+
+    def create(self):
+        ssh = paramiko.SSHClient()
+        #TODO(justinsb): We need a better SSH key policy
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        if self.password:
+            ssh.connect(self.ip,
+                        port=self.port,
+                        username=self.login,
+                        password=self.password,
+                        timeout=self.conn_timeout)
+        elif self.privatekey:
+            privatekeyfile = os.path.expanduser(self.privatekey)
+            # It sucks that paramiko doesn't support DSA keys
+            privatekey = paramiko.RSAKey.from_private_key_file(privatekeyfile)
+            ssh.connect(self.ip,
+                        port=self.port,
+                        username=self.login,
+                        pkey=privatekey,
+                        timeout=self.conn_timeout)
+        else:
+            raise exception.Error(_("Specify san_password or san_private_key"))
+
+        ssh.get_transport().set_keepalive(self.conn_timeout)
+        self._last_used[ssh] = time.time()
+        return ssh
+
+    def _is_usable(self, conn):
+        transport = conn.get_transport()
+        if not transport or not transport.is_active():
+            return False
+        if self.idle_timeout:
+            if time.time() - self._last_used[conn] > self.idle_timeout:
+                return False
+        return True
+
+    def get(self):
+        """Return a live connection, blocking if max_size are in use."""
+        while self.free_items:
+            conn = self.free_items.popleft()
+            if self._is_usable(conn):
+                return conn
+            self.remove(conn)
+        return super(SSHPool, self).get()
+
+    def put(self, conn):
+        self._last_used[conn] = time.time()
+        super(SSHPool, self).put(conn)
+
+    def remove(self, conn):
+        """Close a checked out (or stale) connection and forget it.
+
+        Use instead of put() when the connection failed, so that its slot
+        is freed for a fresh one.
+        """
+        self._last_used.pop(conn, None)
+        self.current_size -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+        # NOTE: a greenthread may be blocked in get() waiting for the slot
+        # that this just freed.
+        if self.waiting():
+            try:
+                conn = self.create()
+            except Exception:
+                LOG.exception(_('Failed to replace SSH connection'))
+                return
+            self.current_size += 1
+            self.channel.put(conn)
+
+
 def cinderdir():
     import cinder
     return os.path.abspath(cinder.__file__).split('cinder/__init__.py')[0]
@@ -772,12 +887,30 @@ def to_primitive(value, convert_instances=False, level=0):
         return unicode(value)
 
 
+# Encode with simplejson when its C speedups are available.  Note that
+# simplejson encodes namedtuples as objects rather than arrays.
+try:
+    import simplejson._speedups
+    import simplejson as _json_encoder
+except ImportError:
+    _json_encoder = json
+
+
+def _json_default(value):
+    """Convert a value that json cannot encode into primitives."""
+    # Datetimes are in nearly every payload; skip the checks done by
+    # to_primitive() for them
+    if isinstance(value, datetime.datetime):
+        return str(value)
+
+    primitive = to_primitive(value)
+    if primitive is value:
+        raise TypeError(_('%r is not JSON serializable') % (value,))
+    return primitive
+
+
 def dumps(value):
-    try:
-        return json.dumps(value)
-    except TypeError:
-        pass
-    return json.dumps(to_primitive(value))
+    return _json_encoder.dumps(value, default=_json_default)
 
 
 def loads(s):
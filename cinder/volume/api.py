@@ -69,23 +69,137 @@ class API(base.Base):
     def create(self, context, size, name, description, snapshot=None,
                      volume_type=None, metadata=None, availability_zone=None):
         check_policy(context, 'create')
-        if snapshot is not None:
-            if snapshot['status'] != "available":
-                msg = _("status must be available")
-                raise exception.InvalidSnapshot(reason=msg)
-            if not size:
-                size = snapshot['volume_size']
-
-            snapshot_id = snapshot['id']
-        else:
-            snapshot_id = None
+        size, snapshot_id = self._check_snapshot(snapshot, size)
 
-        if quota.allowed_volumes(context, 1, size) < 1:
+        try:
+            reservations = quota.reserve(context, volumes=1,
+                                         gigabytes=int(size))
+        except exception.OverQuota as e:
             pid = context.project_id
+            if 'gigabytes' in e.kwargs['overs']:
+                LOG.warn(_("Quota exceeded for %(pid)s, tried to create"
+                        " %(size)sG volume") % locals())
+                raise exception.QuotaError(code="VolumeSizeTooLarge")
             LOG.warn(_("Quota exceeded for %(pid)s, tried to create"
-                    " %(size)sG volume") % locals())
-            raise exception.QuotaError(code="VolumeSizeTooLarge")
+                    " volume") % locals())
+            raise exception.QuotaError(code="VolumeLimitExceeded")
+
+        options = self._volume_options(context, size, name, description,
+                                       snapshot_id, volume_type, metadata,
+                                       availability_zone)
+        try:
+            volume = self.db.volume_create(context, options)
+        except Exception:
+            with utils.save_and_reraise_exception():
+                quota.rollback(context, reservations)
+        quota.commit(context, reservations)
+
+        rpc.cast(context,
+                 FLAGS.scheduler_topic,
+                 {"method": "create_volume",
+                  "args": {"topic": FLAGS.volume_topic,
+                           "volume_id": volume['id'],
+                           "snapshot_id": snapshot_id,
+                           "request_spec": self._request_spec(options,
+                                                              volume_type),
+                           "filter_properties": {}}})
+        return volume
+
+    def create_batch(self, context, count, size, name, description,
+                     snapshot=None, volume_type=None, metadata=None,
+                     availability_zone=None, min_count=None):
+        """Create up to count identical volumes.
+
+        Quota is checked once, the volumes are inserted in a single
+        transaction and the whole batch goes to the scheduler in one
+        request.  Fewer than count volumes are created if the quota
+        only allows that many, but at least min_count (which defaults
+        to count) must fit or QuotaError is raised.
+        """
+        check_policy(context, 'create')
+        if min_count is None:
+            min_count = count
+        if min_count < 1 or count < min_count:
+            msg = _("count must be greater than or equal to min_count, "
+                    "and min_count must be at least 1")
+            raise exception.InvalidInput(reason=msg)
+        size, snapshot_id = self._check_snapshot(snapshot, size)
+
+        allowed = count
+        while True:
+            try:
+                reservations = quota.reserve(context, volumes=allowed,
+                                             gigabytes=allowed * int(size))
+                break
+            except exception.OverQuota as e:
+                # NOTE: concurrent requests can use up the quota between
+                # tries, so shrink the batch every time to be sure to stop.
+                allowed = min(allowed - 1,
+                              self._allowed_by_quota(e.kwargs['quotas'],
+                                                     e.kwargs['usages'],
+                                                     size))
+                if allowed < min_count:
+                    pid = context.project_id
+                    LOG.warn(_("Quota exceeded for %(pid)s, tried to create"
+                            " %(min_count)s %(size)sG volumes") % locals())
+                    raise exception.QuotaError(code="VolumeLimitExceeded")
+
+        options = self._volume_options(context, size, name, description,
+                                       snapshot_id, volume_type, metadata,
+                                       availability_zone)
+        try:
+            volumes = self.db.volume_create_many(context,
+                    [dict(options) for _i in xrange(allowed)])
+        except Exception:
+            with utils.save_and_reraise_exception():
+                quota.rollback(context, reservations)
+        quota.commit(context, reservations)
+
+        rpc.cast(context,
+                 FLAGS.scheduler_topic,
+                 {"method": "create_volumes",
+                  "args": {"topic": FLAGS.volume_topic,
+                           "volume_ids": [volume['id']
+                                          for volume in volumes],
+                           "snapshot_id": snapshot_id,
+                           "request_spec": self._request_spec(options,
+                                                              volume_type),
+                           "filter_properties": {}}})
+        return volumes
+
+    def _allowed_by_quota(self, quotas, usages, size):
+        """Returns how many volumes of the given size still fit in the
+        quotas, given the usages reported by an OverQuota exception.
+        """
+        def headroom(resource):
+            limit = quotas.get(resource, -1)
+            if limit < 0:
+                return None
+            usage = usages[resource]
+            return max(limit - usage['in_use'] - usage['reserved'], 0)
+
+        allowed = []
+        volumes = headroom('volumes')
+        if volumes is not None:
+            allowed.append(volumes)
+        gigabytes = headroom('gigabytes')
+        if gigabytes is not None and int(size):
+            allowed.append(gigabytes // int(size))
+        return min(allowed or [0])
+
+    def _check_snapshot(self, snapshot, size):
+        """Returns the size and snapshot id to create a volume with."""
+        if snapshot is None:
+            return size, None
+        if snapshot['status'] != "available":
+            msg = _("status must be available")
+            raise exception.InvalidSnapshot(reason=msg)
+        if not size:
+            size = snapshot['volume_size']
+        return size, snapshot['id']
 
+    def _volume_options(self, context, size, name, description, snapshot_id,
+                        volume_type, metadata, availability_zone):
         if availability_zone is None:
             availability_zone = FLAGS.storage_availability_zone
 
@@ -94,7 +208,7 @@ class API(base.Base):
         else:
             volume_type_id = volume_type.get('id', None)
 
-        options = {
+        return {
             'size': size,
             'user_id': context.user_id,
             'project_id': context.project_id,
@@ -108,14 +222,15 @@ class API(base.Base):
             'metadata': metadata,
             }
 
-        volume = self.db.volume_create(context, options)
-        rpc.cast(context,
-                 FLAGS.scheduler_topic,
-                 {"method": "create_volume",
-                  "args": {"topic": FLAGS.volume_topic,
-                           "volume_id": volume['id'],
-                           "snapshot_id": snapshot_id}})
-        return volume
+    def _request_spec(self, options, volume_type):
+        return {
+            'volume_properties': {
+                'size': options['size'],
+                'availability_zone': options['availability_zone'],
+                'volume_type_id': options['volume_type_id'],
+                },
+            'volume_type': volume_type,
+            }
 
     # TODO(yamahata): eliminate dumb polling
     def wait_creation(self, context, volume):
@@ -131,7 +246,12 @@ class API(base.Base):
         volume_id = volume['id']
         if not volume['host']:
             # NOTE(vish): scheduling failed, so delete it
+            reservations = quota.reserve(context,
+                                         project_id=volume['project_id'],
+                                         volumes=-1,
+                                         gigabytes=-volume['size'])
             self.db.volume_destroy(context, volume_id)
+            quota.commit(context, reservations)
             return
         if volume['status'] not in ["available", "error"]:
             msg = _("Volume status must be available or error")
@@ -161,45 +281,24 @@ class API(base.Base):
         check_policy(context, 'get', volume)
         return volume
 
-    def get_all(self, context, search_opts={}):
+    def get_all(self, context, marker=None, limit=None,
+                sort_key='created_at', sort_dir='desc', filters=None):
+        """Return a page of volumes visible to the context.
+
+        Filtering, sorting and paging all happen in the database; see
+        db.volume_get_all for the accepted filters.
+        """
         check_policy(context, 'get_all')
+        if filters:
+            LOG.debug(_("Searching by: %s") % str(filters))
+
         if context.is_admin:
-            volumes = self.db.volume_get_all(context)
+            volumes = self.db.volume_get_all(context, marker, limit,
+                                             sort_key, sort_dir, filters)
         else:
             volumes = self.db.volume_get_all_by_project(context,
-                                    context.project_id)
-
-        if search_opts:
-            LOG.debug(_("Searching by: %s") % str(search_opts))
-
-            def _check_metadata_match(volume, searchdict):
-                volume_metadata = {}
-                for i in volume.get('volume_metadata'):
-                    volume_metadata[i['key']] = i['value']
-
-                for k, v in searchdict.iteritems():
-                    if (k not in volume_metadata.keys() or
-                        volume_metadata[k] != v):
-                        return False
-                return True
-
-            # search_option to filter_name mapping.
-            filter_mapping = {'metadata': _check_metadata_match}
-
-            result = []
-            for volume in volumes:
-                # go over all filters in the list
-                for opt, values in search_opts.iteritems():
-                    try:
-                        filter_func = filter_mapping[opt]
-                    except KeyError:
-                        # no such filter - ignore it, go to next filter
-                        continue
-                    else:
-                        if filter_func(volume, values):
-                            result.append(volume)
-                            break
-            volumes = result
+                                    context.project_id, marker, limit,
+                                    sort_key, sort_dir, filters)
         return volumes
 
     def get_snapshot(self, context, snapshot_id):
@@ -207,11 +306,16 @@ class API(base.Base):
         rv = self.db.snapshot_get(context, snapshot_id)
         return dict(rv.iteritems())
 
-    def get_all_snapshots(self, context):
+    def get_all_snapshots(self, context, marker=None, limit=None,
+                          sort_key='created_at', sort_dir='desc',
+                          filters=None):
         check_policy(context, 'get_all_snapshots')
         if context.is_admin:
-            return self.db.snapshot_get_all(context)
-        return self.db.snapshot_get_all_by_project(context, context.project_id)
+            return self.db.snapshot_get_all(context, marker, limit,
+                                            sort_key, sort_dir, filters)
+        return self.db.snapshot_get_all_by_project(context,
+                                    context.project_id, marker, limit,
+                                    sort_key, sort_dir, filters)
 
     @wrap_check_policy
     def check_attach(self, context, volume):
@@ -20,14 +20,19 @@ Drivers for volumes.
 
 """
 
+import functools
 import time
 
+from eventlet import greenpool
+
+from cinder import context
 from cinder import exception
 from cinder import flags
 from cinder import log as logging
 from cinder.openstack.common import cfg
 from cinder import utils
 from cinder.volume import iscsi
+from cinder.volume import wipe
 
 
 LOG = logging.getLogger(__name__)
@@ -64,6 +69,29 @@ volume_opts = [
                default=None,
                help='the libvirt uuid of the secret for the rbd_user'
                     'volumes'),
+    cfg.IntOpt('volume_copy_block_size',
+               default=4,
+               help='Block size in MB used by dd when copying volumes'),
+    cfg.BoolOpt('volume_copy_direct_io',
+                default=True,
+                help='Bypass the page cache when copying volumes'),
+    cfg.BoolOpt('volume_copy_sparse',
+                default=False,
+                help='Skip writing all-zero blocks when copying volumes. '
+                     'Only safe if newly created volumes read back as zeros'),
+    cfg.IntOpt('volume_copy_streams',
+               default=1,
+               help='Number of dd processes copying disjoint ranges of a '
+                    'volume in parallel'),
+    cfg.StrOpt('lvm_thin_pool',
+               default='cinder-volumes-pool',
+               help='Name of the thin pool in volume_group that holds the '
+                    'volumes of ThinLVMISCSIDriver'),
+    cfg.FloatOpt('lvm_max_over_subscription_ratio',
+                 default=1.0,
+                 help='Ratio of the virtual size of thin volumes to the '
+                      'size of the thin pool that ThinLVMISCSIDriver '
+                      'accepts'),
     ]
 
 FLAGS = flags.FLAGS
@@ -75,10 +103,12 @@ class VolumeDriver(object):
     def __init__(self, execute=utils.execute, *args, **kwargs):
         # NOTE(vish): db is set by Manager
         self.db = None
+        self.wiper = wipe.VolumeWiper(execute)
         self.set_execute(execute)
 
     def set_execute(self, execute):
         self._execute = execute
+        self.wiper.set_execute(execute)
 
     def _try_execute(self, *command, **kwargs):
         # NOTE(vish): Volume commands can partially fail due to timing, but
@@ -105,15 +135,64 @@ class VolumeDriver(object):
         if not FLAGS.volume_group in volume_groups:
             raise exception.Error(_("volume group %s doesn't exist")
                                   % FLAGS.volume_group)
+        self.wiper.resume(FLAGS.volume_group)
 
     def _create_volume(self, volume_name, sizestr):
         self._try_execute('lvcreate', '-L', sizestr, '-n',
                           volume_name, FLAGS.volume_group, run_as_root=True)
 
-    def _copy_volume(self, srcstr, deststr, size_in_g):
-        self._execute('dd', 'if=%s' % srcstr, 'of=%s' % deststr,
-                      'count=%d' % (size_in_g * 1024), 'bs=1M',
-                      run_as_root=True)
+    def _copy_volume(self, srcstr, deststr, size_in_g, sparse=None,
+                     progress=None):
+        """Copies size_in_g gigabytes from srcstr to deststr with dd.
+
+        The copy is split into ranges handled by up to volume_copy_streams
+        dd processes.  If given, progress is called with the percentage
+        copied so far each time a range completes; volumes of 20G or more
+        are split in 20 ranges for it.
+        """
+        if sparse is None:
+            sparse = FLAGS.volume_copy_sparse
+        block_size = FLAGS.volume_copy_block_size
+        blocks = (size_in_g * 1024 + block_size - 1) // block_size
+
+        extra_flags = ['conv=notrunc,sparse' if sparse else 'conv=notrunc']
+        if FLAGS.volume_copy_direct_io:
+            extra_flags += ['iflag=direct', 'oflag=direct']
+
+        streams = max(FLAGS.volume_copy_streams, 1)
+        ranges = streams
+        if progress is not None:
+            # NOTE: dd only reports when it is done, so use enough ranges
+            # to report progress in 5% steps, but no range under 1G so
+            # small copies are not split into many short dd processes.
+            ranges = max(ranges, min(20, blocks * block_size // 1024))
+        ranges = max(min(ranges, blocks), 1)
+        (step, remainder) = divmod(blocks, ranges)
+        starts = []
+        counts = []
+        for i in xrange(ranges):
+            starts.append(i * step + min(i, remainder))
+            counts.append(step + (1 if i < remainder else 0))
+
+        def copy_range(start, count):
+            self._execute('dd', 'if=%s' % srcstr, 'of=%s' % deststr,
+                          'bs=%dM' % block_size, 'skip=%d' % start,
+                          'seek=%d' % start, 'count=%d' % count,
+                          *extra_flags, run_as_root=True)
+            return count
+
+        pool = greenpool.GreenPool(streams)
+        copied = 0
+        for count in pool.imap(copy_range, starts, counts):
+            copied += count
+            if progress is not None and blocks:
+                progress(copied * 100 // blocks)
+
+    def _update_volume_progress(self, volume, percent):
+        if self.db is None or not volume.get('id'):
+            return
+        self.db.volume_update(context.get_admin_context(), volume['id'],
+                              {'progress': '%d%%' % percent})
 
     def _volume_not_present(self, volume_name):
         path_name = '%s/%s' % (FLAGS.volume_group, volume_name)
@@ -124,15 +203,13 @@ class VolumeDriver(object):
             return True
         return False
 
-    def _delete_volume(self, volume, size_in_g):
+    def _delete_volume(self, volume, size_in_g, clear=True):
         """Deletes a logical volume."""
-        # zero out old volumes to prevent data leaking between users
-        # TODO(ja): reclaiming space should be done lazy and low priority
-        self._copy_volume('/dev/zero', self.local_path(volume), size_in_g)
-        self._try_execute('lvremove', '-f', "%s/%s" %
-                          (FLAGS.volume_group,
-                           self._escape_snapshot(volume['name'])),
-                          run_as_root=True)
+        # zero out old volumes to prevent data leaking between users,
+        # in the background and at low priority
+        self.wiper.wipe(FLAGS.volume_group,
+                        self._escape_snapshot(volume['name']),
+                        size_in_g * 1024, clear=clear)
 
     def _sizestr(self, size_in_g):
         if int(size_in_g) == 0:
@@ -155,7 +232,9 @@ class VolumeDriver(object):
         """Creates a volume from a snapshot."""
         self._create_volume(volume['name'], self._sizestr(volume['size']))
         self._copy_volume(self.local_path(snapshot), self.local_path(volume),
-                          snapshot['volume_size'])
+                          snapshot['volume_size'],
+                          progress=functools.partial(
+                              self._update_volume_progress, volume))
 
     def delete_volume(self, volume):
         """Deletes a logical volume."""
@@ -192,9 +271,10 @@ class VolumeDriver(object):
             # If the snapshot isn't present, then don't attempt to delete
             return True
 
-        # TODO(yamahata): zeroing out the whole snapshot triggers COW.
-        # it's quite slow.
-        self._delete_volume(snapshot, snapshot['volume_size'])
+        # NOTE: zeroing out the whole snapshot triggers COW, which is slow
+        # and may overflow the snapshot, so it is skipped unless asked for.
+        self._delete_volume(snapshot, snapshot['volume_size'],
+                            clear=FLAGS.volume_wipe_snapshots)
 
     def local_path(self, volume):
         # NOTE(vish): stops deprecation warning
@@ -255,6 +335,7 @@ class ISCSIDriver(VolumeDriver):
 
     def __init__(self, *args, **kwargs):
         self.tgtadm = iscsi.get_target_admin()
+        self._stats = {}
         super(ISCSIDriver, self).__init__(*args, **kwargs)
 
     def set_execute(self, execute):
@@ -467,6 +548,159 @@ class ISCSIDriver(VolumeDriver):
                         "id:%(volume_id)s.") % locals())
             raise
 
+    def get_volume_stats(self, refresh=False):
+        """Get volume status.
+
+        If 'refresh' is True, run update the stats first."""
+        if refresh:
+            self._update_volume_status()
+
+        return self._stats
+
+    def _update_volume_status(self):
+        """Retrieve capacity information from the volume group."""
+        LOG.debug(_("Updating volume status"))
+        data = {'storage_protocol': 'iSCSI'}
+
+        try:
+            out, err = self._execute('vgs', '--noheadings', '--nosuffix',
+                                     '--unit=G', '-o', 'name,size,free',
+                                     FLAGS.volume_group, run_as_root=True)
+        except exception.ProcessExecutionError as exc:
+            LOG.error(_("Error retrieving volume status: %s"), exc.stderr)
+            out = None
+
+        # fake_execute returns None resulting unit test error
+        if out:
+            volume = out.split()
+            data['total_capacity_gb'] = float(volume[1])
+            data['free_capacity_gb'] = float(volume[2])
+
+        self._stats = data
+
+
+class ThinLVMISCSIDriver(ISCSIDriver):
+    """Executes commands relating to ISCSI volumes on a thin pool.
+
+    Volumes are thin LVs in lvm_thin_pool, and snapshots and volumes
+    created from snapshots are thin snapshots, so they are created
+    instantly and only use pool space for the blocks written to them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # NOTE: until the pool is checked, assume that freed blocks
+        # have to be cleared.
+        self._pool_zeroes_blocks = False
+        super(ThinLVMISCSIDriver, self).__init__(*args, **kwargs)
+
+    def _pool_path(self):
+        return '%s/%s' % (FLAGS.volume_group, FLAGS.lvm_thin_pool)
+
+    def check_for_setup_error(self):
+        """Returns an error if the volume group or thin pool is missing"""
+        super(ThinLVMISCSIDriver, self).check_for_setup_error()
+        try:
+            out, err = self._execute('lvs', '--noheadings', '-o', 'lv_attr',
+                                     self._pool_path(), run_as_root=True)
+        except exception.ProcessExecutionError:
+            out = None
+        attr = (out or '').strip()
+        if not attr.startswith('t'):
+            raise exception.Error(_("thin pool %s doesn't exist")
+                                  % self._pool_path())
+        # The pool overwrites newly provisioned blocks with zeros, so
+        # deleted volumes do not leak data to the next ones.
+        self._pool_zeroes_blocks = attr[7:8] == 'z'
+        if not self._pool_zeroes_blocks:
+            LOG.warn(_("Thin pool %(pool)s does not zero new blocks, data "
+                       "of deleted volumes may be readable from new ones. "
+                       "Enable zeroing with 'lvchange -Zy %(pool)s'."),
+                     {'pool': self._pool_path()})
+
+    def _create_volume(self, volume_name, sizestr):
+        self._try_execute('lvcreate', '-T', '-V', sizestr, '-n',
+                          volume_name, self._pool_path(), run_as_root=True)
+
+    def _create_thin_snapshot(self, name, origin_name):
+        self._try_execute('lvcreate', '--name', name, '--snapshot',
+                          '%s/%s' % (FLAGS.volume_group, origin_name),
+                          run_as_root=True)
+
+    def _delete_volume(self, volume, size_in_g, clear=True):
+        """Deletes a thin logical volume.
+
+        Thin volumes are never zero-filled: writing zeros provisions every
+        block of the virtual size and can fill an oversubscribed pool.
+        """
+        lv_name = self._escape_snapshot(volume['name'])
+        if clear and not self._pool_zeroes_blocks:
+            # NOTE: pass the freed blocks down to the physical volumes,
+            # which may clear them, before they go back to the pool.
+            path = '/dev/%s/%s' % (FLAGS.volume_group, lv_name)
+            try:
+                self._execute('blkdiscard', path, run_as_root=True)
+            except exception.ProcessExecutionError:
+                LOG.warn(_("Failed to discard %s before removing it"), path)
+        self.wiper.wipe(FLAGS.volume_group, lv_name, size_in_g * 1024,
+                        clear=False)
+
+    def create_volume_from_snapshot(self, volume, snapshot):
+        """Creates a volume as a thin snapshot of a snapshot."""
+        self._create_thin_snapshot(volume['name'],
+                                   self._escape_snapshot(snapshot['name']))
+        if volume['size'] > snapshot['volume_size']:
+            self._try_execute('lvextend', '-L',
+                              self._sizestr(volume['size']),
+                              '%s/%s' % (FLAGS.volume_group, volume['name']),
+                              run_as_root=True)
+
+    def create_snapshot(self, snapshot):
+        """Creates a thin snapshot."""
+        self._create_thin_snapshot(self._escape_snapshot(snapshot['name']),
+                                   snapshot['volume_name'])
+
+    def _update_volume_status(self):
+        """Retrieve capacity information from the thin pool."""
+        LOG.debug(_("Updating volume status"))
+        data = {'storage_protocol': 'iSCSI'}
+
+        try:
+            out, err = self._execute('lvs', '--noheadings', '--nosuffix',
+                                     '--units', 'g', '--separator', ':',
+                                     '-o', 'lv_name,lv_size,data_percent,'
+                                     'pool_lv', FLAGS.volume_group,
+                                     run_as_root=True)
+        except exception.ProcessExecutionError as exc:
+            LOG.error(_("Error retrieving volume status: %s"), exc.stderr)
+            out = None
+
+        pool_size = None
+        pool_used = 0.0
+        provisioned = 0.0
+        # fake_execute returns None resulting unit test error
+        for line in (out or '').splitlines():
+            fields = line.strip().split(':')
+            if len(fields) != 4:
+                continue
+            (name, size, data_percent, pool) = fields
+            if name == FLAGS.lvm_thin_pool:
+                pool_size = float(size)
+                pool_used = pool_size * float(data_percent or 0) / 100
+            elif pool == FLAGS.lvm_thin_pool:
+                provisioned += float(size)
+
+        if pool_size is not None:
+            ratio = FLAGS.lvm_max_over_subscription_ratio
+            data['total_capacity_gb'] = pool_size * ratio
+            data['free_capacity_gb'] = max(pool_size * ratio - provisioned,
+                                           0.0)
+            data['provisioned_capacity_gb'] = provisioned
+            data['pool_capacity_gb'] = pool_size
+            data['pool_free_capacity_gb'] = pool_size - pool_used
+            data['max_over_subscription_ratio'] = ratio
+
+        self._stats = data
+
 
 class FakeISCSIDriver(ISCSIDriver):
     """Logs calls instead of executing."""
@@ -38,6 +38,8 @@ intact.
 
 """
 
+import sys
+
 from cinder import context
 from cinder import exception
 from cinder import flags
@@ -45,6 +47,7 @@ from cinder import log as logging
 from cinder import manager
 from cinder.openstack.common import cfg
 from cinder.openstack.common import importutils
+from cinder import quota
 from cinder import rpc
 from cinder import utils
 from cinder.volume import volume_types
@@ -101,7 +104,8 @@ class VolumeManager(manager.SchedulerDependentManager):
             else:
                 LOG.info(_("volume %s: skipping export"), volume['name'])
 
-    def create_volume(self, context, volume_id, snapshot_id=None):
+    def create_volume(self, context, volume_id, snapshot_id=None,
+                      request_spec=None, filter_properties=None):
         """Creates and exports the volume."""
         context = context.elevated()
         volume_ref = self.db.volume_get(context, volume_id)
@@ -114,6 +118,7 @@ class VolumeManager(manager.SchedulerDependentManager):
         #             before passing it to the driver.
         volume_ref['host'] = self.host
 
+        created = False
         try:
             vol_name = volume_ref['name']
             vol_size = volume_ref['size']
@@ -126,6 +131,7 @@ class VolumeManager(manager.SchedulerDependentManager):
                 model_update = self.driver.create_volume_from_snapshot(
                     volume_ref,
                     snapshot_ref)
+            created = True
             if model_update:
                 self.db.volume_update(context, volume_ref['id'], model_update)
 
@@ -134,9 +140,14 @@ class VolumeManager(manager.SchedulerDependentManager):
             if model_update:
                 self.db.volume_update(context, volume_ref['id'], model_update)
         except Exception:
-            with utils.save_and_reraise_exception():
-                self.db.volume_update(context,
-                                      volume_ref['id'], {'status': 'error'})
+            exc_info = sys.exc_info()
+            if self._reschedule(context, volume_id, snapshot_id,
+                                request_spec, filter_properties,
+                                volume_ref if created else None):
+                return
+            self.db.volume_update(context,
+                                  volume_ref['id'], {'status': 'error'})
+            raise exc_info[0], exc_info[1], exc_info[2]
 
         now = utils.utcnow()
         self.db.volume_update(context,
@@ -146,6 +157,56 @@ class VolumeManager(manager.SchedulerDependentManager):
         self._reset_stats()
         return volume_id
 
+    def _reschedule(self, context, volume_id, snapshot_id, request_spec,
+                    filter_properties, volume_ref=None):
+        """Send a failed create back to the scheduler so that it can try
+        another host.  Returns True if the request was rescheduled.
+
+        volume_ref is given when the driver had created the volume before
+        the failure; it is removed here first, as once the volume moves
+        to another host a delete would never reach this one.
+        """
+        retry = (filter_properties or {}).get('retry')
+        if not retry or request_spec is None:
+            # no retry information, do not reschedule.
+            LOG.debug(_("Retry info not present, will not reschedule"))
+            return False
+
+        LOG.exception(_("volume %(volume_id)s: failed to create, "
+                        "re-scheduling (attempt %(num_attempts)s)"),
+                      {'volume_id': volume_id,
+                       'num_attempts': retry['num_attempts']})
+        if volume_ref is not None:
+            self._remove_failed_volume(context, volume_ref)
+        try:
+            self.db.volume_update(context, volume_id, {'host': None})
+            rpc.cast(context,
+                     FLAGS.scheduler_topic,
+                     {"method": "create_volume",
+                      "args": {"topic": FLAGS.volume_topic,
+                               "volume_id": volume_id,
+                               "snapshot_id": snapshot_id,
+                               "request_spec": request_spec,
+                               "filter_properties": filter_properties}})
+        except Exception:
+            LOG.exception(_("volume %s: error trying to reschedule"),
+                          volume_id)
+            return False
+        return True
+
+    def _remove_failed_volume(self, context, volume_ref):
+        """Remove a partly created volume, logging any errors."""
+        try:
+            self.driver.remove_export(context, volume_ref)
+        except Exception:
+            LOG.exception(_("volume %s: error removing export"),
+                          volume_ref['name'])
+        try:
+            self.driver.delete_volume(volume_ref)
+        except Exception:
+            LOG.exception(_("volume %s: error deleting volume"),
+                          volume_ref['name'])
+
     def delete_volume(self, context, volume_id):
         """Deletes and unexports volume."""
         context = context.elevated()
@@ -173,8 +234,22 @@ class VolumeManager(manager.SchedulerDependentManager):
                                       volume_ref['id'],
                                       {'status': 'error_deleting'})
 
+        # Get reservations
+        try:
+            reservations = quota.reserve(context,
+                                         project_id=volume_ref['project_id'],
+                                         volumes=-1,
+                                         gigabytes=-volume_ref['size'])
+        except Exception:
+            reservations = None
+            LOG.exception(_("Failed to update usages deleting volume"))
+
         self.db.volume_destroy(context, volume_id)
         LOG.debug(_("volume %s: deleted successfully"), volume_ref['name'])
+
+        # Commit the reservations
+        if reservations:
+            quota.commit(context, reservations)
         return True
 
     def create_snapshot(self, context, volume_id, snapshot_id):
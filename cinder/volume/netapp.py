@@ -23,9 +23,10 @@ ONTAP 7-mode storage systems with installed iSCSI licenses.
 
 """
 
-import time
 import string
 
+from eventlet import event
+from eventlet import greenthread
 import suds
 from suds import client
 from suds.sax import text
@@ -60,17 +61,98 @@ netapp_opts = [
     cfg.StrOpt('netapp_vfiler',
                default=None,
                help='Vfiler to use for provisioning'),
+    cfg.FloatOpt('netapp_job_poll_interval',
+                 default=1.0,
+                 help='Initial seconds between polls of outstanding DFM '
+                      'jobs'),
+    cfg.FloatOpt('netapp_job_poll_max_interval',
+                 default=10.0,
+                 help='Longest seconds between polls of outstanding DFM '
+                      'jobs while none of them make progress'),
     ]
 
 FLAGS = flags.FLAGS
 FLAGS.register_opts(netapp_opts)
 
 
+class DfmJobTracker(object):
+    """Waits on DFM jobs with a single shared polling greenthread.
+
+    Every outstanding job is polled once per pass.  The interval between
+    passes starts at netapp_job_poll_interval, doubles up to
+    netapp_job_poll_max_interval while no job reports new progress events
+    and drops back when one does or when a new job is added.  Waiters
+    sleep on an event until their job ends.
+    """
+
+    def __init__(self, get_progress):
+        self.get_progress = get_progress
+        self._jobs = {}
+        self._poller = None
+        self._interval = FLAGS.netapp_job_poll_interval
+
+    def wait(self, job_id):
+        """Block until the job ends; return all of its progress events."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = {'events': [], 'done': event.Event()}
+            self._jobs[job_id] = job
+        self._interval = FLAGS.netapp_job_poll_interval
+        if self._poller is None:
+            self._poller = greenthread.spawn(self._poll)
+        return job['done'].wait()
+
+    def _check_events(self, job, events):
+        """Return True if the new events finish the job."""
+        for ev in events:
+            if ev.EventStatus == 'error':
+                job['done'].send_exception(exception.Error(
+                        _('Job failed: %s') % (ev.ErrorMessage)))
+                return True
+            if ev.EventType == 'job-end':
+                job['done'].send(job['events'])
+                return True
+        return False
+
+    def _poll_once(self):
+        progress = False
+        for job_id, job in self._jobs.items():
+            try:
+                events = self.get_progress(job_id, len(job['events']))
+            except Exception, exc:
+                LOG.exception(_('Failed to get progress of DFM job %s'),
+                              job_id)
+                del self._jobs[job_id]
+                job['done'].send_exception(exc)
+                continue
+            if not events:
+                continue
+            progress = True
+            job['events'].extend(events)
+            if self._check_events(job, events):
+                del self._jobs[job_id]
+        return progress
+
+    def _poll(self):
+        try:
+            while self._jobs:
+                if self._poll_once():
+                    self._interval = FLAGS.netapp_job_poll_interval
+                if not self._jobs:
+                    break
+                greenthread.sleep(self._interval)
+                self._interval = min(self._interval * 2,
+                                     FLAGS.netapp_job_poll_max_interval)
+        finally:
+            self._poller = None
+
+
 class NetAppISCSIDriver(driver.ISCSIDriver):
     """NetApp iSCSI volume driver."""
 
     def __init__(self, *args, **kwargs):
         super(NetAppISCSIDriver, self).__init__(*args, **kwargs)
+        self.job_tracker = DfmJobTracker(self._get_job_progress)
 
     def _check_fail(self, request, response):
         if 'failed' == response.Status:
@@ -127,40 +209,35 @@ class NetAppISCSIDriver(driver.ISCSIDriver):
         res = self.client.service.DfmAbout()
         LOG.debug(_("Connected to DFM server"))
 
-    def _get_job_progress(self, job_id):
+    def _get_job_progress(self, job_id, seen=0):
         """
         Obtain the latest progress report for the job and return the
-        list of progress events.
+        progress events after the first seen ones.
         """
         server = self.client.service
         res = server.DpJobProgressEventListIterStart(JobId=job_id)
         tag = res.Tag
         event_list = []
         try:
-            while True:
-                res = server.DpJobProgressEventListIterNext(Tag=tag,
-                                                            Maximum=100)
-                if not hasattr(res, 'ProgressEvents'):
-                    break
-                event_list += res.ProgressEvents.DpJobProgressEventInfo
+            # NOTE: skip fetching the list when nothing new was recorded
+            records = getattr(res, 'Records', None)
+            if records is None or int(records) > seen:
+                while True:
+                    res = server.DpJobProgressEventListIterNext(Tag=tag,
+                                                                Maximum=100)
+                    if not hasattr(res, 'ProgressEvents'):
+                        break
+                    event_list += res.ProgressEvents.DpJobProgressEventInfo
         finally:
             server.DpJobProgressEventListIterEnd(Tag=tag)
-        return event_list
+        return event_list[seen:]
 
     def _wait_for_job(self, job_id):
         """
-        Poll the job until it completes or an error is detected. Return the
-        final list of progress events if it completes successfully.
+        Wait for the job to complete or for an error to be detected. Return
+        the final list of progress events if it completes successfully.
         """
-        while True:
-            events = self._get_job_progress(job_id)
-            for event in events:
-                if event.EventStatus == 'error':
-                    raise exception.Error(_('Job failed: %s') %
-                        (event.ErrorMessage))
-                if event.EventType == 'job-end':
-                    return events
-            time.sleep(5)
+        return self.job_tracker.wait(job_id)
 
     def _dataset_name(self, project):
         """Return the dataset name for a given project """
@@ -674,3 +751,7 @@ class NetAppISCSIDriver(driver.ISCSIDriver):
 
     def check_for_export(self, context, volume_id):
         raise NotImplementedError()
+
+    def get_volume_stats(self, refresh=False):
+        """Capacity reporting is not implemented for this backend."""
+        return None
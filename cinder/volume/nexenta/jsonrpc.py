@@ -22,8 +22,13 @@
 .. moduleauthor:: Yuriy Taraday <yorik.sar@gmail.com>
 """
 
+import httplib
 import json
-import urllib2
+import socket
+import time
+import urlparse
+
+from eventlet import pools
 
 from cinder.volume import nexenta
 from cinder import log as logging
@@ -35,12 +40,114 @@ class NexentaJSONException(nexenta.NexentaException):
     pass
 
 
-class NexentaJSONProxy(object):
-    def __init__(self, url, user, password, auto=False, obj=None, method=None):
-        self.url = url
+class NexentaConnectionPool(pools.Pool):
+    """A bounded pool of keep-alive HTTP(S) connections to one NMS."""
+
+    def __init__(self, scheme, netloc, *args, **kwargs):
+        if scheme == 'https':
+            self.connection_class = httplib.HTTPSConnection
+        else:
+            self.connection_class = httplib.HTTPConnection
+        self.netloc = netloc
+        super(NexentaConnectionPool, self).__init__(*args, **kwargs)
+
+    def create(self):
+        return self.connection_class(self.netloc)
+
+
+class NexentaJSONTransport(object):
+    """Sends NMS requests over pooled connections.
+
+    Shared by a proxy and every sub-proxy derived from it, so that the
+    connections, the auth header and an automatic switch to HTTPS are
+    set up once per appliance rather than once per call.
+    """
+
+    def __init__(self, url, user, password, auto=False, max_connections=4):
         self.user = user
         self.password = password
         self.auto = auto
+        self.max_connections = max_connections
+        auth = ('%s:%s' % (user, password)).encode('base64')[:-1]
+        self.headers = {'Content-Type': 'application/json',
+                        'Authorization': 'Basic %s' % (auth,)}
+        self._set_url(url)
+
+    def _set_url(self, url):
+        self.url = url
+        parts = urlparse.urlsplit(url)
+        self.path = parts.path or '/'
+        self.pool = NexentaConnectionPool(parts.scheme, parts.netloc,
+                                          max_size=self.max_connections)
+
+    def _post(self, connection, data, retry=False):
+        """POST data, resending once if it never reached the server.
+
+        With retry set the request is resent only when it could not be
+        written or the server closed the connection without a status
+        line; timeouts and errors while reading the response are raised.
+        """
+        try:
+            connection.request('POST', self.path, data, self.headers)
+        except socket.timeout:
+            raise
+        except (httplib.HTTPException, socket.error):
+            if not retry:
+                raise
+            connection.close()
+            return self._post(connection, data)
+
+        try:
+            response = connection.getresponse()
+        except httplib.BadStatusLine:
+            if not retry:
+                raise
+            connection.close()
+            return self._post(connection, data)
+        # NOTE: the body must be drained before the connection is reused
+        return response.status, response.read()
+
+    def request(self, data):
+        """Send one request and return the body of the response."""
+        pool = self.pool
+        connection = pool.get()
+        try:
+            reused = connection.sock is not None
+            try:
+                # NOTE: on a reused connection the server may have closed
+                # it while idle; _post resends only if it never got there.
+                status, body = self._post(connection, data, retry=reused)
+            except (httplib.HTTPException, socket.error):
+                connection.close()
+                if reused:
+                    raise
+                elif self.auto and self.url.startswith('http://'):
+                    # An HTTPS server does not answer plain HTTP.
+                    LOG.info(_('Auto switching to HTTPS connection to %s'),
+                             self.url)
+                    self._set_url('https' + self.url[4:])
+                    return self.request(data)
+                else:
+                    LOG.error(_('No headers in server response'))
+                    raise NexentaJSONException(_('Bad response from server'))
+        except Exception:
+            connection.close()
+            raise
+        finally:
+            pool.put(connection)
+        if status != httplib.OK:
+            raise NexentaJSONException(_('Bad response from server: %s') %
+                                       status)
+        return body
+
+
+class NexentaJSONProxy(object):
+    def __init__(self, url, user, password, auto=False, obj=None, method=None,
+                 max_connections=4, transport=None):
+        if transport is None:
+            transport = NexentaJSONTransport(url, user, password, auto=auto,
+                                             max_connections=max_connections)
+        self.transport = transport
         self.obj = obj
         self.method = method
 
@@ -51,32 +158,19 @@ class NexentaJSONProxy(object):
             obj, method = self.obj, name
         else:
             obj, method = '%s.%s' % (self.obj, self.method), name
-        return NexentaJSONProxy(self.url, self.user, self.password, self.auto,
-                                obj, method)
+        return NexentaJSONProxy(None, None, None, obj=obj, method=method,
+                                transport=self.transport)
 
     def __call__(self, *args):
         data = json.dumps({'object': self.obj,
                            'method': self.method,
                            'params': args})
-        auth = ('%s:%s' % (self.user, self.password)).encode('base64')[:-1]
-        headers = {'Content-Type': 'application/json',
-                   'Authorization': 'Basic %s' % (auth,)}
         LOG.debug(_('Sending JSON data: %s'), data)
-        request = urllib2.Request(self.url, data, headers)
-        response_obj = urllib2.urlopen(request)
-        if response_obj.info().status == 'EOF in headers':
-            if self.auto and self.url.startswith('http://'):
-                LOG.info(_('Auto switching to HTTPS connection to %s'),
-                                                                      self.url)
-                self.url = 'https' + self.url[4:]
-                request = urllib2.Request(self.url, data, headers)
-                response_obj = urllib2.urlopen(request)
-            else:
-                LOG.error(_('No headers in server response'))
-                raise NexentaJSONException(_('Bad response from server'))
-
-        response_data = response_obj.read()
-        LOG.debug(_('Got response: %s'), response_data)
+        start = time.time()
+        response_data = self.transport.request(data)
+        LOG.debug(_('Got response in %(elapsed).3fs: %(response)s'),
+                  {'elapsed': time.time() - start,
+                   'response': response_data})
         response = json.loads(response_data)
         if response.get('error') is not None:
             raise NexentaJSONException(response['error'].get('message', ''))
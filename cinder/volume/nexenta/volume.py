@@ -43,6 +43,10 @@ nexenta_opts = [
     cfg.StrOpt('nexenta_rest_protocol',
                default='auto',
                help='Use http or https for REST connection (default auto)'),
+    cfg.IntOpt('nexenta_rest_max_pool_conn',
+               default=4,
+               help='Maximum persistent connections to Nexenta REST API '
+                    'server'),
     cfg.StrOpt('nexenta_user',
                default='admin',
                help='User name to connect to Nexenta SA'),
@@ -85,7 +89,8 @@ class NexentaDriver(driver.ISCSIDriver):  # pylint: disable=R0921
         self.nms = jsonrpc.NexentaJSONProxy(
             '%s://%s:%s/rest/nms/' % (protocol, FLAGS.nexenta_host,
                                       FLAGS.nexenta_rest_port),
-            FLAGS.nexenta_user, FLAGS.nexenta_password, auto=auto)
+            FLAGS.nexenta_user, FLAGS.nexenta_password, auto=auto,
+            max_connections=FLAGS.nexenta_rest_max_pool_conn)
 
     def check_for_setup_error(self):
         """Verify that the volume for our zvols exists.
@@ -280,3 +285,7 @@ class NexentaDriver(driver.ISCSIDriver):  # pylint: disable=R0921
             LOG.warn(_('Got error trying to delete target %(target)s,'
                 ' assuming it is already gone: %(exc)s'),
                 {'target': target_name, 'exc': exc})
+
+    def get_volume_stats(self, refresh=False):
+        """Capacity reporting is not implemented for this backend."""
+        return None
@@ -24,13 +24,14 @@ controller on the SAN hardware.  We expect to access it over SSH or some API.
 import base64
 import httplib
 import json
-import os
 import paramiko
 import random
 import socket
 import string
+import time
 import uuid
 
+from eventlet import pools
 from lxml import etree
 
 from cinder import exception
@@ -72,6 +73,28 @@ san_opts = [
     cfg.StrOpt('san_zfs_volume_base',
                default='rpool/',
                help='The ZFS path under which to create zvols for volumes.'),
+    cfg.IntOpt('ssh_conn_timeout',
+               default=30,
+               help='SSH connection timeout in seconds; also the interval '
+                    'between keepalives on pooled connections'),
+    cfg.IntOpt('ssh_min_pool_conn',
+               default=1,
+               help='Minimum ssh connections in the pool'),
+    cfg.IntOpt('ssh_max_pool_conn',
+               default=5,
+               help='Maximum ssh connections in the pool'),
+    cfg.IntOpt('ssh_max_idle_time',
+               default=600,
+               help='Seconds a pooled ssh connection may sit unused before '
+                    'it is replaced; 0 keeps idle connections forever'),
+    cfg.IntOpt('sf_api_max_pool_conn',
+               default=4,
+               help='Maximum persistent HTTPS connections to the SolidFire '
+                    'API'),
+    cfg.IntOpt('sf_cache_timeout',
+               default=300,
+               help='Seconds to cache SolidFire cluster info and account '
+                    'lookups; 0 disables caching'),
     ]
 
 FLAGS = flags.FLAGS
@@ -89,30 +112,23 @@ class SanISCSIDriver(cinder.volume.driver.ISCSIDriver):
     def __init__(self):
         super(SanISCSIDriver, self).__init__()
         self.run_local = FLAGS.san_is_local
+        self.sshpool = None
 
     def _build_iscsi_target_name(self, volume):
         return "%s%s" % (FLAGS.iscsi_target_prefix, volume['name'])
 
-    def _connect_to_ssh(self):
-        ssh = paramiko.SSHClient()
-        #TODO(justinsb): We need a better SSH key policy
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        if FLAGS.san_password:
-            ssh.connect(FLAGS.san_ip,
-                        port=FLAGS.san_ssh_port,
-                        username=FLAGS.san_login,
-                        password=FLAGS.san_password)
-        elif FLAGS.san_private_key:
-            privatekeyfile = os.path.expanduser(FLAGS.san_private_key)
-            # It sucks that paramiko doesn't support DSA keys
-            privatekey = paramiko.RSAKey.from_private_key_file(privatekeyfile)
-            ssh.connect(FLAGS.san_ip,
-                        port=FLAGS.san_ssh_port,
-                        username=FLAGS.san_login,
-                        pkey=privatekey)
-        else:
-            raise exception.Error(_("Specify san_password or san_private_key"))
-        return ssh
+    def _get_ssh_pool(self):
+        if not self.sshpool:
+            self.sshpool = utils.SSHPool(FLAGS.san_ip,
+                                         FLAGS.san_ssh_port,
+                                         FLAGS.ssh_conn_timeout,
+                                         FLAGS.san_login,
+                                         password=FLAGS.san_password,
+                                         privatekey=FLAGS.san_private_key,
+                                         idle_timeout=FLAGS.ssh_max_idle_time,
+                                         min_size=FLAGS.ssh_min_pool_conn,
+                                         max_size=FLAGS.ssh_max_pool_conn)
+        return self.sshpool
 
     def _execute(self, *cmd, **kwargs):
         if self.run_local:
@@ -123,15 +139,29 @@ class SanISCSIDriver(cinder.volume.driver.ISCSIDriver):
             return self._run_ssh(command, check_exit_code)
 
     def _run_ssh(self, command, check_exit_code=True):
-        #TODO(justinsb): SSH connection caching (?)
-        ssh = self._connect_to_ssh()
-
-        #TODO(justinsb): Reintroduce the retry hack
-        ret = utils.ssh_execute(ssh, command, check_exit_code=check_exit_code)
-
-        ssh.close()
-
-        return ret
+        pool = self._get_ssh_pool()
+        try:
+            return self._run_ssh_once(pool, command, check_exit_code)
+        except paramiko.SSHException:
+            # NOTE: the session could not be opened, so the command never
+            # ran; the connection was dropped, try once on a fresh one.
+            LOG.warn(_("SSH connection to %s failed, reconnecting"),
+                     FLAGS.san_ip)
+            return self._run_ssh_once(pool, command, check_exit_code)
+
+    def _run_ssh_once(self, pool, command, check_exit_code):
+        """Run command on a pooled connection, dropping it if it broke."""
+        ssh = pool.get()
+        try:
+            return utils.ssh_execute(ssh, command,
+                                     check_exit_code=check_exit_code)
+        except (paramiko.SSHException, socket.error, EOFError):
+            pool.remove(ssh)
+            ssh = None
+            raise
+        finally:
+            if ssh is not None:
+                pool.put(ssh)
 
     def ensure_export(self, context, volume):
         """Synchronously recreates an export for a logical volume."""
@@ -156,6 +186,10 @@ class SanISCSIDriver(cinder.volume.driver.ISCSIDriver):
         if not (FLAGS.san_ip):
             raise exception.Error(_("san_ip must be set"))
 
+    def get_volume_stats(self, refresh=False):
+        """Capacity reporting is not implemented for this backend."""
+        return None
+
 
 def _collect_lines(data):
     """Split lines from data into an array, trimming them """
@@ -654,19 +688,81 @@ class HpSanISCSIDriver(SanISCSIDriver):
         self._cliq_run_xml("unassignVolume", cliq_args)
 
 
+class SolidFireConnectionPool(pools.Pool):
+    """A bounded pool of keep-alive HTTPS connections to the SolidFire API."""
+
+    def __init__(self, host, port, *args, **kwargs):
+        self.host = host
+        self.port = port
+        super(SolidFireConnectionPool, self).__init__(*args, **kwargs)
+
+    def create(self):
+        return httplib.HTTPSConnection(self.host, self.port)
+
+
 class SolidFireSanISCSIDriver(SanISCSIDriver):
 
+    def __init__(self):
+        super(SolidFireSanISCSIDriver, self).__init__()
+        self.connpool = None
+        self._cluster_info = None
+        self._sfaccounts = {}
+
+    def _get_connection_pool(self):
+        if not self.connpool:
+            # For now 443 is the only port our server accepts requests on
+            self.connpool = SolidFireConnectionPool(
+                    FLAGS.san_ip, 443, max_size=FLAGS.sf_api_max_pool_conn)
+        return self.connpool
+
+    def _cache_get(self, entry):
+        """Return the value of a (value, expires) cache entry, if fresh."""
+        if entry is not None and entry[1] > time.time():
+            return entry[0]
+
+    def _cache_entry(self, value):
+        return (value, time.time() + FLAGS.sf_cache_timeout)
+
+    def _post(self, connection, payload, header, retry=False):
+        """POST payload, resending once if it never reached the server.
+
+        A request is only resent when retry is set and the failure proves
+        the server never processed it: the request could not be written,
+        or the server closed the connection without sending a status
+        line.  Timeouts and errors while reading a response are raised,
+        as the call may already have taken effect.
+        """
+        try:
+            connection.request('POST', '/json-rpc/1.0', payload, header)
+        except socket.timeout:
+            raise
+        except (httplib.HTTPException, socket.error):
+            if not retry:
+                raise
+            connection.close()
+            return self._post(connection, payload, header)
+
+        try:
+            response = connection.getresponse()
+        except httplib.BadStatusLine:
+            if not retry:
+                raise
+            connection.close()
+            return self._post(connection, payload, header)
+        # NOTE: the body must be drained before the connection is reused
+        return response.status, response.read()
+
     def _issue_api_request(self, method_name, params):
         """All API requests to SolidFire device go through this method
 
         Simple json-rpc web based API calls.
         each call takes a set of paramaters (dict)
         and returns results in a dict as well.
-        """
 
-        host = FLAGS.san_ip
-        # For now 443 is the only port our server accepts requests on
-        port = 443
+        Requests are sent over pooled keep-alive connections.  If a reused
+        connection turns out to have been closed by the server before it
+        saw the request, it is reopened and the request is sent once more.
+        """
 
         # NOTE(john-griffith): Probably don't need this, but the idea is
         # we provide a request_id so we can correlate
@@ -695,26 +791,27 @@ class SolidFireSanISCSIDriver(SanISCSIDriver):
             header['Authorization'] = 'Basic %s' % auth_key
 
         LOG.debug(_("Payload for SolidFire API call: %s"), payload)
-        connection = httplib.HTTPSConnection(host, port)
-        connection.request('POST', '/json-rpc/1.0', payload, header)
-        response = connection.getresponse()
-        data = {}
-
-        if response.status != 200:
+        pool = self._get_connection_pool()
+        connection = pool.get()
+        try:
+            reused = connection.sock is not None
+            status, data = self._post(connection, payload, header,
+                                      retry=reused)
+        except Exception:
             connection.close()
-            raise exception.SolidFireAPIException(status=response.status)
+            raise
+        finally:
+            pool.put(connection)
 
-        else:
-            data = response.read()
-            try:
-                data = json.loads(data)
+        if status != 200:
+            raise exception.SolidFireAPIException(status=status)
 
-            except (TypeError, ValueError), exc:
-                connection.close()
-                msg = _("Call to json.loads() raised an exception: %s") % exc
-                raise exception.SfJsonEncodeFailure(msg)
+        try:
+            data = json.loads(data)
 
-            connection.close()
+        except (TypeError, ValueError), exc:
+            msg = _("Call to json.loads() raised an exception: %s") % exc
+            raise exception.SfJsonEncodeFailure(msg)
 
         LOG.debug(_("Results of SolidFire API call: %s"), data)
         return data
@@ -726,12 +823,16 @@ class SolidFireSanISCSIDriver(SanISCSIDriver):
             return data['result']['volumes']
 
     def _get_sfaccount_by_name(self, sf_account_name):
-        sfaccount = None
+        sfaccount = self._cache_get(self._sfaccounts.get(sf_account_name))
+        if sfaccount is not None:
+            return sfaccount
+
         params = {'username': sf_account_name}
         data = self._issue_api_request('GetAccountByName', params)
         if 'result' in data and 'account' in data['result']:
             LOG.debug(_('Found solidfire account: %s'), sf_account_name)
             sfaccount = data['result']['account']
+            self._sfaccounts[sf_account_name] = self._cache_entry(sfaccount)
         return sfaccount
 
     def _create_sfaccount(self, cinder_project_id):
@@ -752,19 +853,50 @@ class SolidFireSanISCSIDriver(SanISCSIDriver):
                       'targetSecret': chap_secret,
                       'attributes': {}}
             data = self._issue_api_request('AddAccount', params)
-            if 'result' in data:
-                sfaccount = self._get_sfaccount_by_name(sf_account_name)
+            if 'result' in data and 'accountID' in data['result']:
+                # NOTE: everything else about the account is what we just
+                # sent, so there is no need to read it back.
+                sfaccount = dict(params,
+                                 accountID=data['result']['accountID'])
+                self._sfaccounts[sf_account_name] = \
+                    self._cache_entry(sfaccount)
 
         return sfaccount
 
     def _get_cluster_info(self):
+        cluster_info = self._cache_get(self._cluster_info)
+        if cluster_info is not None:
+            return cluster_info
+
         params = {}
         data = self._issue_api_request('GetClusterInfo', params)
         if 'result' not in data:
             raise exception.SolidFireAPIDataException(data=data)
 
+        self._cluster_info = self._cache_entry(data['result'])
         return data['result']
 
+    def _get_sfvolume_iqn(self, create_result):
+        """Return the iqn of a just created volume.
+
+        Newer clusters return the volume along with its ID; otherwise look
+        the single volume up by ID rather than listing the whole account.
+        """
+        sfvolume = create_result.get('volume')
+        if sfvolume is None:
+            params = {'startVolumeID': create_result['volumeID'],
+                      'limit': 1}
+            data = self._issue_api_request('ListActiveVolumes', params)
+            if 'result' not in data:
+                raise exception.SolidFireAPIDataException(data=data)
+            for v in data['result']['volumes']:
+                if v['volumeID'] == create_result['volumeID']:
+                    sfvolume = v
+                    break
+            else:
+                raise exception.SolidFireAPIDataException(data=data)
+        return sfvolume['iqn']
+
     def _do_export(self, volume):
         """Gets the associated account, retrieves CHAP info and updates."""
 
@@ -827,14 +959,8 @@ class SolidFireSanISCSIDriver(SanISCSIDriver):
         if 'result' not in data or 'volumeID' not in data['result']:
             raise exception.SolidFireAPIDataException(data=data)
 
-        volume_id = data['result']['volumeID']
-
-        volume_list = self._get_volumes_by_sfaccount(account_id)
-        iqn = None
-        for v in volume_list:
-            if v['volumeID'] == volume_id:
-                iqn = 'iqn.2010-01.com.solidfire:' + v['iqn']
-                break
+        iqn = 'iqn.2010-01.com.solidfire:' + \
+            self._get_sfvolume_iqn(data['result'])
 
         model_update = {}
 
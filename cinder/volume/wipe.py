@@ -0,0 +1,198 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+# Copyright 2012 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+Helper code for clearing deleted logical volumes.
+
+"""
+
+import os
+
+from eventlet import greenpool
+
+from cinder import exception
+from cinder import flags
+from cinder import log as logging
+from cinder.openstack.common import cfg
+
+
+LOG = logging.getLogger(__name__)
+
+wipe_opts = [
+    cfg.IntOpt('volume_wipe_workers',
+               default=1,
+               help='Number of deleted volumes cleared in parallel in the '
+                    'background. 0 clears them synchronously on delete'),
+    cfg.BoolOpt('volume_wipe_discard',
+                default=True,
+                help='Discard deleted volumes instead of zeroing them when '
+                     'the device guarantees that discarded blocks read '
+                     'back as zeros'),
+    cfg.IntOpt('volume_wipe_ionice_class',
+               default=3,
+               help='ionice scheduling class used when zeroing deleted '
+                    'volumes: 1 realtime, 2 best-effort, 3 idle. 0 disables '
+                    'ionice'),
+    cfg.IntOpt('volume_wipe_bps_limit',
+               default=0,
+               help='Write bandwidth limit, in bytes per second, applied to '
+                    'each volume being zeroed through a blkio cgroup. '
+                    '0 means unlimited'),
+    cfg.StrOpt('volume_wipe_cgroup',
+               default='cinder-volume-wipe',
+               help='Name of the blkio cgroup used for volume_wipe_bps_limit'),
+    cfg.BoolOpt('volume_wipe_snapshots',
+                default=False,
+                help='Zero snapshots before removing them. Writing to a '
+                     'snapshot goes through copy-on-write and can overflow '
+                     'it, so this is slow and does not reliably clear the '
+                     'snapshot exception store'),
+    ]
+
+FLAGS = flags.FLAGS
+FLAGS.register_opts(wipe_opts)
+
+# Deleted volumes are renamed with this prefix until they are cleared, so
+# that wipes interrupted by a restart can be found again.
+PENDING_PREFIX = 'wipe-'
+
+
+class VolumeWiper(object):
+    """Clears and removes deleted logical volumes.
+
+    Volumes are renamed out of the way and cleared by a pool of
+    greenthreads, so deleting a volume only costs an lvrename.  Zeroing
+    runs with direct I/O under ionice and, optionally, a blkio cgroup
+    write limit so it does not starve other volumes in the group.
+    """
+
+    def __init__(self, execute):
+        self._pool = None
+        self._cgroup_created = False
+        self.set_execute(execute)
+
+    def set_execute(self, execute):
+        """Set the function to be used to execute commands."""
+        self._execute = execute
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = greenpool.GreenPool(FLAGS.volume_wipe_workers)
+        return self._pool
+
+    def wipe(self, volume_group, lv_name, size_in_m, clear=True):
+        """Clear lv_name and remove it, in the background if enabled."""
+        if not clear:
+            self._remove(volume_group, lv_name)
+            return
+        # NOTE: always clear under the pending name, even synchronously,
+        # so rootwrap only has to let dd write to wipe-* volumes.
+        pending_name = PENDING_PREFIX + lv_name
+        self._execute('lvrename', volume_group, lv_name, pending_name,
+                      run_as_root=True)
+        self._queue(volume_group, pending_name, size_in_m)
+
+    def resume(self, volume_group):
+        """Queue volumes left pending by a previous run of the service."""
+        out, err = self._execute('lvs', '--noheadings', '--nosuffix',
+                                 '--units', 'm', '-o', 'lv_name,lv_size',
+                                 volume_group, run_as_root=True)
+        # fake_execute returns None resulting unit test error
+        for line in (out or '').splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[0].startswith(PENDING_PREFIX):
+                LOG.info(_("Resuming wipe of %s"), fields[0])
+                self._queue(volume_group, fields[0], int(float(fields[1])))
+
+    def wait(self):
+        """Wait for queued wipes to finish."""
+        if self._pool is not None:
+            self._pool.waitall()
+
+    def _queue(self, volume_group, lv_name, size_in_m):
+        if FLAGS.volume_wipe_workers <= 0:
+            self._wipe(volume_group, lv_name, size_in_m)
+        else:
+            self._get_pool().spawn_n(self._wipe_pending, volume_group,
+                                     lv_name, size_in_m)
+
+    def _wipe_pending(self, volume_group, lv_name, size_in_m):
+        try:
+            self._wipe(volume_group, lv_name, size_in_m)
+        except Exception:
+            LOG.exception(_("Failed to wipe %s, it will be retried when "
+                            "the service restarts"), lv_name)
+
+    def _wipe(self, volume_group, lv_name, size_in_m):
+        path = '/dev/%s/%s' % (volume_group, lv_name)
+        if FLAGS.volume_wipe_discard and self._discard_zeroes_data(path):
+            LOG.debug(_("Discarding %s"), path)
+            self._execute('blkdiscard', path, run_as_root=True)
+        else:
+            LOG.debug(_("Zeroing %s"), path)
+            self._zero(path, size_in_m)
+        self._remove(volume_group, lv_name)
+
+    def _remove(self, volume_group, lv_name):
+        self._execute('lvremove', '-f', '%s/%s' % (volume_group, lv_name),
+                      run_as_root=True)
+
+    def _zero(self, path, size_in_m):
+        cmd = ['dd', 'if=/dev/zero', 'of=%s' % path,
+               'count=%d' % size_in_m, 'bs=1M', 'oflag=direct']
+        ionice_class = FLAGS.volume_wipe_ionice_class
+        if ionice_class not in (0, 1, 2, 3):
+            raise exception.InvalidInput(
+                reason=_('volume_wipe_ionice_class must be 0 to 3'))
+        if ionice_class:
+            cmd = ['ionice', '-c%d' % ionice_class] + cmd
+        if not FLAGS.volume_wipe_bps_limit:
+            self._execute(*cmd, run_as_root=True)
+            return
+        group = FLAGS.volume_wipe_cgroup
+        device = self._device_number(path)
+        self._set_write_limit(device, FLAGS.volume_wipe_bps_limit)
+        try:
+            cmd = ['cgexec', '-g', 'blkio:%s' % group] + cmd
+            self._execute(*cmd, run_as_root=True)
+        finally:
+            # A limit of 0 removes the rule for the device
+            self._set_write_limit(device, 0)
+
+    def _set_write_limit(self, device, bps):
+        group = FLAGS.volume_wipe_cgroup
+        if not self._cgroup_created:
+            self._execute('cgcreate', '-g', 'blkio:%s' % group,
+                          run_as_root=True)
+            self._cgroup_created = True
+        self._execute('cgset', '-r',
+                      'blkio.throttle.write_bps_device=%s %d' % (device, bps),
+                      group, run_as_root=True)
+
+    @staticmethod
+    def _device_number(path):
+        rdev = os.stat(path).st_rdev
+        return '%d:%d' % (os.major(rdev), os.minor(rdev))
+
+    @staticmethod
+    def _discard_zeroes_data(path):
+        """Whether discarded blocks of path are guaranteed to read as 0."""
+        name = os.path.basename(os.path.realpath(path))
+        try:
+            with open('/sys/block/%s/queue/discard_zeroes_data' % name) as f:
+                return f.read().strip() == '1'
+        except IOError:
+            return False
@@ -79,20 +79,35 @@ class Server(object):
                              custom_pool=self._pool,
                              log=self._wsgi_logger)
 
-    def start(self, backlog=128):
-        """Start serving a WSGI application.
+    def listen(self, backlog=128):
+        """Bind the listening socket without serving on it yet.
+
+        Lets a parent process bind the socket once and share it with the
+        worker processes it forks.  Does nothing if already bound.
 
         :param backlog: Maximum number of queued connections.
         :returns: None
         :raises: cinder.exception.InvalidInput
 
         """
+        if self._socket is not None:
+            return
         if backlog < 1:
             raise exception.InvalidInput(
                     reason='The backlog must be more than 1')
         self._socket = eventlet.listen((self.host, self.port), backlog=backlog)
-        self._server = eventlet.spawn(self._start)
         (self.host, self.port) = self._socket.getsockname()
+
+    def start(self, backlog=128):
+        """Start serving a WSGI application.
+
+        :param backlog: Maximum number of queued connections.
+        :returns: None
+        :raises: cinder.exception.InvalidInput
+
+        """
+        self.listen(backlog)
+        self._server = eventlet.spawn(self._start)
         LOG.info(_("Started %(name)s on %(host)s:%(port)s") % self.__dict__)
 
     def stop(self):
@@ -104,6 +119,9 @@ class Server(object):
         :returns: None
 
         """
+        if self._server is None:
+            # Never started, e.g. the service failed before serving
+            return
         LOG.info(_("Stopping WSGI server."))
         self._server.kill()
 
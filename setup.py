@@ -68,6 +68,7 @@ setuptools.setup(name='cinder',
                'bin/cinder-api',
                'bin/cinder-manage',
                'bin/cinder-rootwrap',
+               'bin/cinder-rootwrap-daemon',
                'bin/cinder-scheduler',
                'bin/cinder-volume'],
         py_modules=[])
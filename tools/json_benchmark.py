@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# Copyright 2012 OpenStack LLC.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""json_benchmark.py - Times JSON encoding of volume detail payloads
+
+Compares cinder.utils.dumps() against encoding through to_primitive(),
+which is what it used to do for any payload containing a datetime.
+
+"""
+
+import datetime
+import gettext
+import json
+import optparse
+import os
+import sys
+import timeit
+
+possible_topdir = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]),
+                                                os.pardir,
+                                                os.pardir))
+if os.path.exists(os.path.join(possible_topdir, 'cinder', '__init__.py')):
+    sys.path.insert(0, possible_topdir)
+
+gettext.install('cinder', unicode=1)
+
+from cinder import utils
+
+
+def make_volume(i):
+    """Return a volume as rendered by the volume detail view."""
+    now = datetime.datetime.utcnow()
+    return {'id': '%08d-0000-0000-0000-000000000000' % i,
+            'status': 'in-use',
+            'size': 10,
+            'availability_zone': 'nova',
+            'created_at': now,
+            'attachments': [{'id': '%08d' % i,
+                             'server_id': 'fakeuuid',
+                             'volume_id': '%08d' % i,
+                             'device': '/dev/vdb'}],
+            'display_name': 'volume-%d' % i,
+            'display_description': 'benchmark volume %d' % i,
+            'volume_type': 'default',
+            'snapshot_id': None,
+            'metadata': {'key': 'value'}}
+
+
+def legacy_dumps(value):
+    try:
+        return json.dumps(value)
+    except TypeError:
+        pass
+    return json.dumps(utils.to_primitive(value))
+
+
+def main():
+    parser = optparse.OptionParser('usage: %prog [options]')
+    parser.add_option('--volumes', type='int', default=1000,
+                      help='Number of volumes in the payload')
+    parser.add_option('--repeat', type='int', default=20,
+                      help='Number of times each payload is encoded')
+    options, args = parser.parse_args()
+
+    payload = {'volumes': [make_volume(i) for i in xrange(options.volumes)]}
+    assert json.loads(utils.dumps(payload)) == \
+        json.loads(legacy_dumps(payload))
+
+    print 'Encoder: %s' % utils._json_encoder.__name__
+    for name, func in (('to_primitive', legacy_dumps),
+                       ('dumps', utils.dumps)):
+        elapsed = timeit.Timer(lambda: func(payload)).timeit(options.repeat)
+        print '%-12s %8.2f ms per payload of %d volumes' % (
+            name, elapsed * 1000 / options.repeat, options.volumes)
+
+
+if __name__ == '__main__':
+    main()